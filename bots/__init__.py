@@ -0,0 +1 @@
+# Ten plik może być pusty. Oznacza to, że 'bots' jest pakietem Pythona.
\ No newline at end of file
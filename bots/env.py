@@ -0,0 +1,327 @@
+"""
+Środowisko do uczenia i oceny agentów w stylu Gymnasium (bez zależności od samego Gymnasium).
+
+SolitaireEnv udostępnia reset(seed) / step(action) nad stałą, dyskretną przestrzenią akcji:
+dobranie z talii oraz każdy ruch między stosami (W->F, W->T, T->F, F->T i T->T z liczbą kart).
+Obserwacja to wektor int16 o stałym kształcie zawierający wyłącznie widoczne informacje,
+a maska dozwolonych akcji to wektor bool tej samej długości co przestrzeń akcji.
+VectorSolitaireEnv uruchamia K środowisk w procesach roboczych, które zapisują obserwacje,
+maski i nagrody bezpośrednio do buforów pamięci współdzielonej.
+
+Uruchomienie (pomiar przepustowości kroków):
+    python -m bots.env --steps 20000 --envs 16 --workers 4
+"""
+import argparse
+import multiprocessing
+import os
+import time
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from game_logic.game_state import GameState
+from game_logic.move import Move, DRAW_MOVE
+from game_logic.variants import CompiledRules, resolve_variant
+from utils.constants import DIFFICULTY_EASY, DIFFICULTY_HARD, PILE_WASTE, PILE_FOUNDATION, PILE_TABLEAU, RANKS_PER_SUIT
+from utils.game_settings import get_default_settings as get_default_game_settings
+from .runner import progress_key, DEFAULT_MAX_MOVES, DEFAULT_STALL_LIMIT
+
+# Kodowanie pola obserwacji: 0 - brak karty, 1 - karta zakryta, 2 + Card.code - karta odkryta.
+CELL_EMPTY = 0
+CELL_FACE_DOWN = 1
+CELL_CARD_OFFSET = 2
+
+
+def build_action_table(rules: CompiledRules) -> List[Move]:
+    """Wszystkie akcje wariantu w stałej kolejności: indeks akcji -> Move."""
+    foundations = range(rules.num_foundation_piles)
+    columns = range(rules.num_tableau_piles)
+    actions = [DRAW_MOVE]
+    actions.extend(Move(PILE_WASTE, None, PILE_FOUNDATION, f) for f in foundations)
+    actions.extend(Move(PILE_WASTE, None, PILE_TABLEAU, t) for t in columns)
+    actions.extend(Move(PILE_TABLEAU, t, PILE_FOUNDATION, f) for t in columns for f in foundations)
+    actions.extend(Move(PILE_FOUNDATION, f, PILE_TABLEAU, t) for f in foundations for t in columns)
+    # Odkryta sekwencja w kolumnie to zawsze malejący ciąg, więc ma najwyżej RANKS_PER_SUIT kart.
+    actions.extend(Move(PILE_TABLEAU, source, PILE_TABLEAU, dest, n)
+                   for source in columns for dest in columns if source != dest
+                   for n in range(1, RANKS_PER_SUIT + 1))
+    return actions
+
+
+class SolitaireEnv:
+    """
+    Jedno środowisko. Nagroda za krok to zmiana liczby kart na fundamentach podzielona przez liczbę
+    kart w grze (wygrana daje łącznie 1.0). Epizod kończy się (terminated) wygraną albo brakiem
+    dozwolonych akcji, a jest ucinany (truncated) po `max_steps` krokach lub `stall_limit` krokach
+    bez postępu - te same limity co w bots.runner.play_game.
+    """
+    def __init__(self, difficulty: str = DIFFICULTY_EASY, settings: Optional[Dict[str, Any]] = None,
+                 max_steps: int = DEFAULT_MAX_MOVES, stall_limit: int = DEFAULT_STALL_LIMIT):
+        self.difficulty = difficulty
+        self.settings = settings if settings is not None else get_default_game_settings()
+        self.rules = resolve_variant(difficulty, self.settings.get("variant")).rules
+        self.max_steps = max_steps
+        self.stall_limit = stall_limit
+        self.actions = build_action_table(self.rules)
+        self.action_index: Dict[Move, int] = {move: i for i, move in enumerate(self.actions)}
+        self.num_actions = len(self.actions)
+        # Najwyższa kolumna: wszystkie zakryte karty największej kolumny rozdania i pełna sekwencja od Króla.
+        self.max_column_height = max(self.rules.tableau_deal) - 1 + RANKS_PER_SUIT
+        self._tableau_size = self.rules.num_tableau_piles * self.max_column_height
+        self._waste_offset = self._tableau_size + self.rules.num_foundation_piles
+        self._counts_offset = self._waste_offset + self.rules.draw_count
+        # Obserwacja: kolumny tableau (wierszami od spodu), wierzchy fundamentów, widoczne karty Waste
+        # (od najstarszej), a na końcu liczba kart w talii, liczba kart w Waste i liczba przełożeń talii.
+        self.observation_size = self._counts_offset + 3
+        self.game_state: Optional[GameState] = None
+        self.steps = 0
+        self._last_progress: Tuple[int, int] = (0, 0)
+        self._steps_without_progress = 0
+
+    def reset(self, seed: Optional[int] = None) -> Tuple[np.ndarray, Dict[str, Any]]:
+        self.game_state = GameState(self.difficulty, self.settings, seed=seed)
+        self.steps = 0
+        self._last_progress = progress_key(self.game_state)
+        self._steps_without_progress = 0
+        return self.observe(), {"action_mask": self.action_mask(), "seed": seed}
+
+    def step(self, action: int) -> Tuple[np.ndarray, float, bool, bool, Dict[str, Any]]:
+        """Wykonuje akcję o danym indeksie. Akcja spoza maski dozwolonych akcji to błąd (ValueError)."""
+        game_state = self.game_state
+        move = self.actions[action]
+        if move not in game_state.get_legal_moves():
+            raise ValueError(f"Illegal action {action} ({move})")
+        foundation_before = self._last_progress[0]
+        game_state.apply_move(move)
+        self.steps += 1
+        progress = progress_key(game_state)
+        reward = (progress[0] - foundation_before) / self.rules.num_cards
+        if progress != self._last_progress:
+            self._last_progress = progress
+            self._steps_without_progress = 0
+        else:
+            self._steps_without_progress += 1
+        won = game_state.check_win_condition()
+        mask = self.action_mask()
+        terminated = won or not mask.any()
+        truncated = not terminated and (self.steps >= self.max_steps or self._steps_without_progress > self.stall_limit)
+        return self.observe(), reward, terminated, truncated, {"action_mask": mask, "won": won,
+                                                               "moves": game_state.moves_count}
+
+    def action_mask(self, out: Optional[np.ndarray] = None) -> np.ndarray:
+        mask = out if out is not None else np.zeros(self.num_actions, dtype=np.bool_)
+        mask[:] = False
+        for move in self.game_state.get_legal_moves():
+            mask[self.action_index[move]] = True
+        return mask
+
+    def observe(self, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Zapisuje obserwację do `out` (np. wiersza bufora współdzielonego) albo do nowej tablicy."""
+        game_state = self.game_state
+        observation = out if out is not None else np.empty(self.observation_size, dtype=np.int16)
+        observation[:] = CELL_EMPTY
+        height = self.max_column_height
+        for t, pile in enumerate(game_state.tableau_piles):
+            base = t * height
+            for row, card in enumerate(pile.cards[:height]):
+                observation[base + row] = card.code + CELL_CARD_OFFSET if card.face_up else CELL_FACE_DOWN
+        for f, pile in enumerate(game_state.foundation_piles):
+            if pile.cards:
+                observation[self._tableau_size + f] = pile.cards[-1].code + CELL_CARD_OFFSET
+        for i, card in enumerate(game_state.waste_pile.get_display_cards()):
+            observation[self._waste_offset + i] = card.code + CELL_CARD_OFFSET
+        counts = self._counts_offset
+        observation[counts] = len(game_state.stock_pile)
+        observation[counts + 1] = len(game_state.waste_pile)
+        observation[counts + 2] = game_state.stock_recycles
+        return observation
+
+
+def _attach(name: str, shape: Tuple[int, ...], dtype) -> Tuple[shared_memory.SharedMemory, np.ndarray]:
+    memory = shared_memory.SharedMemory(name=name)
+    return memory, np.ndarray(shape, dtype=dtype, buffer=memory.buf)
+
+
+def _vector_worker(connection, buffer_specs: Dict[str, Tuple[str, Tuple[int, ...], str]], start: int, stop: int,
+                   env_kwargs: Dict[str, Any], seed: Optional[int]):
+    """
+    Proces roboczy obsługujący środowiska [start, stop). Wyniki trafiają do buforów współdzielonych,
+    a przez potok idą tylko komendy i potwierdzenia.
+    """
+    attached = {key: _attach(name, shape, dtype) for key, (name, shape, dtype) in buffer_specs.items()}
+    buffers = {key: array for key, (_, array) in attached.items()}
+    envs = [SolitaireEnv(**env_kwargs) for _ in range(start, stop)]
+    seed_rng = np.random.default_rng(seed)
+    try:
+        while True:
+            command, payload = connection.recv()
+            if command == "close":
+                break
+            for offset, env in enumerate(envs):
+                i = start + offset
+                if command == "reset":
+                    env_seed = payload[i] if payload is not None else int(seed_rng.integers(2 ** 32))
+                    env.reset(env_seed)
+                    buffers["rewards"][i] = 0.0
+                    buffers["terminated"][i] = False
+                    buffers["truncated"][i] = False
+                    buffers["won"][i] = False
+                else:
+                    _, reward, terminated, truncated, _ = env.step(int(buffers["actions"][i]))
+                    buffers["rewards"][i] = reward
+                    buffers["terminated"][i] = terminated
+                    buffers["truncated"][i] = truncated
+                    buffers["won"][i] = terminated and env.game_state.check_win_condition()
+                    if terminated or truncated:
+                        # Automatyczny reset jak w wektorowych środowiskach Gymnasium: obserwacja
+                        # zwrócona po końcu epizodu jest już pierwszą obserwacją następnego.
+                        env.reset(int(seed_rng.integers(2 ** 32)))
+                env.observe(buffers["observations"][i])
+                env.action_mask(buffers["masks"][i])
+            connection.send(True)
+    finally:
+        for memory, _ in attached.values():
+            memory.close()
+        connection.close()
+
+
+class VectorSolitaireEnv:
+    """
+    K środowisk w `workers` procesach. step(actions) przyjmuje wektor K indeksów akcji i zwraca
+    widoki na bufory współdzielone (obserwacje K x observation_size, maski K x num_actions, nagrody,
+    terminated, truncated) - kolejne wywołanie nadpisuje je, więc wyniki do zachowania trzeba skopiować.
+    """
+    def __init__(self, num_envs: int, workers: Optional[int] = None, seed: Optional[int] = None, **env_kwargs):
+        self.num_envs = num_envs
+        self.workers = max(1, min(workers or os.cpu_count() or 1, num_envs))
+        template = SolitaireEnv(**env_kwargs)
+        self.num_actions = template.num_actions
+        self.observation_size = template.observation_size
+        self.actions = template.actions
+        layout = {
+            "observations": ((num_envs, self.observation_size), "int16"),
+            "masks": ((num_envs, self.num_actions), "bool"),
+            "actions": ((num_envs,), "int32"),
+            "rewards": ((num_envs,), "float32"),
+            "terminated": ((num_envs,), "bool"),
+            "truncated": ((num_envs,), "bool"),
+            "won": ((num_envs,), "bool"),
+        }
+        self._memories: List[shared_memory.SharedMemory] = []
+        self.buffers: Dict[str, np.ndarray] = {}
+        buffer_specs = {}
+        for key, (shape, dtype) in layout.items():
+            nbytes = max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize)
+            memory = shared_memory.SharedMemory(create=True, size=nbytes)
+            self._memories.append(memory)
+            self.buffers[key] = np.ndarray(shape, dtype=dtype, buffer=memory.buf)
+            self.buffers[key][...] = 0
+            buffer_specs[key] = (memory.name, shape, dtype)
+
+        seeds = np.random.SeedSequence(seed).spawn(self.workers)
+        bounds = np.linspace(0, num_envs, self.workers + 1).astype(int)
+        context = multiprocessing.get_context()
+        self._connections = []
+        self._processes = []
+        for w in range(self.workers):
+            parent, child = context.Pipe()
+            worker_seed = int(seeds[w].generate_state(1)[0])
+            process = context.Process(target=_vector_worker, daemon=True,
+                                      args=(child, buffer_specs, int(bounds[w]), int(bounds[w + 1]), env_kwargs,
+                                            worker_seed))
+            process.start()
+            child.close()
+            self._connections.append(parent)
+            self._processes.append(process)
+        self._closed = False
+
+    def _broadcast(self, command: str, payload=None) -> None:
+        for connection in self._connections:
+            connection.send((command, payload))
+        for connection in self._connections:
+            connection.recv()
+
+    def reset(self, seeds: Optional[Sequence[int]] = None) -> Tuple[np.ndarray, Dict[str, Any]]:
+        self._broadcast("reset", list(seeds) if seeds is not None else None)
+        return self.buffers["observations"], {"action_mask": self.buffers["masks"]}
+
+    def step(self, actions: Sequence[int]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, Dict[str, Any]]:
+        self.buffers["actions"][:] = actions
+        self._broadcast("step")
+        return (self.buffers["observations"], self.buffers["rewards"], self.buffers["terminated"],
+                self.buffers["truncated"], {"action_mask": self.buffers["masks"], "won": self.buffers["won"]})
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        for connection in self._connections:
+            try:
+                connection.send(("close", None))
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self._processes:
+            process.join(timeout=5)
+        self.buffers.clear()
+        for memory in self._memories:
+            memory.close()
+            memory.unlink()
+
+    def __enter__(self) -> 'VectorSolitaireEnv':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def random_legal_actions(masks: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """Losowa dozwolona akcja dla każdego wiersza maski (wiersz bez dozwolonych akcji daje 0)."""
+    scores = rng.random(masks.shape, dtype=np.float32)
+    scores[~masks] = -1.0
+    return scores.argmax(axis=1)
+
+
+def benchmark(steps: int, num_envs: int, workers: int, difficulty: str, seed: int = 0) -> Dict[str, float]:
+    """Mierzy kroki na sekundę losowego agenta: jedno środowisko w tym procesie oraz wersja wektorowa."""
+    rng = np.random.default_rng(seed)
+    env = SolitaireEnv(difficulty)
+    _, info = env.reset(seed)
+    mask = info["action_mask"]
+    start_time = time.perf_counter()
+    for _ in range(steps):
+        action = int(random_legal_actions(mask[np.newaxis], rng)[0])
+        _, _, terminated, truncated, info = env.step(action)
+        mask = info["action_mask"]
+        if terminated or truncated:
+            _, info = env.reset(int(rng.integers(2 ** 32)))
+            mask = info["action_mask"]
+    single_rate = steps / (time.perf_counter() - start_time)
+
+    with VectorSolitaireEnv(num_envs, workers, seed=seed, difficulty=difficulty) as vector_env:
+        _, info = vector_env.reset()
+        rounds = max(1, steps // num_envs)
+        start_time = time.perf_counter()
+        for _ in range(rounds):
+            _, _, _, _, info = vector_env.step(random_legal_actions(info["action_mask"], rng))
+        vector_rate = rounds * num_envs / (time.perf_counter() - start_time)
+        used_workers = vector_env.workers
+    return {"single": single_rate, "vector": vector_rate, "workers": used_workers,
+            "vector_per_worker": vector_rate / used_workers}
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Pomiar przepustowości środowiska do uczenia agentów.")
+    parser.add_argument("--steps", type=int, default=20000, help="Liczba kroków w każdym pomiarze.")
+    parser.add_argument("--envs", type=int, default=16, help="Liczba środowisk w wersji wektorowej.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Liczba procesów wersji wektorowej.")
+    parser.add_argument("--difficulty", choices=[DIFFICULTY_EASY, DIFFICULTY_HARD], default=DIFFICULTY_EASY)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    result = benchmark(args.steps, args.envs, args.workers, args.difficulty, args.seed)
+    print(f"jedno środowisko      : {result['single']:10.0f} kroków/s")
+    print(f"wektorowe ({args.envs} środ.): {result['vector']:10.0f} kroków/s "
+          f"({result['workers']} proc., {result['vector_per_worker']:.0f} kroków/s na proces)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+import contextlib
+import copy
+import json
+import random
+from typing import Dict, FrozenSet, Iterator, List, Optional, Set, Tuple, Type
+from game_logic.card import Card
+from game_logic.game_state import GameState
+from game_logic.move import Move
+from utils.constants import PILE_WASTE, PILE_FOUNDATION, PILE_TABLEAU
+
+DEFAULT_WEIGHTS: Dict[str, float] = {
+    "foundation_cards": 5.0,
+    "face_down_cards": -3.0,
+    "empty_columns": 2.0,
+    "talon_cards": -1.0,
+    "waste_mobility": 0.5,
+    "mobility": 0.1,
+}
+
+
+class GameView:
+    """
+    Widok planszy tylko do odczytu przekazywany strategiom.
+    Zakryte karty tableau są widoczne jako None, a talia rezerwowa tylko jako liczba kart.
+    Karty odkryte dopiero w explore()/preview() (odwrócona karta tableau, karty dobrane z talii)
+    też są widoczne jako None: strategia wie, że coś się odsłoni, ale nie co, a ruchy tymi
+    kartami i na nie są pomijane w legal_moves().
+    """
+    def __init__(self, game_state: GameState, masked: FrozenSet[Tuple[str, Optional[int], int]] = frozenset()):
+        self._game_state = game_state
+        # Pozycje (typ stosu, indeks, miejsce w stosie) kart odkrytych w hipotetycznych ruchach.
+        self._masked = set(masked)
+
+    @property
+    def difficulty(self) -> str:
+        return self._game_state.difficulty
+
+    @property
+    def moves_count(self) -> int:
+        return self._game_state.moves_count
+
+    @property
+    def stock_size(self) -> int:
+        return len(self._game_state.stock_pile)
+
+    @property
+    def waste_cards(self) -> Tuple[Optional[Card], ...]:
+        return tuple(None if (PILE_WASTE, None, pos) in self._masked else c
+                     for pos, c in enumerate(self._game_state.waste_pile.cards))
+
+    @property
+    def num_tableau_piles(self) -> int:
+        return len(self._game_state.tableau_piles)
+
+    @property
+    def num_foundation_piles(self) -> int:
+        return len(self._game_state.foundation_piles)
+
+    def foundation(self, idx: int) -> Tuple[Card, ...]:
+        return tuple(self._game_state.foundation_piles[idx].cards)
+
+    def tableau(self, idx: int) -> Tuple[Optional[Card], ...]:
+        return tuple(c if c.face_up and (PILE_TABLEAU, idx, pos) not in self._masked else None
+                     for pos, c in enumerate(self._game_state.tableau_piles[idx].cards))
+
+    def face_down_count(self, idx: int) -> int:
+        """Liczba zakrytych kart kolumny (bez kart odkrytych w explore()/preview(), choć też są None)."""
+        return sum(1 for c in self._game_state.tableau_piles[idx].cards if not c.face_up)
+
+    def legal_moves(self) -> List[Move]:
+        moves = self._game_state.get_legal_moves()
+        if self._masked:
+            moves = [m for m in moves if not self._touches_masked(m)]
+        return moves
+
+    def is_won(self) -> bool:
+        return self._game_state.check_win_condition()
+
+    def _top_masked(self, pile_type: str, idx: Optional[int]) -> bool:
+        if pile_type == PILE_FOUNDATION:
+            return False
+        pile = self._game_state.waste_pile if pile_type == PILE_WASTE else self._game_state.tableau_piles[idx]
+        return (pile_type, idx, len(pile) - 1) in self._masked
+
+    def _touches_masked(self, move: Move) -> bool:
+        """Czy ruch przenosi zamaskowaną kartę, kładzie coś na niej albo przetasowuje ją z Waste."""
+        if move.is_draw:
+            return self._game_state.stock_pile.is_empty() and \
+                any(key[0] == PILE_WASTE for key in self._masked)
+        if move.to_pile_type == PILE_TABLEAU and self._top_masked(PILE_TABLEAU, move.to_idx):
+            return True
+        # Zamaskowana karta jest zawsze na wierzchu stosu, więc każdy ruch z tego stosu ją zabiera.
+        return self._top_masked(move.from_pile_type, move.from_idx)
+
+    def _revealed_by(self, move: Move) -> Set[Tuple[str, Optional[int], int]]:
+        """Pozycje kart, które ruch (jeszcze niewykonany) odsłoni graczowi."""
+        if move.is_draw:
+            stock = len(self._game_state.stock_pile)
+            waste = len(self._game_state.waste_pile)
+            drawn = min(stock, self._game_state.rules.draw_count)
+            return {(PILE_WASTE, None, waste + i) for i in range(drawn)}
+        if move.from_pile_type != PILE_TABLEAU:
+            return set()
+        cards = self._game_state.tableau_piles[move.from_idx].cards
+        below = len(cards) - move.num_cards - 1
+        if below >= 0 and not cards[below].face_up:
+            return {(PILE_TABLEAU, move.from_idx, below)}
+        return set()
+
+    def preview(self, move: Move) -> Optional['GameView']:
+        """Zwraca widok pozycji po wykonaniu ruchu na kopii gry lub None, gdy ruch jest niedozwolony."""
+        if self._touches_masked(move):
+            return None
+        revealed = self._revealed_by(move)
+        game_copy = copy.deepcopy(self._game_state)
+        success, _ = game_copy.apply_move(move)
+        return GameView(game_copy, frozenset(self._masked | revealed)) if success else None
+
+    @contextlib.contextmanager
+    def explore(self, move: Move) -> Iterator['GameView']:
+        """
+        Tymczasowo wykonuje dozwolony ruch (GameState.apply) i cofa go (GameState.revert)
+        po wyjściu z bloku `with`. Pozwala przeszukiwać pozycje bez kopiowania gry.
+        """
+        revealed = self._revealed_by(move) - self._masked
+        token = self._game_state.apply(move)
+        self._masked |= revealed
+        try:
+            yield self
+        finally:
+            self._masked -= revealed
+            self._game_state.revert(token)
+
+
+def extract_features(view: GameView) -> Dict[str, float]:
+    """Liczy cechy pozycji używane przez heurystyczną ocenę planszy."""
+    foundation_cards = sum(len(view.foundation(i)) for i in range(view.num_foundation_piles))
+    face_down_cards = 0
+    empty_columns = 0
+    for i in range(view.num_tableau_piles):
+        column = view.tableau(i)
+        if not column:
+            empty_columns += 1
+        face_down_cards += view.face_down_count(i)
+    legal_moves = view.legal_moves()
+    waste_mobility = sum(1 for m in legal_moves if m.from_pile_type == PILE_WASTE)
+    return {
+        "foundation_cards": float(foundation_cards),
+        "face_down_cards": float(face_down_cards),
+        "empty_columns": float(empty_columns),
+        "talon_cards": float(view.stock_size + len(view.waste_cards)),
+        "waste_mobility": float(waste_mobility),
+        "mobility": float(len(legal_moves)),
+    }
+
+
+def evaluate_position(view: GameView, weights: Optional[Dict[str, float]] = None) -> float:
+    """Ocena pozycji jako suma ważona cech (wyższa = lepsza)."""
+    weights = weights if weights is not None else DEFAULT_WEIGHTS
+    features = extract_features(view)
+    return sum(weights.get(name, 0.0) * value for name, value in features.items())
+
+
+def is_productive_move(view: GameView, move: Move) -> bool:
+    """
+    Odrzuca ruchy, które niczego nie odsłaniają i mogą prowadzić do zapętlenia
+    (przekładanie sekwencji tam i z powrotem, zdejmowanie kart z fundamentu).
+    """
+    if move.is_draw or move.to_pile_type == PILE_FOUNDATION or move.from_pile_type == PILE_WASTE:
+        return True
+    if move.from_pile_type == PILE_FOUNDATION:
+        return False
+    source = view.tableau(move.from_idx)
+    remaining = len(source) - move.num_cards
+    if remaining == 0:
+        # Przeniesienie całej kolumny ma sens tylko, gdy nie zaczyna się ona od Króla.
+        return source[0] is not None and source[0].value != 13
+    card_below = source[remaining - 1]
+    if card_below is None:
+        return True
+    return _fits_foundation(view, card_below)
+
+
+def _fits_foundation(view: GameView, card: Card) -> bool:
+    for i in range(view.num_foundation_piles):
+        foundation = view.foundation(i)
+        if not foundation:
+            if card.value == 1:
+                return True
+        elif foundation[-1].suit == card.suit and foundation[-1].value + 1 == card.value:
+            return True
+    return False
+
+
+class Policy:
+    """
+    Interfejs strategii: dostaje widok planszy tylko do odczytu i listę dozwolonych ruchów,
+    zwraca jeden z tych ruchów.
+    """
+    name = "policy"
+
+    def reset(self, seed: Optional[int] = None) -> None:
+        """Przygotowuje strategię do nowej gry (np. ustawia ziarno losowania)."""
+
+    def choose_move(self, view: GameView, legal_moves: List[Move]) -> Move:
+        raise NotImplementedError
+
+
+class RandomPolicy(Policy):
+    """Wybiera losowy dozwolony ruch."""
+    name = "random"
+
+    def __init__(self, seed: Optional[int] = None):
+        self.rng = random.Random(seed)
+
+    def reset(self, seed: Optional[int] = None) -> None:
+        self.rng.seed(seed)
+
+    def choose_move(self, view: GameView, legal_moves: List[Move]) -> Move:
+        return self.rng.choice(legal_moves)
+
+
+class GreedyFoundationPolicy(Policy):
+    """
+    Zachłanna strategia "najpierw fundament": ruchy na fundament, potem odsłanianie
+    zakrytych kart, potem karty z Waste, a dobieranie z talii na końcu.
+    """
+    name = "greedy"
+
+    def choose_move(self, view: GameView, legal_moves: List[Move]) -> Move:
+        best_move, best_priority = None, None
+        for move in legal_moves:
+            priority = self._priority(view, move)
+            if priority is not None and (best_priority is None or priority > best_priority):
+                best_move, best_priority = move, priority
+        return best_move if best_move is not None else legal_moves[0]
+
+    def _priority(self, view: GameView, move: Move) -> Optional[Tuple[int, int]]:
+        if move.is_draw:
+            return 0, 0
+        if not is_productive_move(view, move):
+            return None
+        if move.to_pile_type == PILE_FOUNDATION:
+            return (5, 1) if move.from_pile_type == PILE_TABLEAU else (5, 0)
+        if move.from_pile_type == PILE_TABLEAU:
+            source = view.tableau(move.from_idx)
+            face_down_below = sum(1 for c in source[:len(source) - move.num_cards] if c is None)
+            if face_down_below:
+                return 4, face_down_below
+            return 2, 0
+        return 3, 0
+
+
+class LookaheadPolicy(Policy):
+    """
+    Strategia z płytkim przeszukiwaniem: ocenia pozycje po każdym sensownym ruchu
+    (i opcjonalnie po najlepszej odpowiedzi) funkcją evaluate_position.
+    Dobiera z talii tylko wtedy, gdy żaden ruch nie poprawia oceny.
+    """
+    name = "lookahead"
+
+    def __init__(self, depth: int = 2, weights: Optional[Dict[str, float]] = None):
+        self.depth = depth
+        self.weights = dict(weights) if weights is not None else dict(DEFAULT_WEIGHTS)
+
+    def choose_move(self, view: GameView, legal_moves: List[Move]) -> Move:
+        current_score = evaluate_position(view, self.weights)
+        best_move, best_score = None, None
+        draw_move = None
+        for move in legal_moves:
+            if move.is_draw:
+                draw_move = move
+                continue
+            if not is_productive_move(view, move):
+                continue
+            with view.explore(move):
+                score = self._search(view, self.depth - 1)
+            if best_score is None or score > best_score:
+                best_move, best_score = move, score
+        if best_move is not None and (draw_move is None or best_score >= current_score):
+            return best_move
+        if draw_move is not None:
+            return draw_move
+        return legal_moves[0]
+
+    def _search(self, view: GameView, depth: int) -> float:
+        score = evaluate_position(view, self.weights)
+        if depth <= 0 or view.is_won():
+            return score
+        for move in view.legal_moves():
+            if move.is_draw or not is_productive_move(view, move):
+                continue
+            with view.explore(move):
+                score = max(score, self._search(view, depth - 1))
+        return score
+
+
+POLICIES: Dict[str, Type[Policy]] = {
+    RandomPolicy.name: RandomPolicy,
+    GreedyFoundationPolicy.name: GreedyFoundationPolicy,
+    LookaheadPolicy.name: LookaheadPolicy,
+}
+
+
+def load_weights(path: str) -> Dict[str, float]:
+    """
+    Wagi oceny pozycji z pliku JSON (wynik bots.tuning albo zwykły słownik cecha -> waga).
+    Cechy nieobecne w pliku zachowują wartości z DEFAULT_WEIGHTS.
+    """
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict) and isinstance(data.get("weights"), dict):
+        data = data["weights"]
+    if not isinstance(data, dict):
+        raise ValueError(f"Plik '{path}' nie zawiera słownika wag.")
+    unknown = sorted(set(data) - set(DEFAULT_WEIGHTS))
+    if unknown:
+        raise ValueError(f"Nieznane cechy w pliku wag '{path}': {', '.join(unknown)}")
+    weights = dict(DEFAULT_WEIGHTS)
+    weights.update({name: float(value) for name, value in data.items()})
+    return weights
+
+
+def create_policy(name: str, **kwargs) -> Policy:
+    """Tworzy strategię po nazwie z rejestru POLICIES."""
+    if name not in POLICIES:
+        raise ValueError(f"Nieznana strategia: '{name}'. Dostępne: {', '.join(POLICIES)}")
+    return POLICIES[name](**kwargs)
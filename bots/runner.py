@@ -0,0 +1,72 @@
+import time
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+from game_logic.game_state import GameState
+from game_logic.move import Move
+from utils.constants import DIFFICULTY_EASY
+from utils.game_settings import get_default_settings as get_default_game_settings
+from .policy import GameView, Policy
+
+DEFAULT_MAX_MOVES = 1000
+DEFAULT_STALL_LIMIT = 200
+
+
+class GameResult(NamedTuple):
+    """Wynik jednej partii rozegranej przez strategię."""
+    policy: str
+    seed: Optional[int]
+    won: bool
+    moves: int
+    decisions: int
+    elapsed: float
+    history: Tuple[Move, ...] = ()
+
+
+def progress_key(game_state: GameState) -> tuple:
+    """Para (karty na fundamentach, zakryte karty) - zmienia się tylko przy realnym postępie."""
+    foundation_cards = sum(len(p) for p in game_state.foundation_piles)
+    face_down_cards = sum(1 for p in game_state.tableau_piles for c in p.cards if not c.face_up)
+    return foundation_cards, face_down_cards
+
+
+def play_game(policy: Policy, seed: Optional[int] = None, difficulty: str = DIFFICULTY_EASY,
+              settings: Optional[Dict[str, Any]] = None, max_moves: int = DEFAULT_MAX_MOVES,
+              stall_limit: int = DEFAULT_STALL_LIMIT, game_state: Optional[GameState] = None,
+              record_moves: bool = False) -> GameResult:
+    """
+    Rozgrywa całą partię strategią `policy`.
+    Partia kończy się wygraną, brakiem ruchów, limitem ruchów albo po `stall_limit`
+    decyzjach bez postępu (żadna karta nie trafiła na fundament ani nie została odsłonięta).
+    Z `record_moves` wynik zawiera też wszystkie wykonane ruchy (np. do archiwum partii).
+    """
+    if game_state is None:
+        game_state = GameState(difficulty, settings if settings is not None else get_default_game_settings(), seed=seed)
+    policy.reset(seed)
+    view = GameView(game_state)
+    decisions = 0
+    last_progress = progress_key(game_state)
+    moves_without_progress = 0
+    history = []
+    start_time = time.perf_counter()
+
+    while not game_state.check_win_condition() and decisions < max_moves:
+        legal_moves = game_state.get_legal_moves()
+        if not legal_moves:
+            break
+        move = policy.choose_move(view, legal_moves)
+        decisions += 1
+        success, _ = game_state.apply_move(move)
+        if not success:
+            break
+        if record_moves:
+            history.append(move)
+        current_progress = progress_key(game_state)
+        if current_progress != last_progress:
+            last_progress = current_progress
+            moves_without_progress = 0
+        else:
+            moves_without_progress += 1
+            if moves_without_progress > stall_limit:
+                break
+
+    return GameResult(policy.name, seed, game_state.check_win_condition(), game_state.moves_count,
+                      decisions, time.perf_counter() - start_time, tuple(history))
@@ -0,0 +1,138 @@
+"""
+Turniej strategii: każda strategia gra te same rozdania (te same ziarna), a partie
+są rozdzielane na pulę procesów.
+
+Uruchomienie:
+    python -m bots.tournament --games 200 --policies random,greedy,lookahead --workers 4
+"""
+import argparse
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from game_logic.game_state import make_rules_key
+from game_logic.variants import VARIANTS, VARIANT_CLASSIC, resolve_variant
+from utils.constants import DIFFICULTY_EASY, DIFFICULTY_HARD
+from utils.game_archive import ArchiveWriter, RESULT_LOSS, RESULT_WIN
+from utils.game_settings import get_default_settings as get_default_game_settings
+from .policy import POLICIES, LookaheadPolicy, create_policy, load_weights
+from .runner import GameResult, play_game
+
+DEFAULT_CHUNK_SIZE = 10
+
+
+def _play_chunk(task: Tuple[str, Dict[str, Any], Sequence[int], str, Dict[str, Any], bool]) -> List[GameResult]:
+    policy_name, policy_kwargs, seeds, difficulty, settings, record_moves = task
+    policy = create_policy(policy_name, **policy_kwargs)
+    return [play_game(policy, seed, difficulty, settings, record_moves=record_moves) for seed in seeds]
+
+
+def run_tournament(policy_names: Sequence[str], seeds: Sequence[int], difficulty: str = DIFFICULTY_EASY,
+                   settings: Optional[Dict[str, Any]] = None, workers: Optional[int] = None,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE, record_moves: bool = False,
+                   policy_options: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, List[GameResult]]:
+    """
+    Rozgrywa wszystkie ziarna każdą strategią. Zwraca wyniki posortowane po ziarnie.
+    `policy_options` to opcjonalne argumenty create_policy według nazwy strategii (np. wagi).
+    """
+    settings = settings if settings is not None else get_default_game_settings()
+    policy_options = policy_options or {}
+    tasks = [(name, policy_options.get(name, {}), seeds[i:i + chunk_size], difficulty, settings, record_moves)
+             for name in policy_names for i in range(0, len(seeds), chunk_size)]
+    results: Dict[str, List[GameResult]] = {name: [] for name in policy_names}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for chunk_results in executor.map(_play_chunk, tasks):
+            for result in chunk_results:
+                results[result.policy].append(result)
+    for name in policy_names:
+        results[name].sort(key=lambda r: r.seed)
+    return results
+
+
+def write_archive(path: str, results: Dict[str, List[GameResult]], difficulty: str, settings: Dict[str, Any]) -> None:
+    """Zapisuje partie turnieju do archiwum kolumnowego (etykieta = nazwa strategii)."""
+    rules_key = make_rules_key(resolve_variant(difficulty, settings.get("variant")).name, difficulty, settings)
+    with ArchiveWriter(path) as writer:
+        for name, games in results.items():
+            for game in games:
+                writer.append(game.seed, rules_key, RESULT_WIN if game.won else RESULT_LOSS, game.moves,
+                              game.elapsed, game.history, label=name)
+
+
+def mcnemar_test(results_a: Sequence[GameResult], results_b: Sequence[GameResult]) -> Tuple[int, int, float]:
+    """
+    Test McNemara dla sparowanych wyników (te same ziarna).
+    Zwraca (wygrane tylko A, wygrane tylko B, p-wartość z poprawką ciągłości).
+    """
+    only_a = sum(1 for a, b in zip(results_a, results_b) if a.won and not b.won)
+    only_b = sum(1 for a, b in zip(results_a, results_b) if b.won and not a.won)
+    if only_a + only_b == 0:
+        return only_a, only_b, 1.0
+    chi2 = (abs(only_a - only_b) - 1) ** 2 / (only_a + only_b)
+    return only_a, only_b, math.erfc(math.sqrt(chi2 / 2))
+
+
+def format_report(results: Dict[str, List[GameResult]]) -> str:
+    lines = [f"{'Strategia':<12}{'Wygrane':>10}{'Śr. ruchów':>12}{'Decyzje/s':>12}"]
+    for name, games in results.items():
+        if not games:
+            continue
+        win_rate = sum(g.won for g in games) / len(games)
+        avg_moves = sum(g.moves for g in games) / len(games)
+        total_time = sum(g.elapsed for g in games)
+        decisions_per_sec = sum(g.decisions for g in games) / total_time if total_time > 0 else 0.0
+        lines.append(f"{name:<12}{win_rate:>9.1%} {avg_moves:>11.1f} {decisions_per_sec:>11.0f}")
+
+    names = [name for name in results if results[name]]
+    if len(names) > 1:
+        lines.append("")
+        lines.append("Porównanie parami (test McNemara na wygranych):")
+        for i, name_a in enumerate(names):
+            for name_b in names[i + 1:]:
+                only_a, only_b, p_value = mcnemar_test(results[name_a], results[name_b])
+                lines.append(f"  {name_a} vs {name_b}: {only_a} : {only_b}, p = {p_value:.4f}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Turniej strategii botów Pasjansa.")
+    parser.add_argument("--games", type=int, default=100, help="Liczba rozdań na strategię.")
+    parser.add_argument("--seed", type=int, default=0, help="Pierwsze ziarno zestawu rozdań.")
+    parser.add_argument("--policies", default=",".join(POLICIES), help="Lista strategii oddzielona przecinkami.")
+    parser.add_argument("--difficulty", choices=[DIFFICULTY_EASY, DIFFICULTY_HARD], default=DIFFICULTY_EASY)
+    parser.add_argument("--variant", choices=[VARIANT_CLASSIC, *VARIANTS], default=VARIANT_CLASSIC)
+    parser.add_argument("--no-reshuffle", action="store_true", help="Bez przetasowania Waste po wyczerpaniu talii.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Liczba procesów.")
+    parser.add_argument("--archive", metavar="PLIK", help="Zapisz partie (z ruchami) do archiwum kolumnowego.")
+    parser.add_argument("--weights", metavar="PLIK",
+                        help="Wagi oceny dla strategii lookahead (JSON, np. wynik bots.tuning).")
+    args = parser.parse_args(argv)
+
+    settings = get_default_game_settings()
+    settings["reshuffle_waste_on_empty_stock"] = not args.no_reshuffle
+    settings["variant"] = args.variant
+    policy_names = [name.strip() for name in args.policies.split(",") if name.strip()]
+    for name in policy_names:
+        if name not in POLICIES:
+            parser.error(f"Nieznana strategia: '{name}'. Dostępne: {', '.join(POLICIES)}")
+    policy_options: Dict[str, Dict[str, Any]] = {}
+    if args.weights:
+        try:
+            policy_options[LookaheadPolicy.name] = {"weights": load_weights(args.weights)}
+        except (OSError, ValueError) as e:
+            parser.error(f"Nie można wczytać wag: {e}")
+    seeds = list(range(args.seed, args.seed + args.games))
+
+    start_time = time.perf_counter()
+    results = run_tournament(policy_names, seeds, args.difficulty, settings, args.workers,
+                             record_moves=args.archive is not None, policy_options=policy_options)
+    print(format_report(results))
+    if args.archive:
+        write_archive(args.archive, results, args.difficulty, settings)
+        print(f"Archiwum partii: '{args.archive}'.")
+    print(f"\nCzas całkowity: {time.perf_counter() - start_time:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""
+Strojenie wag heurystycznej oceny pozycji (DEFAULT_WEIGHTS) przez grę z samym sobą.
+
+Optymalizator SPSA (simultaneous perturbation stochastic approximation) w NumPy: w każdej
+iteracji wszystkie wagi są jednocześnie zaburzane losowym wektorem znaków ±1, a strategia
+lookahead z wagami θ+cΔ i θ-cΔ gra ten sam zestaw rozdań (wspólne ziarna - różnica wyników
+nie zależy od tego, które rozdania akurat wylosowano). Partie obu kandydatów są rozdzielane na
+pulę procesów, więc jakość wag ogranicza tylko budżet obliczeń (iteracje × partie).
+
+Wynik partii to 1 za wygraną, a przy przegranej PROGRESS_WEIGHT × odsetek kart na
+fundamentach - sama wygrana jest zbyt rzadkim sygnałem dla małych zestawów rozdań.
+Po każdej iteracji stan jest zapisywany w pliku kontrolnym; ponowne uruchomienie z tym samym
+plikiem wznawia strojenie. Wagi wynikowe to średnia iteratów z drugiej połowy przebiegu
+(uśrednianie Polyaka) z przedziałami ufności metodą średnich z paczek, porównana z wagami
+domyślnymi na osobnych rozdaniach walidacyjnych.
+
+Uruchomienie:
+    python -m bots.tuning --iterations 40 --games 64 --workers 4 --output tuned_weights.json
+    python -m bots.tournament --policies lookahead --weights tuned_weights.json
+"""
+import argparse
+import json
+import math
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from game_logic.game_state import GameState, make_rules_key
+from game_logic.variants import VARIANTS, VARIANT_CLASSIC, resolve_variant
+from utils.constants import DIFFICULTY_EASY, DIFFICULTY_HARD, RANKS_PER_SUIT
+from utils.game_settings import get_default_settings as get_default_game_settings
+from .policy import DEFAULT_WEIGHTS, LookaheadPolicy
+from .runner import play_game
+
+FEATURE_NAMES: Tuple[str, ...] = tuple(DEFAULT_WEIGHTS)
+DEFAULT_ITERATIONS = 40
+DEFAULT_GAMES = 64
+DEFAULT_VALIDATION_GAMES = 400
+DEFAULT_DEPTH = 2
+DEFAULT_CHUNK_SIZE = 8
+DEFAULT_CHECKPOINT_PATH = "tuning_checkpoint.json"
+DEFAULT_OUTPUT_PATH = "tuned_weights.json"
+# Parametry SPSA (Spall): krok a_k = a / (k + 1 + A)^alpha, zaburzenie c_k = c / (k + 1)^gamma.
+# Wagi są strojone w skali względnej (waga / |waga domyślna|), więc c = 0.2 to zaburzenie o 20%.
+DEFAULT_STEP = 3.0
+DEFAULT_PERTURBATION = 0.2
+SPSA_ALPHA = 0.602
+SPSA_GAMMA = 0.101
+SPSA_STABILITY = 5.0
+MAX_RELATIVE_STEP = 0.5
+PROGRESS_WEIGHT = 0.5
+# Rozdania walidacyjne leżą daleko od ziaren treningowych (seed + iteracja * games).
+VALIDATION_SEED_OFFSET = 1_000_000_000
+CHECKPOINT_VERSION = 1
+
+_MIN_SCALE = 0.1
+_NUM_BATCHES = 5
+_Z_95 = 1.959963984540054
+# Kwantyle 0.975 rozkładu t-Studenta dla 1-4 stopni swobody (przedziały ze średnich z paczek).
+_T_95 = {1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776}
+
+_SCALE = np.array([max(abs(DEFAULT_WEIGHTS[name]), _MIN_SCALE) for name in FEATURE_NAMES])
+
+
+def weights_to_vector(weights: Dict[str, float]) -> np.ndarray:
+    """Wagi w skali względnej (wektor w kolejności FEATURE_NAMES)."""
+    return np.array([weights[name] for name in FEATURE_NAMES], dtype=float) / _SCALE
+
+
+def vector_to_weights(vector: np.ndarray) -> Dict[str, float]:
+    return {name: float(value) for name, value in zip(FEATURE_NAMES, vector * _SCALE)}
+
+
+def game_score(game_state: GameState) -> float:
+    """1 za wygraną, inaczej część PROGRESS_WEIGHT proporcjonalna do kart na fundamentach."""
+    if game_state.check_win_condition():
+        return 1.0
+    total = len(game_state.foundation_piles) * RANKS_PER_SUIT
+    return PROGRESS_WEIGHT * sum(len(p) for p in game_state.foundation_piles) / total
+
+
+def _play_chunk(task: Tuple[Dict[str, float], Sequence[int], int, str, Dict[str, Any]]) -> List[Tuple[bool, float]]:
+    weights, seeds, depth, difficulty, settings = task
+    policy = LookaheadPolicy(depth=depth, weights=weights)
+    outcomes = []
+    for seed in seeds:
+        game_state = GameState(difficulty, settings, seed=seed)
+        result = play_game(policy, seed, difficulty, settings, game_state=game_state)
+        outcomes.append((result.won, game_score(game_state)))
+    return outcomes
+
+
+def evaluate_weights(executor: Executor, weight_sets: Sequence[Dict[str, float]], seeds: Sequence[int],
+                     depth: int, difficulty: str, settings: Dict[str, Any],
+                     chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Rozgrywa `seeds` każdym zestawem wag (te same rozdania dla wszystkich zestawów).
+    Paczki wszystkich zestawów trafiają do puli naraz. Zwraca (wygrane, wyniki) według zestawu,
+    w kolejności ziaren.
+    """
+    tasks = [(weights, seeds[i:i + chunk_size], depth, difficulty, settings)
+             for weights in weight_sets for i in range(0, len(seeds), chunk_size)]
+    outcomes = [outcome for chunk in executor.map(_play_chunk, tasks) for outcome in chunk]
+    evaluations = []
+    for i in range(len(weight_sets)):
+        part = outcomes[i * len(seeds):(i + 1) * len(seeds)]
+        evaluations.append((np.array([won for won, _ in part], dtype=bool),
+                            np.array([score for _, score in part], dtype=float)))
+    return evaluations
+
+
+def wilson_interval(successes: int, trials: int) -> Tuple[float, float]:
+    """95% przedział Wilsona dla odsetka sukcesów."""
+    if trials == 0:
+        return 0.0, 1.0
+    p = successes / trials
+    denominator = 1 + _Z_95 ** 2 / trials
+    center = (p + _Z_95 ** 2 / (2 * trials)) / denominator
+    margin = _Z_95 * math.sqrt(p * (1 - p) / trials + _Z_95 ** 2 / (4 * trials ** 2)) / denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+
+class SpsaTuner:
+    """
+    Stan strojenia SPSA: bieżący wektor wag (skala względna), numer iteracji i historia
+    iteratów. Zaburzenia zależą tylko od (seed, iteracja), więc wznowienie z pliku kontrolnego
+    daje ten sam przebieg co strojenie bez przerwy.
+    """
+    def __init__(self, config: Dict[str, Any], theta: Optional[np.ndarray] = None, iteration: int = 0,
+                 history: Optional[List[Dict[str, Any]]] = None):
+        self.config = config
+        self.theta = theta if theta is not None else weights_to_vector(DEFAULT_WEIGHTS)
+        self.iteration = iteration
+        self.history = history if history is not None else []
+
+    def step(self, executor: Executor, settings: Dict[str, Any]) -> Dict[str, Any]:
+        """Jedna iteracja: ocena θ±c_kΔ na wspólnych ziarnach i krok wzdłuż oszacowania gradientu."""
+        config = self.config
+        k = self.iteration
+        a_k = config["step"] / (k + 1 + SPSA_STABILITY) ** SPSA_ALPHA
+        c_k = config["perturbation"] / (k + 1) ** SPSA_GAMMA
+        delta = np.random.default_rng([config["seed"], k]).integers(0, 2, size=len(FEATURE_NAMES)) * 2 - 1
+        first_seed = config["seed"] + k * config["games"]
+        seeds = list(range(first_seed, first_seed + config["games"]))
+        (_, plus), (_, minus) = evaluate_weights(
+            executor, [vector_to_weights(self.theta + c_k * delta), vector_to_weights(self.theta - c_k * delta)],
+            seeds, config["depth"], config["difficulty"], settings)
+        gradient = (plus.mean() - minus.mean()) / (2 * c_k) * delta
+        self.theta = self.theta + np.clip(a_k * gradient, -MAX_RELATIVE_STEP, MAX_RELATIVE_STEP)
+        self.iteration += 1
+        entry = {"iteration": self.iteration, "score_plus": float(plus.mean()), "score_minus": float(minus.mean()),
+                 "weights": vector_to_weights(self.theta)}
+        self.history.append(entry)
+        return entry
+
+    def estimate(self) -> Tuple[Dict[str, float], Dict[str, Optional[Tuple[float, float]]]]:
+        """
+        Średnia iteratów z drugiej połowy przebiegu i 95% przedziały ufności dla każdej wagi.
+        Kolejne iteraty są skorelowane, więc przedział liczony jest ze średnich z kolejnych paczek
+        (do _NUM_BATCHES paczek, rozkład t); przy zbyt krótkiej historii przedziału nie ma (None).
+        """
+        if not self.history:
+            return vector_to_weights(self.theta), {name: None for name in FEATURE_NAMES}
+        tail = self.history[len(self.history) // 2:]
+        samples = np.array([[entry["weights"][name] for name in FEATURE_NAMES] for entry in tail])
+        mean = samples.mean(axis=0)
+        num_batches = min(_NUM_BATCHES, len(samples))
+        intervals: Dict[str, Optional[Tuple[float, float]]] = {name: None for name in FEATURE_NAMES}
+        if num_batches >= 2:
+            batch_means = np.array([batch.mean(axis=0) for batch in np.array_split(samples, num_batches)])
+            half_width = _T_95[num_batches - 1] * batch_means.std(axis=0, ddof=1) / math.sqrt(num_batches)
+            intervals = {name: (float(mean[i] - half_width[i]), float(mean[i] + half_width[i]))
+                         for i, name in enumerate(FEATURE_NAMES)}
+        return {name: float(mean[i]) for i, name in enumerate(FEATURE_NAMES)}, intervals
+
+    def save(self, path: str) -> None:
+        """Zapis atomowy (plik tymczasowy + os.replace), żeby przerwanie nie uszkodziło pliku kontrolnego."""
+        data = {"version": CHECKPOINT_VERSION, "config": self.config, "iteration": self.iteration,
+                "theta": self.theta.tolist(), "history": self.history}
+        temporary_path = path + ".tmp"
+        with open(temporary_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1)
+        os.replace(temporary_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'SpsaTuner':
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != CHECKPOINT_VERSION or len(data["theta"]) != len(FEATURE_NAMES):
+            raise ValueError(f"Plik kontrolny '{path}' pochodzi z innej wersji strojenia.")
+        return cls(data["config"], np.array(data["theta"], dtype=float), data["iteration"], data["history"])
+
+
+def validate(executor: Executor, weights: Dict[str, float], seeds: Sequence[int], depth: int, difficulty: str,
+             settings: Dict[str, Any]) -> Dict[str, Any]:
+    """Porównanie wag z DEFAULT_WEIGHTS na tych samych rozdaniach (odsetek wygranych i sparowana różnica wyników)."""
+    (tuned_wins, tuned_scores), (default_wins, default_scores) = evaluate_weights(
+        executor, [weights, DEFAULT_WEIGHTS], seeds, depth, difficulty, settings)
+    differences = tuned_scores - default_scores
+    half_width = (_Z_95 * differences.std(ddof=1) / math.sqrt(len(seeds))) if len(seeds) > 1 else float("inf")
+    mean_difference = float(differences.mean())
+    return {
+        "games": len(seeds),
+        "tuned_win_rate": float(tuned_wins.mean()),
+        "tuned_win_rate_interval": wilson_interval(int(tuned_wins.sum()), len(seeds)),
+        "default_win_rate": float(default_wins.mean()),
+        "default_win_rate_interval": wilson_interval(int(default_wins.sum()), len(seeds)),
+        "score_difference": mean_difference,
+        "score_difference_interval": (mean_difference - half_width, mean_difference + half_width),
+    }
+
+
+def format_report(weights: Dict[str, float], intervals: Dict[str, Optional[Tuple[float, float]]],
+                  validation: Optional[Dict[str, Any]]) -> str:
+    lines = [f"{'Cecha':<18}{'Domyślna':>10}{'Strojona':>10}   95% przedział"]
+    for name in FEATURE_NAMES:
+        interval = intervals.get(name)
+        interval_text = f"[{interval[0]:+.3f}, {interval[1]:+.3f}]" if interval else "-"
+        lines.append(f"{name:<18}{DEFAULT_WEIGHTS[name]:>+10.3f}{weights[name]:>+10.3f}   {interval_text}")
+    if validation:
+        lines.append("")
+        lines.append(f"Walidacja na {validation['games']} rozdaniach:")
+        for label, key in (("strojone", "tuned"), ("domyślne", "default")):
+            low, high = validation[f"{key}_win_rate_interval"]
+            lines.append(f"  wagi {label}: {validation[f'{key}_win_rate']:.1%} wygranych (95%: {low:.1%}-{high:.1%})")
+        low, high = validation["score_difference_interval"]
+        lines.append(f"  różnica wyniku (strojone - domyślne): {validation['score_difference']:+.4f} "
+                     f"(95%: {low:+.4f} .. {high:+.4f})")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Strojenie wag oceny pozycji strategii lookahead (SPSA).")
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS, help="Łączna liczba iteracji SPSA.")
+    parser.add_argument("--games", type=int, default=DEFAULT_GAMES, help="Rozdania na kandydata w iteracji.")
+    parser.add_argument("--validation-games", type=int, default=DEFAULT_VALIDATION_GAMES,
+                        help="Rozdania walidacyjne (0 = bez walidacji).")
+    parser.add_argument("--seed", type=int, default=0, help="Pierwsze ziarno rozdań i ziarno zaburzeń.")
+    parser.add_argument("--depth", type=int, default=DEFAULT_DEPTH, help="Głębokość przeszukiwania strategii.")
+    parser.add_argument("--step", type=float, default=DEFAULT_STEP, help="Parametr a długości kroku SPSA.")
+    parser.add_argument("--perturbation", type=float, default=DEFAULT_PERTURBATION,
+                        help="Parametr c zaburzenia SPSA (względny).")
+    parser.add_argument("--difficulty", choices=[DIFFICULTY_EASY, DIFFICULTY_HARD], default=DIFFICULTY_EASY)
+    parser.add_argument("--variant", choices=[VARIANT_CLASSIC, *VARIANTS], default=VARIANT_CLASSIC)
+    parser.add_argument("--no-reshuffle", action="store_true", help="Bez przetasowania Waste po wyczerpaniu talii.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Liczba procesów.")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT_PATH, help="Plik kontrolny (JSON).")
+    parser.add_argument("--fresh", action="store_true", help="Zacznij od nowa, ignorując plik kontrolny.")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_PATH, help="Plik wynikowy z wagami (JSON).")
+    args = parser.parse_args(argv)
+
+    settings = get_default_game_settings()
+    settings["reshuffle_waste_on_empty_stock"] = not args.no_reshuffle
+    settings["variant"] = args.variant
+    config = {"seed": args.seed, "games": args.games, "depth": args.depth, "step": args.step,
+              "perturbation": args.perturbation, "difficulty": args.difficulty,
+              "rules": make_rules_key(resolve_variant(args.difficulty, args.variant).name, args.difficulty, settings)}
+    if os.path.exists(args.checkpoint) and not args.fresh:
+        try:
+            tuner = SpsaTuner.load(args.checkpoint)
+        except (OSError, ValueError, KeyError) as e:
+            parser.error(f"Nie można wczytać pliku kontrolnego: {e}")
+        if tuner.config != config:
+            parser.error(f"Plik kontrolny '{args.checkpoint}' ma inne parametry strojenia "
+                         f"(użyj --fresh albo innego --checkpoint).")
+        print(f"Wznowienie od iteracji {tuner.iteration} z '{args.checkpoint}'.")
+    else:
+        tuner = SpsaTuner(config)
+
+    start_time = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        while tuner.iteration < args.iterations:
+            iteration_start = time.perf_counter()
+            entry = tuner.step(executor, settings)
+            tuner.save(args.checkpoint)
+            print(f"Iteracja {entry['iteration']}/{args.iterations}: θ+ {entry['score_plus']:.4f}, "
+                  f"θ- {entry['score_minus']:.4f} ({time.perf_counter() - iteration_start:.1f} s)")
+
+        weights, intervals = tuner.estimate()
+        validation = None
+        if args.validation_games > 0:
+            first_seed = VALIDATION_SEED_OFFSET + args.seed
+            validation = validate(executor, weights, list(range(first_seed, first_seed + args.validation_games)),
+                                  args.depth, args.difficulty, settings)
+
+    print(format_report(weights, intervals, validation))
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"weights": weights, "intervals": intervals, "iterations": tuner.iteration,
+                   "config": config, "validation": validation}, f, indent=1)
+    print(f"\nWagi zapisane w '{args.output}' (python -m bots.tournament --weights {args.output}).")
+    print(f"Czas całkowity: {time.perf_counter() - start_time:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+Szacowanie szansy wygranej metodą Monte Carlo bez podglądania zakrytych kart.
+
+Każda próbka to "determinizacja": zakryte karty (talia rezerwowa i zakryte karty tableau)
+dostają losowe, ale spójne z widoczną planszą tożsamości, po czym partia jest dogrywana
+szybką strategią. Po pierwszym przejściu przez talię gracz zna jej skład, więc karty talii
+są wtedy tasowane tylko między sobą (albo zostają na miejscu, gdy talia nie jest tasowana).
+Próbki są liczone na współdzielonej puli procesów (tworzonej przy pierwszym szacowaniu
+i zamykanej przy wyjściu z programu) w zadanym budżecie czasu, a wyniki są zwracane
+strumieniowo po każdej ukończonej paczce.
+
+Uruchomienie:
+    python -m bots.win_probability --seed 7 --budget 3
+"""
+import argparse
+import atexit
+import copy
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+from game_logic.card import Card
+from game_logic.game_state import GameState
+from game_logic.move import Move
+from game_logic.snapshot import GameSnapshot
+from utils.constants import DIFFICULTY_EASY, DIFFICULTY_HARD
+from .policy import create_policy
+from .runner import play_game
+
+DEFAULT_TIME_BUDGET = 2.0
+DEFAULT_MAX_SAMPLES = 200
+DEFAULT_BATCH_SIZE = 4
+DEFAULT_ROLLOUT_POLICY = "greedy"
+ROLLOUT_MAX_MOVES = 400
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_workers: Optional[int] = None
+
+
+class WinProbabilityEstimate(NamedTuple):
+    """Bieżące oszacowanie: szansa wygranej pozycji i szansa wygranej po każdym ruchu."""
+    samples: int
+    win_probability: float
+    move_win_probability: Dict[Move, float]
+    elapsed: float
+
+    def best_move(self) -> Optional[Move]:
+        if not self.move_win_probability:
+            return None
+        return max(self.move_win_probability, key=self.move_win_probability.get)
+
+
+def hidden_cards(game_state: GameState) -> List[Card]:
+    """Karty, których gracz nie widzi: cała talia rezerwowa i zakryte karty tableau."""
+    cards = list(game_state.stock_pile.cards)
+    for pile in game_state.tableau_piles:
+        cards.extend(c for c in pile.cards if not c.face_up)
+    return cards
+
+
+def _shuffle_identities(slots: Sequence[Card], rng: random.Random) -> None:
+    identities = [c.code for c in slots]
+    rng.shuffle(identities)
+    for card, code in zip(slots, identities):
+        card.set_code(code)
+
+
+def determinize(game_state: GameState, rng: random.Random) -> GameState:
+    """
+    Zwraca kopię gry, w której zakryte karty zostały losowo przetasowane między sobą.
+    Widoczne karty, układ stosów i liczba zakrytych kart w każdej kolumnie pozostają bez zmian.
+    Po przełożeniu Waste do talii (stock_recycles > 0) karty talii były już widziane: są tasowane
+    tylko między miejscami w talii, a przy wyłączonym tasowaniu Waste ich kolejność też jest znana.
+    """
+    sample = copy.deepcopy(game_state)
+    sample.move_history = []
+    sample.rng = random.Random(rng.getrandbits(64))
+    if not sample.stock_recycles:
+        _shuffle_identities(hidden_cards(sample), rng)
+        return sample
+    if sample.current_settings.get("shuffle_waste_on_recycle", True):
+        _shuffle_identities(sample.stock_pile.cards, rng)
+    _shuffle_identities([c for pile in sample.tableau_piles for c in pile.cards if not c.face_up], rng)
+    return sample
+
+
+def _rollout_wins(game_state: GameState, policy_name: str) -> bool:
+    return play_game(create_policy(policy_name), game_state.seed, game_state.difficulty,
+                     max_moves=ROLLOUT_MAX_MOVES, game_state=game_state).won
+
+
+def _run_samples(task: Tuple[GameSnapshot, Sequence[Move], Sequence[int], str, float]) -> Tuple[int, List[int], List[int]]:
+    """
+    Liczy paczkę próbek w procesie roboczym (pozycja przychodzi jako migawka GameState.snapshot).
+    Zwraca (liczba próbek, wygrane pozycji, wygrane po każdym ruchu - w kolejności `moves`).
+    """
+    snapshot, moves, sample_seeds, policy_name, deadline = task
+    game_state = GameState.from_snapshot(snapshot)
+    root_wins = 0
+    move_wins = [0] * len(moves)
+    done = 0
+    for sample_seed in sample_seeds:
+        if done and time.time() > deadline:
+            break
+        sample = determinize(game_state, random.Random(sample_seed))
+        for i, move in enumerate(moves):
+            branch = copy.deepcopy(sample)
+            success, _ = branch.apply_move(move)
+            if success and _rollout_wins(branch, policy_name):
+                move_wins[i] += 1
+        root_wins += _rollout_wins(sample, policy_name)
+        done += 1
+    return done, [root_wins], move_wins
+
+
+def _pool(workers: Optional[int]) -> ProcessPoolExecutor:
+    """Współdzielona pula procesów; tworzona od nowa tylko przy zmianie liczby procesów."""
+    global _executor, _executor_workers
+    if _executor is not None and _executor_workers != workers:
+        close_pool()
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=workers)
+        _executor_workers = workers
+        atexit.register(close_pool)
+    return _executor
+
+
+def close_pool() -> None:
+    """Zamyka pulę procesów (następne szacowanie utworzy ją od nowa)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+        atexit.unregister(close_pool)
+
+
+def estimate_win_probability(game_state: GameState, time_budget: float = DEFAULT_TIME_BUDGET,
+                             max_samples: int = DEFAULT_MAX_SAMPLES, workers: Optional[int] = None,
+                             policy_name: str = DEFAULT_ROLLOUT_POLICY, batch_size: int = DEFAULT_BATCH_SIZE,
+                             seed: Optional[int] = None) -> Iterator[WinProbabilityEstimate]:
+    """
+    Generator kolejnych oszacowań - nowe oszacowanie pojawia się po każdej ukończonej paczce próbek.
+    Kończy się po `max_samples` próbkach albo po upływie `time_budget` sekund.
+    """
+    start_time = time.time()
+    deadline = start_time + time_budget
+    moves = game_state.get_legal_moves()
+    # Paczki dostają migawkę pobraną raz, przed pętlą - gracz może w tym czasie dalej zmieniać grę.
+    snapshot = game_state.snapshot()
+    seed_rng = random.Random(seed)
+    total_samples = 0
+    root_wins = 0
+    move_wins = [0] * len(moves)
+    submitted = 0
+
+    executor = _pool(workers)
+    pending = set()
+    try:
+        worker_count = workers or os.cpu_count() or 1
+        while True:
+            while submitted < max_samples and len(pending) < 2 * worker_count and time.time() < deadline:
+                count = min(batch_size, max_samples - submitted)
+                sample_seeds = [seed_rng.getrandbits(64) for _ in range(count)]
+                pending.add(executor.submit(_run_samples, (snapshot, moves, sample_seeds, policy_name, deadline)))
+                submitted += count
+            if not pending:
+                break
+            done, pending = wait(pending, timeout=max(0.0, deadline - time.time()), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                samples, batch_root_wins, batch_move_wins = future.result()
+                total_samples += samples
+                root_wins += batch_root_wins[0]
+                move_wins = [a + b for a, b in zip(move_wins, batch_move_wins)]
+            if total_samples:
+                yield WinProbabilityEstimate(
+                    total_samples, root_wins / total_samples,
+                    {move: wins / total_samples for move, wins in zip(moves, move_wins)},
+                    time.time() - start_time)
+    finally:
+        # Paczki, które już liczą, kończą się same po `deadline`; pula zostaje na kolejne podpowiedzi.
+        for future in pending:
+            future.cancel()
+
+
+def final_estimate(game_state: GameState, **kwargs) -> Optional[WinProbabilityEstimate]:
+    """Zwraca ostatnie oszacowanie z estimate_win_probability (None, gdy nie zdążono policzyć próbki)."""
+    estimate = None
+    for estimate in estimate_win_probability(game_state, **kwargs):
+        pass
+    return estimate
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Szacowanie szansy wygranej rozdania metodą Monte Carlo.")
+    parser.add_argument("--seed", type=int, default=0, help="Ziarno rozdania.")
+    parser.add_argument("--difficulty", choices=[DIFFICULTY_EASY, DIFFICULTY_HARD], default=DIFFICULTY_EASY)
+    parser.add_argument("--budget", type=float, default=DEFAULT_TIME_BUDGET, help="Budżet czasu w sekundach.")
+    parser.add_argument("--samples", type=int, default=DEFAULT_MAX_SAMPLES, help="Maksymalna liczba próbek.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Liczba procesów.")
+    args = parser.parse_args(argv)
+
+    game_state = GameState(args.difficulty, seed=args.seed)
+    estimate = None
+    for estimate in estimate_win_probability(game_state, args.budget, args.samples, args.workers):
+        print(f"[{estimate.elapsed:5.1f} s] próbki: {estimate.samples:4d}  szansa wygranej: {estimate.win_probability:.1%}")
+    if estimate is None:
+        print("Nie zdążono policzyć żadnej próbki.")
+        return
+    for move, probability in sorted(estimate.move_win_probability.items(), key=lambda item: -item[1]):
+        print(f"  {str(move):<12} {probability:.1%}")
+
+
+if __name__ == "__main__":
+    main()
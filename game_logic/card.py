@@ -1,4 +1,8 @@
-from utils.constants import Suit, Rank, FACE_DOWN_CARD_STR
+from utils.constants import Suit, Rank, FACE_DOWN_CARD_STR, RANKS_PER_SUIT
+
+_SUITS_BY_INDEX = list(Suit)
+_SUIT_INDEX = {suit: i for i, suit in enumerate(_SUITS_BY_INDEX)}
+_RANKS_BY_INDEX = list(Rank)
 
 class Card:
     """Reprezentuje pojedynczą kartę do gry w pasjansa."""
@@ -10,6 +14,7 @@ class Card:
         self.suit = suit
         self.rank = rank
         self.face_up = face_up
+        self.code = _SUIT_INDEX[suit] * RANKS_PER_SUIT + rank.value - 1
 
     @property
     def color(self):
@@ -44,4 +49,18 @@ class Card:
 
     def is_next_rank_for_foundation(self, other_card: 'Card') -> bool:
         return self.rank.value == other_card.rank.value + 1
-    
\ No newline at end of file
+
+    def to_code(self) -> int:
+        """Zwraca kod karty 0-51 (kolor * 13 + ranga - 1), niezależny od tego, czy karta jest odkryta."""
+        return self.code
+
+    def set_code(self, code: int) -> None:
+        """Zmienia tożsamość karty (kolor i rangę) na kartę o podanym kodzie."""
+        suit_index, rank_index = divmod(code, RANKS_PER_SUIT)
+        self.suit, self.rank, self.code = _SUITS_BY_INDEX[suit_index], _RANKS_BY_INDEX[rank_index], code
+
+    @classmethod
+    def from_code(cls, code: int, face_up: bool = False) -> 'Card':
+        """Tworzy kartę z kodu zwróconego przez to_code()."""
+        suit_index, rank_index = divmod(code, RANKS_PER_SUIT)
+        return cls(_SUITS_BY_INDEX[suit_index], _RANKS_BY_INDEX[rank_index], face_up)
@@ -0,0 +1,98 @@
+"""
+Numerowane rozdania zgodne z powszechnie używaną numeracją Microsoft (znaną z FreeCell).
+
+Numer rozdania wyznacza kolejność talii generatorem liniowym kongruencyjnym z biblioteki C
+Microsoftu (seed = seed * 214013 + 2531011 mod 2^31, wynik = seed >> 16) i tasowaniem z FreeCell,
+więc rozdanie N ma ten sam układ kart co w innych programach korzystających z tej numeracji.
+Talia jest rozkładana jak przy stole: rzędami od lewej do prawej (pierwszy rząd na wszystkie
+kolumny, drugi od kolumny 2 itd.), a pozostałe karty trafiają do talii rezerwowej w kolejności
+dobierania. Pozwala to porównywać wyniki solvera i procent wygranych z opublikowanymi danymi
+i budować wspólne zestawy rozdań testowych.
+
+Zgodność z numeracją sprawdza check_known_deals(): rozdania 1 i 617 muszą dać dokładnie te
+same karty, co opublikowane rozdania FreeCell o tych numerach (KNOWN_DEALS).
+
+Uruchomienie:
+    python -m game_logic.deal_numbers
+"""
+from typing import List, Sequence
+from utils.constants import RANKS_PER_SUIT
+
+MIN_DEAL_NUMBER = 1
+MAX_DEAL_NUMBER = 2 ** 31 - 1
+NUM_CARDS = 52
+
+_LCG_MULTIPLIER = 214013
+_LCG_INCREMENT = 2531011
+_LCG_MASK = 0x7FFFFFFF
+# Karta c w numeracji Microsoft: ranga c // 4 (as = 0), kolor "CDHS"[c % 4]; indeksy kolorów
+# Card.to_code to kolejność Suit: kier, karo, pik, trefl.
+_SUIT_INDEX_BY_MS_SUIT = (3, 1, 0, 2)
+_CODE_BY_MS_CARD = [_SUIT_INDEX_BY_MS_SUIT[c % 4] * RANKS_PER_SUIT + c // 4 for c in range(NUM_CARDS)]
+_RANK_LETTERS = "A23456789TJQK"
+_SUIT_LETTERS = "HDSC"
+
+# Opublikowane rozdania FreeCell (Microsoft) w kolejności rozkładania, rzędami po 8 kart.
+KNOWN_DEALS = {
+    1: "JD 2D 9H JC 5D 7H 7C 5H KD KC 9S 5S AD QC KH 3H 2S KS 9D QD JS AS AH 3C "
+       "4C 5C TS QH 4H AC 4D 7S 3S TD 4S TH 8H 2C JH 7D 6D 8S 8D QS 6C 3D 8C TC 6S 9C 2H 6H",
+    617: "7D AD 5C 3S 5S 8C 2D AH TD 7S QD AC 6D 8H AS KH TH QC 3H 9D 6S 8D 3D TC "
+         "KD 5H 9S 3C 8S 7H 4D JS 4C QS 9C 9H 7C 6H 2C 2S 4S TS 2H 5D JC 6C JH QH JD KS KC 4H",
+}
+
+
+def _check_deal_number(deal_number: int) -> None:
+    if not MIN_DEAL_NUMBER <= deal_number <= MAX_DEAL_NUMBER:
+        raise ValueError(f"Numer rozdania musi być z zakresu {MIN_DEAL_NUMBER}-{MAX_DEAL_NUMBER}, podano {deal_number}.")
+
+
+def ms_card_sequence(deal_number: int) -> List[int]:
+    """Kolejność rozkładania kart rozdania `deal_number` jako kody Card.to_code."""
+    _check_deal_number(deal_number)
+    cards = list(range(NUM_CARDS - 1, -1, -1))
+    seed = deal_number
+    for i in range(NUM_CARDS):
+        seed = (seed * _LCG_MULTIPLIER + _LCG_INCREMENT) & _LCG_MASK
+        j = NUM_CARDS - 1 - (seed >> 16) % (NUM_CARDS - i)
+        cards[i], cards[j] = cards[j], cards[i]
+    return [_CODE_BY_MS_CARD[card] for card in cards]
+
+
+def card_label(code: int) -> str:
+    """Zapis karty jak w opublikowanych rozdaniach FreeCell, np. "TD" dla dziesiątki karo."""
+    return _RANK_LETTERS[code % RANKS_PER_SUIT] + _SUIT_LETTERS[code // RANKS_PER_SUIT]
+
+
+def check_known_deals() -> None:
+    """Porównuje generator z KNOWN_DEALS; rzuca ValueError przy pierwszej niezgodności."""
+    for deal_number, expected in KNOWN_DEALS.items():
+        actual = " ".join(card_label(code) for code in ms_card_sequence(deal_number))
+        if actual != expected:
+            raise ValueError(f"Rozdanie {deal_number} różni się od numeracji Microsoft: {actual}")
+
+
+def numbered_deal(deal_number: int, tableau_deal: Sequence[int]) -> List[int]:
+    """
+    Kolejność talii dla GameState(deal=...) dająca rozkład rozdania `deal_number` przy kolumnach
+    o rozmiarach `tableau_deal`. GameState.setup_game rozkłada talię kolumnami, a resztę odkłada
+    tak, że ostatnia karta jest na wierzchu talii rezerwowej - tu karty są przestawiane tak,
+    by wynik odpowiadał rozkładaniu rzędami.
+    """
+    sequence = ms_card_sequence(deal_number)
+    columns: List[List[int]] = [[] for _ in tableau_deal]
+    position = 0
+    for row in range(max(tableau_deal, default=0)):
+        for column, size in enumerate(tableau_deal):
+            if row < size:
+                columns[column].append(sequence[position])
+                position += 1
+    if position > NUM_CARDS:
+        raise ValueError("Numerowane rozdania wymagają układu mieszczącego się w jednej talii.")
+    order = [code for column in columns for code in column]
+    order.extend(reversed(sequence[position:]))
+    return order
+
+
+if __name__ == "__main__":
+    check_known_deals()
+    print(f"Generator zgodny z rozdaniami Microsoft: {', '.join(map(str, KNOWN_DEALS))}.")
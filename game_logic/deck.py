@@ -1,21 +1,31 @@
 import random
-from typing import List, Optional
+from typing import List, Optional, Sequence
 from .card import Card
 from utils.constants import Suit, Rank
 
 class Deck:
     """Reprezentuje talię kart do gry w pasjansa."""
 
-    def __init__(self):
-        """Tworzy nową, przetasowaną talię kart."""
-        self.cards: List[Card] = self._create_deck()
-        self.shuffle()
+    def __init__(self, rng: Optional[random.Random] = None, card_codes: Optional[Sequence[int]] = None,
+                 num_decks: int = 1):
+        """
+        Tworzy nową, przetasowaną talię kart (`num_decks` złączonych talii po 52 karty).
+        Opcjonalny `rng` pozwala odtworzyć to samo rozdanie (np. w turniejach botów); bez niego talia
+        tasuje własnym generatorem, niezależnym od globalnego modułu random. `card_codes` ustawia
+        talię dokładnie w podanej kolejności (kody z Card.to_code), bez tasowania.
+        """
+        self.rng = rng if rng is not None else random.Random()
+        if card_codes is not None:
+            self.cards: List[Card] = [Card.from_code(code) for code in card_codes]
+        else:
+            self.cards = self._create_deck(num_decks)
+            self.shuffle()
 
-    def _create_deck(self) -> List[Card]:
-        return [Card(suit, rank) for suit in Suit for rank in Rank]
+    def _create_deck(self, num_decks: int = 1) -> List[Card]:
+        return [Card(suit, rank) for _ in range(num_decks) for suit in Suit for rank in Rank]
 
     def shuffle(self) -> None:
-        random.shuffle(self.cards)
+        self.rng.shuffle(self.cards)
 
     def deal(self) -> Optional[Card]:
         """
@@ -24,6 +34,10 @@ class Deck:
         """
         return self.cards.pop(0) if not self.is_empty() else None
 
+    def to_codes(self) -> List[int]:
+        """Zwraca kolejność kart w talii jako listę kodów 0-51."""
+        return [card.to_code() for card in self.cards]
+
     def add_cards(self, cards_to_add: List[Card]) -> None:
         """Dodaje karty z powrotem do talii, zazwyczaj w celu przetasowania stosu kart odpadowych do zapasu."""
         self.cards.extend(cards_to_add)
@@ -1,25 +1,71 @@
+import hashlib
 import random
-from typing import List, Dict, Any, Optional, Tuple
+import struct
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 from .card import Card
 from .deck import Deck
-from .pile import StockPile, WastePile, FoundationPile, TableauPile
+from .deal_numbers import numbered_deal
+from .move import Move, DRAW_MOVE
+from .pile import VersionClock, Talon, StockPile, WastePile, FoundationPile, TableauPile
+from .snapshot import GameSnapshot
+from .variants import VARIANTS, Variant, resolve_variant
 from utils.constants import (
-    NUM_TABLEAU_PILES, NUM_FOUNDATION_PILES, DIFFICULTY_EASY, DIFFICULTY_HARD,
-    Rank, Suit, MAX_UNDO_MOVES, PILE_STOCK, PILE_WASTE, PILE_FOUNDATION, PILE_TABLEAU
+    DIFFICULTY_EASY,
+    Rank, Suit, MAX_UNDO_MOVES, PILE_STOCK, PILE_WASTE, PILE_FOUNDATION, PILE_TABLEAU,
+    ACTION_DRAW, ACTION_RESHUFFLE_STOCK, ACTION_MOVE
 )
 from utils.game_settings import get_default_settings as get_default_game_settings
 
+# Ile skrótów stanu generatora (różnych numerów rng_version) pamiętać naraz.
+RNG_DIGEST_MEMO_SIZE = 1024
+
+
+def make_rules_key(variant_name: str, difficulty: str, settings: Dict[str, Any]) -> str:
+    """Klucz zestawu reguł (GameState.rules_key) bez tworzenia gry - np. do wyboru pliku indeksu rozdań."""
+    reshuffle = settings.get("reshuffle_waste_on_empty_stock", True)
+    shuffle = settings.get("shuffle_waste_on_recycle", True)
+    return f"{variant_name}/{difficulty}/reshuffle={int(reshuffle)}/shuffle={int(shuffle)}"
+
 
 class GameState:
-    def __init__(self, difficulty: str = DIFFICULTY_EASY, settings: Optional[Dict[str, Any]] = None):
+    def __init__(self, difficulty: str = DIFFICULTY_EASY, settings: Optional[Dict[str, Any]] = None,
+                 seed: Optional[int] = None, deal: Optional[Sequence[int]] = None,
+                 variant: Optional[Variant] = None, deal_number: Optional[int] = None):
+        """
+        Rozdanie wyznacza (w kolejności pierwszeństwa) `deal` - kolejność talii jako kody kart,
+        `deal_number` - numer rozdania zgodny z numeracją Microsoft (game_logic.deal_numbers),
+        albo `seed` - ziarno własnego generatora gry. Generator (Waste tasowane przy przełożeniu)
+        korzysta z `seed`, a bez niego z numeru rozdania, więc numerowana gra też jest powtarzalna.
+        """
         self.difficulty = difficulty
         self.current_settings = settings if settings is not None else get_default_game_settings()
+        self.variant = variant if variant is not None else resolve_variant(difficulty, self.current_settings.get("variant"))
+        self.rules = self.variant.rules
+        if deal is None and deal_number is not None:
+            if self.rules.num_decks != 1:
+                raise ValueError(f"Numerowane rozdania są dostępne tylko dla wariantów z jedną talią ({self.variant.name}).")
+            deal = numbered_deal(deal_number, self.rules.tableau_deal)
+            if seed is None:
+                seed = deal_number
+        self.seed = seed
+        self.deal_number = deal_number
+        self.rng = random.Random(seed)
+        # Numer stanu generatora: nowy przy każdym jego użyciu lub ustawieniu (tasowanie Waste, undo,
+        # migawka), a revert() przywraca poprzedni. Klucz pamięci stanu i skrótu generatora, którego
+        # dobieranie i ruchy kart nie unieważniają.
+        self.rng_version = 0
+        self._last_rng_version = 0
+        self.deal = deal
         
-        self.deck = Deck()
-        self.stock_pile = StockPile()
-        self.waste_pile = WastePile()
+        self.deck = Deck(self.rng, deal, self.rules.num_decks)
+        self._clock = VersionClock()
+        self._memo: Dict[str, Tuple[int, Any]] = {}
+        self.talon = Talon(self._clock)
+        self.stock_pile = StockPile(self.talon)
+        self.waste_pile = WastePile(self.rules, self.talon)
         self.foundation_piles: List[FoundationPile] = []
         self.tableau_piles: List[TableauPile] = []
+        self.stock_recycles = 0
         self.moves_count = 0
         self.move_history: List[Dict[str, Any]] = []
         self.elapsed_time: float = 0.0 
@@ -27,75 +73,213 @@ class GameState:
         self.setup_game()
 
     def setup_game(self):
-        self.deck = Deck()
-        self.stock_pile = StockPile()
-        self.waste_pile = WastePile()
-        self.foundation_piles = [FoundationPile() for _ in range(NUM_FOUNDATION_PILES)]
-        self.tableau_piles = [TableauPile() for _ in range(NUM_TABLEAU_PILES)]
+        self.deck = Deck(self.rng, self.deal, self.rules.num_decks)
+        self._rng_changed()
+        # Nowe stosy korzystają z tego samego licznika, więc wersja gry nie wraca do wcześniejszych wartości.
+        self.talon = Talon(self._clock)
+        self.stock_pile = StockPile(self.talon)
+        self.waste_pile = WastePile(self.rules, self.talon)
+        self.foundation_piles = [FoundationPile(self.rules, self._clock) for _ in range(self.rules.num_foundation_piles)]
+        self.tableau_piles = [TableauPile(self.rules, self._clock) for _ in range(self.rules.num_tableau_piles)]
+        self.stock_recycles = 0
         self.moves_count = 0
         self.move_history = []
         self.elapsed_time = 0
         self.last_action_was_reshuffle = False
 
-        for i in range(NUM_TABLEAU_PILES):
-            for j in range(i + 1):
+        for i, column_size in enumerate(self.rules.tableau_deal):
+            for j in range(column_size):
                 card = self.deck.deal()
                 if card:
-                    if j == i: card.face_up = True
+                    if j == column_size - 1: card.face_up = True
                     self.tableau_piles[i].add_card(card)
+        stock_cards = []
         while not self.deck.is_empty():
             card = self.deck.deal()
             if card:
                 card.face_up = False
-                self.stock_pile.add_card(card)
+                stock_cards.append(card)
+        self.stock_pile.add_cards(stock_cards)
+
+
+    @property
+    def version(self) -> int:
+        """Łączna wersja planszy - zmienia się przy każdej zmianie któregokolwiek stosu."""
+        return self._clock.value
+
+    def _memoized(self, name: str, compute):
+        """Wynik `compute()` zapamiętany pod nazwą do następnej zmiany planszy."""
+        version = self._clock.value
+        entry = self._memo.get(name)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        value = compute()
+        self._memo[name] = (version, value)
+        return value
+
+    def snapshot(self) -> GameSnapshot:
+        """
+        Niezmienna migawka planszy (game_logic.snapshot) do przekazania innym wątkom lub procesom.
+        Trzeba ją pobrać w wątku, który wykonuje ruchy (między ruchami); potem można ją czytać
+        bez blokad. Niezmienione od poprzedniej migawki stosy, bufor talii i stan generatora
+        są współdzielone, więc migawka po ruchu kopiuje tylko zmienione stosy.
+        """
+        return GameSnapshot(
+            self._clock.value, self.variant.name, self.difficulty, tuple(self.current_settings.items()),
+            self.seed, self.deal_number,
+            tuple(pile.frozen() for pile in self.tableau_piles),
+            tuple(pile.frozen() for pile in self.foundation_piles),
+            self.talon.frozen_codes(), self.talon.cursor, self.stock_recycles, self.moves_count,
+            self._rng_state())
+
+    def _rng_changed(self) -> None:
+        self._last_rng_version += 1
+        self.rng_version = self._last_rng_version
+
+    def _rng_state(self) -> tuple:
+        # Generator gry zmienia stan tylko przy tasowaniu Waste (i jego cofnięciu) - wtedy rośnie rng_version.
+        entry = self._memo.get("rng_state")
+        if entry is not None and entry[0] == self.rng_version and entry[1] is self.rng:
+            return entry[2]
+        state = self.rng.getstate()
+        self._memo["rng_state"] = (self.rng_version, self.rng, state)
+        return state
+
+    def _rng_digest(self) -> bytes:
+        """
+        Stały między procesami skrót stanu generatora (do position_key). Wbudowany hash() krotki stanu
+        się nie nadaje - zawiera None, którego hash zależy od procesu, więc klucze z trwałego cache'u
+        nie pasowałyby w następnym uruchomieniu.
+        """
+        # Skróty kilku ostatnich stanów - po revert() przełożenia stan rodzica wraca z tym samym numerem.
+        entry = self._memo.get("rng_digest")
+        if entry is None or entry[0] is not self.rng or len(entry[1]) >= RNG_DIGEST_MEMO_SIZE:
+            entry = (self.rng, {})
+            self._memo["rng_digest"] = entry
+        digest = entry[1].get(self.rng_version)
+        if digest is not None:
+            return digest
+        version, internal_state, gauss_next = self._rng_state()
+        digest = hashlib.blake2b(struct.pack(f"<B{len(internal_state)}I", version, *internal_state)
+                                 + repr(gauss_next).encode("ascii"), digest_size=8).digest()
+        entry[1][self.rng_version] = digest
+        return digest
+
+    def restore(self, snapshot: GameSnapshot) -> None:
+        """
+        Przywraca planszę, liczniki i stan generatora z migawki tego samego wariantu.
+        Historia ruchów jest czyszczona - migawka jej nie zawiera.
+        """
+        if snapshot.variant_name != self.variant.name:
+            raise ValueError(f"Migawka wariantu '{snapshot.variant_name}' nie pasuje do gry '{self.variant.name}'.")
+        for pile, cards in zip(self.tableau_piles, snapshot.tableau):
+            pile.cards = [card.thaw() for card in cards]
+            pile.touch()
+        for pile, cards in zip(self.foundation_piles, snapshot.foundations):
+            pile.cards = [card.thaw() for card in cards]
+            pile.suit_allowed = pile.cards[0].suit if pile.cards and pile.cards[0].rank == Rank.ACE else None
+            pile.touch()
+        self.talon.ring = [Card.from_code(code, i < snapshot.talon_cursor) for i, code in enumerate(snapshot.talon)]
+        self.talon.cursor = snapshot.talon_cursor
+        self.talon.touch()
+        self.rng.setstate(snapshot.rng_state)
+        self._rng_changed()
+        self.stock_recycles = snapshot.stock_recycles
+        self.moves_count = snapshot.moves_count
+        self.move_history = []
+        self.last_action_was_reshuffle = False
+
+    @classmethod
+    def from_snapshot(cls, snapshot: GameSnapshot) -> 'GameState':
+        """Nowa gra w stanie z migawki (np. w procesie roboczym, który dostał tylko migawkę)."""
+        game_state = cls(snapshot.difficulty, snapshot.settings_dict(), seed=snapshot.seed,
+                         variant=VARIANTS[snapshot.variant_name])
+        game_state.deal_number = snapshot.deal_number
+        game_state.restore(snapshot)
+        return game_state
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # Kopie (np. determinizacja w bots.win_probability) mogą zmieniać karty bez zmiany wersji.
+        state['_memo'] = {}
+        return state
 
     def deal_from_stock(self) -> bool:
         self.last_action_was_reshuffle = False 
-        action_details = {'type': 'draw', 'cards_drawn_data': [], 'from': 'stock', 'reshuffled_waste_data': None}
-        cards_moved_to_waste_actual_objects = []
 
         if not self.stock_pile.is_empty():
-            num_to_draw = 3 if self.difficulty == DIFFICULTY_HARD else 1
-            for _ in range(num_to_draw):
-                if self.stock_pile.is_empty(): break
-                card = self.stock_pile.remove_top_card()
-                if card:
-                    card.face_up = True
-                    self.waste_pile.add_card(card)
-                    cards_moved_to_waste_actual_objects.append(card)
-            
-            if cards_moved_to_waste_actual_objects:
-                action_details['cards_drawn_data'] = [c.__dict__ for c in cards_moved_to_waste_actual_objects]
-                self._record_action(action_details)
-                self.moves_count += 1
-                return True
-            return False 
+            num_drawn = self.talon.draw(self.rules.draw_count)
+            self._record_action({'type': ACTION_DRAW, 'from': 'stock', 'num_cards_drawn': num_drawn, 'num_draws': 1})
+            self.moves_count += 1
+            return True
         
-        elif self.current_settings.get("reshuffle_waste_on_empty_stock", True) and not self.waste_pile.is_empty():
-            action_details['type'] = 'reshuffle_stock'
-            action_details['reshuffled_waste_data'] = [c.__dict__ for c in self.waste_pile.cards] 
-            
-            original_waste_cards = self.waste_pile.get_all_cards_and_clear()
-            random.shuffle(original_waste_cards) 
-            for card_obj in original_waste_cards: 
-                card_obj.face_up = False 
-                self.stock_pile.add_card(card_obj)
-            
-            self._record_action(action_details)
+        elif self.can_recycle_stock():
+            # Bez tasowania przełożenie Waste do talii to tylko przesunięcie kursora - nie trzeba nic zapamiętywać.
+            # Przy tasowaniu undo przywraca też stan generatora, więc cofnięta pozycja ma ten sam
+            # position_key co przed ruchem, a ponowne przełożenie daje to samo tasowanie.
+            shuffle_rng = self.rng if self.current_settings.get("shuffle_waste_on_recycle", True) else None
+            rng_state = self.rng.getstate() if shuffle_rng is not None else None
+            previous_order = self.talon.recycle(shuffle_rng)
+            if shuffle_rng is not None:
+                self._rng_changed()
+            self._record_action({'type': ACTION_RESHUFFLE_STOCK, 'previous_order': previous_order,
+                                 'rng_state': rng_state})
             self.moves_count += 1 
+            self.stock_recycles += 1
             self.last_action_was_reshuffle = True 
             return True 
         
         
         return False
 
+    def draw_until(self, num_draws: int) -> bool:
+        """
+        Wykonuje `num_draws` dobrań w bieżącym przejściu przez talię jednym przesunięciem kursora
+        (np. "dobieraj, aż karta X będzie na wierzchu" z talon_reachable_cards).
+        Liczy się jako `num_draws` ruchów, a undo cofa je wszystkie naraz.
+        """
+        draw_count = self.rules.draw_count
+        draws_left_in_pass = (len(self.stock_pile) + draw_count - 1) // draw_count
+        if not 0 < num_draws <= draws_left_in_pass:
+            return False
+        self.last_action_was_reshuffle = False
+        num_drawn = self.talon.draw(num_draws * draw_count)
+        self._record_action({'type': ACTION_DRAW, 'from': 'stock', 'num_cards_drawn': num_drawn,
+                             'num_draws': num_draws})
+        self.moves_count += num_draws
+        return True
+
+    def talon_reachable_cards(self) -> List[Tuple[int, int, Card]]:
+        """
+        Karty z talii i Waste, które staną się grywalne przy samym dobieraniu: lista
+        (liczba dobrań, numer przejścia, karta). Następne przejście jest uwzględniane tylko wtedy,
+        gdy Waste wraca do talii bez tasowania (kolejność jest wtedy znana).
+        """
+        return self.talon.reachable_cards(self.rules.draw_count, self._next_pass_is_predictable())
+
+    def _next_pass_is_predictable(self) -> bool:
+        if not self.current_settings.get("reshuffle_waste_on_empty_stock", True):
+            return False
+        if self.current_settings.get("shuffle_waste_on_recycle", True):
+            return False
+        max_passes = self.rules.max_stock_passes
+        return max_passes is None or self.stock_recycles < max_passes - 1
+
+    def can_recycle_stock(self) -> bool:
+        """Czy pustą talię można uzupełnić kartami z Waste (ustawienie gracza i limit przejść wariantu)."""
+        if self.waste_pile.is_empty() or not self.stock_pile.is_empty():
+            return False
+        if not self.current_settings.get("reshuffle_waste_on_empty_stock", True):
+            return False
+        max_passes = self.rules.max_stock_passes
+        return max_passes is None or self.stock_recycles < max_passes - 1
+
     def _get_pile_by_id(self, pile_type: str, index: Optional[int] = None):
       
         if pile_type == PILE_STOCK: return self.stock_pile
         if pile_type == PILE_WASTE: return self.waste_pile
-        if pile_type == PILE_FOUNDATION and index is not None and 0 <= index < NUM_FOUNDATION_PILES: return self.foundation_piles[index]
-        if pile_type == PILE_TABLEAU and index is not None and 0 <= index < NUM_TABLEAU_PILES: return self.tableau_piles[index]
+        if pile_type == PILE_FOUNDATION and index is not None and 0 <= index < len(self.foundation_piles): return self.foundation_piles[index]
+        if pile_type == PILE_TABLEAU and index is not None and 0 <= index < len(self.tableau_piles): return self.tableau_piles[index]
         raise ValueError(f"Invalid pile id: {pile_type}{index+1 if index is not None else ''}")
 
     def move_cards(self, from_pile_type: str, from_idx: Optional[int],
@@ -125,7 +309,7 @@ class GameState:
 
         # Wykonaj ruch
         action = {
-            'type': 'move',
+            'type': ACTION_MOVE,
             'from_pile_type': from_pile_type,
             'from_idx': from_idx,
             'to_pile_type': to_pile_type,
@@ -216,33 +400,29 @@ class GameState:
         last_action = self.move_history.pop()
         action_type = last_action['type']
 
-        if action_type == 'draw':
+        if action_type == ACTION_DRAW:
             self._undo_draw_action(last_action)
-        elif action_type == 'reshuffle_stock':
+        elif action_type == ACTION_RESHUFFLE_STOCK:
             self._undo_reshuffle_action(last_action)
-        elif action_type == 'move':
+        elif action_type == ACTION_MOVE:
             self._undo_move_action(last_action)
         else:
             return False
 
-        self.moves_count = max(0, self.moves_count - 1)
+        self.moves_count = max(0, self.moves_count - last_action.get('num_draws', 1))
         return True
 
     def _undo_draw_action(self, last_action: Dict[str, Any]):
         """Cofa akcję dobierania kart ze stocka."""
-        cards_drawn_data = last_action['cards_drawn_data']
-        for _ in range(len(cards_drawn_data)):
-            self.waste_pile.remove_top_card()
-        for card_data_dict in reversed(cards_drawn_data):
-            self.stock_pile.add_card(self._recreate_card_from_data(card_data_dict))
+        self.talon.undraw(last_action['num_cards_drawn'])
 
     def _undo_reshuffle_action(self, last_action: Dict[str, Any]):
         """Cofa akcję przetasowania stosu odpadów do stocka."""
-        self.stock_pile.get_all_cards_and_clear()
-        reshuffled_waste_data_list = last_action['reshuffled_waste_data']
-        if reshuffled_waste_data_list:
-            for card_data_dict in reshuffled_waste_data_list:
-                self.waste_pile.add_card(self._recreate_card_from_data(card_data_dict))
+        self.stock_recycles = max(0, self.stock_recycles - 1)
+        self.talon.unrecycle(last_action['previous_order'])
+        if last_action.get('rng_state') is not None:
+            self.rng.setstate(last_action['rng_state'])
+            self._rng_changed()
 
     def _undo_move_action(self, last_action: Dict[str, Any]):
         """Cofa akcję przeniesienia kart między stosami."""
@@ -262,8 +442,106 @@ class GameState:
                 top_card.face_up = False
         source_pile.add_cards(cards_to_restore)
 
+    def apply(self, move: Move) -> tuple:
+        """
+        Wykonuje ruch w miejscu, bez zapisu w move_history i bez komunikatów - prymityw dla
+        przeszukiwania (solvery, boty z przewidywaniem). Ruch musi pochodzić z get_legal_moves().
+        Zwraca token, który revert() wykorzystuje do dokładnego cofnięcia ruchu
+        (łącznie z odsłonięciem karty w tableau i przypisaniem koloru do fundamentu).
+        """
+        self.moves_count += 1
+        if move.is_draw:
+            if not self.stock_pile.is_empty():
+                return move, self.talon.draw(self.rules.draw_count), None
+            rng_state = None
+            shuffle_rng = None
+            if self.current_settings.get("shuffle_waste_on_recycle", True):
+                rng_state = (self._rng_state(), self.rng_version)
+                shuffle_rng = self.rng
+            previous_order = self.talon.recycle(shuffle_rng)
+            if shuffle_rng is not None:
+                self._rng_changed()
+            self.stock_recycles += 1
+            return move, previous_order, rng_state
+
+        source_pile = self._get_pile_by_id(move.from_pile_type, move.from_idx)
+        dest_pile = self._get_pile_by_id(move.to_pile_type, move.to_idx)
+        moved_cards = source_pile.remove_cards_from_top(move.num_cards)
+        flipped = False
+        if move.from_pile_type == PILE_TABLEAU and source_pile.cards and not source_pile.cards[-1].face_up:
+            source_pile.cards[-1].face_up = True
+            flipped = True
+        dest_pile.add_cards(moved_cards)
+        previous_suit = False
+        if move.to_pile_type == PILE_FOUNDATION and len(dest_pile.cards) == 1:
+            previous_suit = dest_pile.suit_allowed
+            dest_pile.suit_allowed = moved_cards[0].suit
+        return move, flipped, previous_suit
+
+    def revert(self, token: tuple) -> None:
+        """Cofa ruch wykonany przez apply() (tokeny trzeba cofać w odwrotnej kolejności)."""
+        move, first, second = token
+        self.moves_count -= 1
+        if move.is_draw:
+            if isinstance(first, int):
+                self.talon.undraw(first)
+            else:
+                self.stock_recycles -= 1
+                self.talon.unrecycle(first)
+                if second is not None:
+                    self.rng.setstate(second[0])
+                    self.rng_version = second[1]
+            return
+
+        source_pile = self._get_pile_by_id(move.from_pile_type, move.from_idx)
+        dest_pile = self._get_pile_by_id(move.to_pile_type, move.to_idx)
+        moved_cards = dest_pile.remove_cards_from_top(move.num_cards)
+        if second is not False:
+            dest_pile.suit_allowed = second
+        if first:
+            source_pile.cards[-1].face_up = False
+        source_pile.add_cards(moved_cards)
+
+    def rules_key(self) -> str:
+        """Zestaw reguł, od którego zależy wynik rozwiązywania pozycji (wariant, poziom, przekładanie Waste)."""
+        return make_rules_key(self.variant.name, self.difficulty, self.current_settings)
+
+    def position_key(self, include_cursor: bool = True) -> bytes:
+        """
+        Kanoniczny zapis pozycji (łącznie z zakrytymi kartami) jako bajty - klucz transpozycji
+        i wspólnego cache'u wyników solvera. Stosy są zapisane w kolejności indeksów, bo zapamiętany
+        najlepszy ruch odwołuje się do nich. Liczba przejść talii wchodzi do klucza tylko przy limicie
+        przejść, a przy tasowaniu Waste dochodzi skrót stanu generatora, od którego zależą kolejne przejścia.
+        `include_cursor=False` pomija podział talon/Waste - pozycje różniące się tylko nim są równoważne,
+        gdy każdą kartę talii da się dobrać w dowolnej chwili (talon_cycles_freely()).
+        """
+        key = bytearray()
+        for pile in self.tableau_piles:
+            key.extend(c.code if c.face_up else c.code | 0x40 for c in pile.cards)
+            key.append(0xFF)
+        for pile in self.foundation_piles:
+            key.append(pile.cards[-1].code if pile.cards else 0xFE)
+        key.extend(c.code for c in self.talon.ring)
+        key.append(0xFF)
+        if include_cursor:
+            key.append(self.talon.cursor)
+        if self.rules.max_stock_passes is not None:
+            key.append(self.stock_recycles)
+        if self.current_settings.get("reshuffle_waste_on_empty_stock", True) \
+                and self.current_settings.get("shuffle_waste_on_recycle", True):
+            key.extend(self._rng_digest())
+        return bytes(key)
+
+    def talon_cycles_freely(self) -> bool:
+        """Czy dobieranie po 1 karcie z nieograniczonym przekładaniem Waste bez tasowania pozwala dobrać każdą kartę talii."""
+        return self.rules.draw_count == 1 and self.rules.max_stock_passes is None \
+            and self._next_pass_is_predictable()
+
     def check_win_condition(self) -> bool:
-        return sum(len(p) for p in self.foundation_piles) == 52
+        return self._memoized("win", self._compute_win_condition)
+
+    def _compute_win_condition(self) -> bool:
+        return sum(len(p) for p in self.foundation_piles) == self.rules.num_cards
 
     def can_move_card_to_pile(self, card_to_move: Card, dest_pile) -> bool:
         if not card_to_move or not card_to_move.face_up: return False
@@ -277,14 +555,15 @@ class GameState:
 
     def has_possible_moves(self) -> bool:
         """
-        Sprawdza, czy gracz ma jakiekolwiek możliwe ruchy do wykonania.
+        Sprawdza, czy gracz ma jakiekolwiek możliwe ruchy do wykonania (wynik zapamiętany do zmiany planszy).
         """
+        return self._memoized("has_moves", self._compute_has_possible_moves)
+
+    def _compute_has_possible_moves(self) -> bool:
         if not self.stock_pile.is_empty():
             return True
         # Jeśli stock jest pusty, ale można przetasować waste, to też jest "ruch" (draw spowoduje reshuffle)
-        if self.stock_pile.is_empty() and \
-           self.current_settings.get("reshuffle_waste_on_empty_stock", True) and \
-           not self.waste_pile.is_empty():
+        if self.can_recycle_stock():
             return True
 
         if self._waste_has_possible_moves():
@@ -327,4 +606,75 @@ class GameState:
                     if self.can_move_stack_to_tableau(stack_to_check, t_pile_dest):
                         return True
         return False
-    
\ No newline at end of file
+    
+    def get_legal_moves(self) -> List[Move]:
+        """
+        Zwraca listę wszystkich dozwolonych ruchów w bieżącej pozycji.
+        Pomija przenoszenie kart między fundamentami, bo nigdy nie zmienia ono sytuacji.
+        Lista jest zapamiętywana do następnej zmiany planszy i współdzielona - nie należy jej modyfikować.
+        """
+        return self._memoized("legal_moves", self._compute_legal_moves)
+
+    def _compute_legal_moves(self) -> List[Move]:
+        legal_moves: List[Move] = []
+        if not self.stock_pile.is_empty() or self.can_recycle_stock():
+            legal_moves.append(DRAW_MOVE)
+
+        waste_card = self.waste_pile.get_playable_card()
+        if waste_card:
+            for f_idx, f_pile in enumerate(self.foundation_piles):
+                if f_pile.can_add_card(waste_card):
+                    legal_moves.append(Move(PILE_WASTE, None, PILE_FOUNDATION, f_idx))
+            for t_idx, t_pile in enumerate(self.tableau_piles):
+                if t_pile.can_add_cards([waste_card]):
+                    legal_moves.append(Move(PILE_WASTE, None, PILE_TABLEAU, t_idx))
+
+        # To samo co TableauPile.can_add_cards, ale od strony kolumny docelowej: jej wierzch przyjmuje
+        # tylko kilka kodów (rules.tableau_accepted_codes), a odkryta sekwencja źródła jest malejąca,
+        # więc każdy kod występuje w niej najwyżej raz. Pusta kolumna to -1, zakryty wierzch - None.
+        accepted_codes = self.rules.tableau_accepted_codes
+        empty_column_accepts = self.rules.empty_column_accepts
+        dest_tops = [(pile.cards[-1].code if pile.cards[-1].face_up else None) if pile.cards else -1
+                     for pile in self.tableau_piles]
+        for t_idx, t_pile in enumerate(self.tableau_piles):
+            top_card = t_pile.peek_top_card()
+            if not top_card or not top_card.face_up:
+                continue
+            for f_idx, f_pile in enumerate(self.foundation_piles):
+                if f_pile.can_add_card(top_card):
+                    legal_moves.append(Move(PILE_TABLEAU, t_idx, PILE_FOUNDATION, f_idx))
+            face_up_stack = t_pile.get_face_up_cards()
+            positions = {card.code: k for k, card in enumerate(face_up_stack)}
+            targets: List[Tuple[int, int]] = []
+            for dest_idx, dest_top in enumerate(dest_tops):
+                if dest_idx == t_idx or dest_top is None:
+                    continue
+                if dest_top < 0:
+                    targets.extend((k, dest_idx) for k, card in enumerate(face_up_stack)
+                                   if empty_column_accepts[card.code])
+                    continue
+                for code in accepted_codes[dest_top]:
+                    k = positions.get(code)
+                    if k is not None:
+                        targets.append((k, dest_idx))
+            # Kolejność jak przy przeglądaniu od najdłuższej sekwencji, a w niej kolumn docelowych po kolei.
+            targets.sort()
+            legal_moves.extend(Move(PILE_TABLEAU, t_idx, PILE_TABLEAU, dest_idx, len(face_up_stack) - k)
+                               for k, dest_idx in targets)
+
+        for f_idx, f_pile in enumerate(self.foundation_piles):
+            top_card = f_pile.peek_top_card()
+            if not top_card:
+                continue
+            for t_idx, t_pile in enumerate(self.tableau_piles):
+                if t_pile.can_add_cards([top_card]):
+                    legal_moves.append(Move(PILE_FOUNDATION, f_idx, PILE_TABLEAU, t_idx))
+        return legal_moves
+
+    def apply_move(self, move: Move) -> Tuple[bool, str]:
+        """Wykonuje ruch opisany obiektem Move przez deal_from_stock lub move_cards."""
+        if move.is_draw:
+            if self.deal_from_stock():
+                return True, "Pociągnięto karty."
+            return False, "Brak kart do pociągnięcia."
+        return self.move_cards(move.from_pile_type, move.from_idx, move.to_pile_type, move.to_idx, move.num_cards)
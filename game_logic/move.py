@@ -0,0 +1,52 @@
+from typing import NamedTuple, Optional
+from utils.constants import PILE_STOCK, PILE_WASTE, PILE_FOUNDATION, PILE_TABLEAU
+
+
+class Move(NamedTuple):
+    """
+    Pojedynczy ruch gracza zapisany w tej samej gramatyce co komendy konsoli.
+    Dobranie kart z talii to ruch ze stosu PILE_STOCK (num_cards = 0).
+    """
+    from_pile_type: str
+    from_idx: Optional[int]
+    to_pile_type: str
+    to_idx: Optional[int]
+    num_cards: int = 1
+
+    @property
+    def is_draw(self) -> bool:
+        return self.from_pile_type == PILE_STOCK
+
+    def __str__(self) -> str:
+        if self.is_draw:
+            return "d"
+        source = self.from_pile_type + (str(self.from_idx + 1) if self.from_idx is not None else "")
+        dest = self.to_pile_type + (str(self.to_idx + 1) if self.to_idx is not None else "")
+        if self.num_cards != 1:
+            return f"m {source} {dest} {self.num_cards}"
+        return f"m {source} {dest}"
+
+    @classmethod
+    def parse(cls, text: str) -> 'Move':
+        """Odtwarza ruch z zapisu zwracanego przez str(move). Rzuca ValueError dla błędnego zapisu."""
+        parts = text.split()
+        if parts == ["d"]:
+            return DRAW_MOVE
+        if len(parts) not in (3, 4) or parts[0] != "m":
+            raise ValueError(f"Invalid move: {text!r}")
+        source_type, source_idx = _parse_pile(parts[1])
+        dest_type, dest_idx = _parse_pile(parts[2])
+        num_cards = int(parts[3]) if len(parts) == 4 else 1
+        return cls(source_type, source_idx, dest_type, dest_idx, num_cards)
+
+
+def _parse_pile(text: str):
+    pile_type = text[:1]
+    if pile_type == PILE_WASTE and len(text) == 1:
+        return pile_type, None
+    if pile_type in (PILE_FOUNDATION, PILE_TABLEAU) and text[1:].isdigit() and int(text[1:]) > 0:
+        return pile_type, int(text[1:]) - 1
+    raise ValueError(f"Invalid pile: {text!r}")
+
+
+DRAW_MOVE = Move(PILE_STOCK, None, PILE_WASTE, None, 0)
@@ -1,23 +1,69 @@
-from typing import List, Optional, Union
+import copy
+import random
+from typing import List, Optional, Tuple, Union
 from .card import Card
+from .snapshot import CardSnapshot, freeze_cards
+from .variants import CompiledRules, DEFAULT_RULES
 from utils.constants import (
-    Suit, Rank, FACE_DOWN_CARD_STR, EMPTY_PILE_STR,
-    DIFFICULTY_HARD, DIFFICULTY_EASY
+    Suit, Rank, FACE_DOWN_CARD_STR, EMPTY_PILE_STR, CARDS_PER_DECK
 )
 
+class VersionClock:
+    """
+    Wspólny licznik zmian wszystkich stosów jednej gry. Każda zmiana stosu pobiera kolejny numer,
+    więc `Pile.version` rośnie przy każdej zmianie stosu, a `GameState.version` (bieżąca wartość
+    licznika) przy każdej zmianie planszy.
+    """
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def tick(self) -> int:
+        self.value += 1
+        return self.value
+
+
 class Pile:
     """Bazowa klasa stosu kart."""
-    def __init__(self):
+    def __init__(self, clock: Optional[VersionClock] = None):
         self.cards: List[Card] = []
+        self.clock = clock if clock is not None else VersionClock()
+        self.version = 0
+        self._frozen: Optional[Tuple[int, Tuple[CardSnapshot, ...]]] = None
+
+    def touch(self) -> None:
+        """Oznacza stos jako zmieniony (unieważnia wyniki zapamiętane dla poprzedniej wersji)."""
+        self.version = self.clock.tick()
+
+    def frozen(self) -> Tuple[CardSnapshot, ...]:
+        """
+        Niezmienna kopia kart stosu. Ta sama krotka jest zwracana do następnej zmiany stosu,
+        więc kolejne migawki gry (GameState.snapshot) współdzielą niezmienione stosy.
+        """
+        if self._frozen is not None and self._frozen[0] == self.version:
+            return self._frozen[1]
+        cards = freeze_cards(self.cards)
+        self._frozen = (self.version, cards)
+        return cards
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # Kopie (np. determinizacja w bots.win_probability) mogą zmieniać karty bez zmiany wersji.
+        state['_frozen'] = None
+        return state
 
     def add_card(self, card: Card) -> None:
         self.cards.append(card)
+        self.touch()
 
     def add_cards(self, cards_to_add: List[Card]) -> None:
         self.cards.extend(cards_to_add)
+        self.touch()
 
     def remove_top_card(self) -> Optional[Card]:
         if not self.is_empty():
+            self.touch()
             return self.cards.pop()
         return None
 
@@ -28,7 +74,8 @@ class Pile:
         """
         if len(self.cards) >= num_cards > 0:
             removed = self.cards[-num_cards:]
-            self.cards = self.cards[:-num_cards]
+            del self.cards[-num_cards:]
+            self.touch()
             return removed
         return []
 
@@ -57,23 +104,270 @@ class Pile:
     def get_all_cards_and_clear(self) -> List[Card]:
         all_cards = list(self.cards) 
         self.cards.clear()
+        self.touch()
         return all_cards
 
-class StockPile(Pile):
+class Talon:
+    """
+    Talia rezerwowa i stos odkrytych (Waste) w jednym buforze z kursorem.
+
+    `ring[:cursor]` to Waste (wierzchnia karta to ring[cursor - 1]), a `ring[cursor:]` to talia
+    w kolejności dobierania. Dobieranie, cofanie dobierania i przełożenie Waste do talii bez
+    tasowania przesuwają tylko kursor (i odwracają karty), bez kopiowania list.
+    """
+    def __init__(self, clock: Optional[VersionClock] = None):
+        self.ring: List[Card] = []
+        self.cursor = 0
+        self.clock = clock if clock is not None else VersionClock()
+        self.version = 0
+        # Wersja, przy której ostatnio zmienił się skład albo kolejność bufora (nie sam kursor).
+        self.layout_version = 0
+        self._index_cache: Optional[Tuple[tuple, List[Tuple[int, int, Card]]]] = None
+        self._frozen: Optional[Tuple[int, Tuple[int, ...]]] = None
+
+    def touch(self, reordered: bool = True) -> None:
+        """Oznacza bufor jako zmieniony; `reordered=False`, gdy przesunął się tylko kursor (i odkrycie kart)."""
+        self.version = self.clock.tick()
+        if reordered:
+            self.layout_version = self.version
+
+    def frozen_codes(self) -> Tuple[int, ...]:
+        """Kody kart bufora w kolejności `ring`. Dobieranie ich nie zmienia, więc krotka jest współdzielona między migawkami."""
+        if self._frozen is not None and self._frozen[0] == self.layout_version:
+            return self._frozen[1]
+        codes = tuple(card.code for card in self.ring)
+        self._frozen = (self.layout_version, codes)
+        return codes
+
+    def draw(self, count: int) -> int:
+        """Odkrywa do `count` kart z talii na Waste. Zwraca liczbę faktycznie dobranych kart."""
+        end = min(self.cursor + count, len(self.ring))
+        for i in range(self.cursor, end):
+            self.ring[i].face_up = True
+        drawn = end - self.cursor
+        self.cursor = end
+        self.touch(reordered=False)
+        return drawn
+
+    def undraw(self, count: int) -> None:
+        """Cofa dobranie `count` kart - zakrywa je i przesuwa kursor z powrotem."""
+        start = max(0, self.cursor - count)
+        for card in self.ring[start:self.cursor]:
+            card.face_up = False
+        self.cursor = start
+        self.touch(reordered=False)
+
+    def recycle(self, rng: Optional[random.Random] = None) -> Optional[List[Card]]:
+        """
+        Przekłada całe Waste z powrotem do (pustej) talii. Bez `rng` kolejność jest zachowana
+        i zmienia się tylko kursor; z `rng` karty są tasowane, a poprzednia kolejność zwracana
+        do cofnięcia ruchu.
+        """
+        previous_order = None
+        for card in self.ring:
+            card.face_up = False
+        if rng is not None:
+            previous_order = list(self.ring)
+            rng.shuffle(self.ring)
+        self.cursor = 0
+        self.touch(reordered=rng is not None)
+        return previous_order
+
+    def unrecycle(self, previous_order: Optional[List[Card]] = None) -> None:
+        """Cofa recycle(): przywraca poprzednią kolejność (jeśli była tasowana) i całe Waste."""
+        if previous_order is not None:
+            self.ring[:] = previous_order
+        for card in self.ring:
+            card.face_up = True
+        self.cursor = len(self.ring)
+        self.touch(reordered=previous_order is not None)
+
+    def reachable_cards(self, draw_count: int, include_next_pass: bool = False) -> List[Tuple[int, int, Card]]:
+        """
+        Indeks kart, które staną się wierzchnią kartą Waste (czyli grywalne), jeśli gracz będzie
+        tylko dobierał. Zwraca listę (liczba dobrań, numer przejścia, karta); bieżąca wierzchnia
+        karta ma 0 dobrań. Przy dobieraniu po 3 grywalna jest co trzecia karta, co ten indeks
+        uwzględnia. `include_next_pass` dodaje następne przejście po przełożeniu Waste bez tasowania
+        (samo przełożenie liczy się jako jedno dobranie). Wynik jest zapamiętywany do następnej zmiany bufora.
+        """
+        key = (self.version, draw_count, include_next_pass)
+        if self._index_cache is not None and self._index_cache[0] == key:
+            return self._index_cache[1]
+        index: List[Tuple[int, int, Card]] = []
+        if self.cursor > 0:
+            index.append((0, 0, self.ring[self.cursor - 1]))
+        draws = 0
+        position = self.cursor
+        while position < len(self.ring):
+            position = min(position + draw_count, len(self.ring))
+            draws += 1
+            index.append((draws, 0, self.ring[position - 1]))
+        if include_next_pass and self.ring:
+            draws += 1
+            position = 0
+            while position < len(self.ring):
+                position = min(position + draw_count, len(self.ring))
+                draws += 1
+                index.append((draws, 1, self.ring[position - 1]))
+        self._index_cache = (key, index)
+        return index
+
+    def __deepcopy__(self, memo):
+        talon = Talon(copy.deepcopy(self.clock, memo))
+        memo[id(self)] = talon
+        talon.ring = copy.deepcopy(self.ring, memo)
+        talon.cursor = self.cursor
+        talon.version = self.version
+        talon.layout_version = self.layout_version
+        return talon
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_index_cache'] = None
+        state['_frozen'] = None
+        return state
+
+
+class TalonView:
+    """
+    Bazowa klasa widoków StockPile i WastePile na bufor Talon. W odróżnieniu od Pile nie mają
+    własnej listy kart: `cards` to krotka tylko do odczytu (zmiany wyłącznie metodami widoku),
+    a wersja i oznaczanie zmian należą do bufora.
+    """
+    def __init__(self, talon: Optional[Talon] = None):
+        self.talon = talon if talon is not None else Talon()
+
+    @property
+    def cards(self) -> Tuple[Card, ...]:
+        raise NotImplementedError
+
+    @property
+    def version(self) -> int:
+        return self.talon.version
+
+    def touch(self) -> None:
+        self.talon.touch()
+
+
+class StockPile(TalonView):
+    """Talia rezerwowa - widok na niedobraną część bufora Talon (wierzch to ring[cursor])."""
+
+    @property
+    def cards(self) -> Tuple[Card, ...]:
+        return tuple(self.talon.ring[:self.talon.cursor - 1:-1] if self.talon.cursor else self.talon.ring[::-1])
+
+    def add_card(self, card: Card) -> None:
+        self.talon.ring.insert(self.talon.cursor, card)
+        self.talon.touch()
+
+    def add_cards(self, cards_to_add: List[Card]) -> None:
+        self.talon.ring[self.talon.cursor:self.talon.cursor] = cards_to_add[::-1]
+        self.talon.touch()
+
+    def remove_top_card(self) -> Optional[Card]:
+        if self.is_empty():
+            return None
+        self.talon.touch()
+        return self.talon.ring.pop(self.talon.cursor)
+
+    def remove_cards_from_top(self, num_cards: int) -> List[Card]:
+        if len(self) >= num_cards > 0:
+            cursor = self.talon.cursor
+            removed = self.talon.ring[cursor:cursor + num_cards][::-1]
+            del self.talon.ring[cursor:cursor + num_cards]
+            self.talon.touch()
+            return removed
+        return []
+
+    def peek_top_card(self) -> Optional[Card]:
+        return self.talon.ring[self.talon.cursor] if not self.is_empty() else None
+
+    def peek_cards_from_top(self, num_cards: int) -> List[Card]:
+        if num_cards <= 0:
+            return []
+        return list(self.cards[-num_cards:])
+
+    def get_all_cards_and_clear(self) -> List[Card]:
+        all_cards = list(self.cards)
+        del self.talon.ring[self.talon.cursor:]
+        self.talon.touch()
+        return all_cards
+
+    def is_empty(self) -> bool:
+        return self.talon.cursor >= len(self.talon.ring)
+
+    def __len__(self) -> int:
+        return len(self.talon.ring) - self.talon.cursor
+
     def __str__(self) -> str:
         if self.is_empty():
             return EMPTY_PILE_STR
-        return f"[S:{len(self.cards)}]" 
+        return f"[S:{len(self)}]" 
+
+class WastePile(TalonView):
+    """Stos odkrytych - widok na dobraną część bufora Talon (wierzch to ring[cursor - 1])."""
+    def __init__(self, rules: CompiledRules = DEFAULT_RULES, talon: Optional[Talon] = None):
+        super().__init__(talon)
+        self.rules = rules
+
+    @property
+    def cards(self) -> Tuple[Card, ...]:
+        return tuple(self.talon.ring[:self.talon.cursor])
+
+    def add_card(self, card: Card) -> None:
+        self.talon.ring.insert(self.talon.cursor, card)
+        self.talon.cursor += 1
+        self.talon.touch()
+
+    def add_cards(self, cards_to_add: List[Card]) -> None:
+        cursor = self.talon.cursor
+        self.talon.ring[cursor:cursor] = cards_to_add
+        self.talon.cursor += len(cards_to_add)
+        self.talon.touch()
+
+    def remove_top_card(self) -> Optional[Card]:
+        if self.is_empty():
+            return None
+        self.talon.cursor -= 1
+        self.talon.touch()
+        return self.talon.ring.pop(self.talon.cursor)
+
+    def remove_cards_from_top(self, num_cards: int) -> List[Card]:
+        if len(self) >= num_cards > 0:
+            start = self.talon.cursor - num_cards
+            removed = self.talon.ring[start:self.talon.cursor]
+            del self.talon.ring[start:self.talon.cursor]
+            self.talon.cursor = start
+            self.talon.touch()
+            return removed
+        return []
+
+    def peek_top_card(self) -> Optional[Card]:
+        return self.talon.ring[self.talon.cursor - 1] if self.talon.cursor else None
+
+    def peek_cards_from_top(self, num_cards: int) -> List[Card]:
+        if num_cards <= 0:
+            return []
+        return self.talon.ring[max(0, self.talon.cursor - num_cards):self.talon.cursor]
+
+    def get_all_cards_and_clear(self) -> List[Card]:
+        all_cards = list(self.cards)
+        del self.talon.ring[:self.talon.cursor]
+        self.talon.cursor = 0
+        self.talon.touch()
+        return all_cards
+
+    def is_empty(self) -> bool:
+        return self.talon.cursor == 0
 
-class WastePile(Pile):
-    def get_display_cards(self, difficulty: str) -> List[Card]:
-        """Zwraca karty do wyświetlenia w zależności od poziomu trudności (top 1 lub 3 top)."""
+    def __len__(self) -> int:
+        return self.talon.cursor
+
+    def get_display_cards(self) -> List[Card]:
+        """Zwraca karty do wyświetlenia - tyle wierzchnich kart, ile dobiera się naraz (top 1 lub 3 top)."""
         if self.is_empty():
             return []
-        if difficulty == DIFFICULTY_HARD:
-            return self.cards[-3:] 
-        else: 
-            return self.cards[-1:] 
+        return self.peek_cards_from_top(self.rules.draw_count)
 
     def get_playable_card(self) -> Optional[Card]:
         """W trybach łatwym i trudnym można zagrywać tylko wierzchnią kartę z (Waste)."""
@@ -86,23 +380,17 @@ class WastePile(Pile):
 
 class FoundationPile(Pile):
     """Stos fundamentowy – budowany rosnąco w kolorze od Asa."""
-    def __init__(self):
-        super().__init__()
+    def __init__(self, rules: CompiledRules = DEFAULT_RULES, clock: Optional[VersionClock] = None):
+        super().__init__(clock)
+        self.rules = rules
         self.suit_allowed: Optional[Suit] = None
 
     def can_add_card(self, card: Card) -> bool:
         if not card.face_up:
             return False
-        if self.is_empty():
-            if card.rank == Rank.ACE:
-                return True
-            return False
-        else:
-            top_card = self.peek_top_card()
-            if top_card:
-                return (card.suit == self.suit_allowed and 
-                        card.rank.value == top_card.rank.value + 1)
-            return False 
+        if not self.cards:
+            return bool(self.rules.foundation_base[card.code])
+        return self.rules.foundation_next[self.cards[-1].code] == card.code
 
     def add_card(self, card: Card) -> None:
         super().add_card(card)
@@ -115,6 +403,11 @@ class FoundationPile(Pile):
         return str(self.peek_top_card())
 
 class TableauPile(Pile):
+    def __init__(self, rules: CompiledRules = DEFAULT_RULES, clock: Optional[VersionClock] = None):
+        super().__init__(clock)
+        self.rules = rules
+        self._face_up_cache: Optional[Tuple[int, List[Card]]] = None
+
     def can_add_cards(self, cards_to_add: Union[Card, List[Card]]) -> bool:
         if not isinstance(cards_to_add, list):
             cards_to_add = [cards_to_add]
@@ -124,32 +417,34 @@ class TableauPile(Pile):
 
         first_card_to_add = cards_to_add[0]
 
-        if self.is_empty():
-            return first_card_to_add.rank == Rank.KING
-        else:
-            top_pile_card = self.peek_top_card()
-            if not top_pile_card or not top_pile_card.face_up:
-                return False 
-            
-            return (first_card_to_add.color != top_pile_card.color and 
-                    first_card_to_add.rank.value == top_pile_card.rank.value - 1)
+        if not self.cards:
+            return bool(self.rules.empty_column_accepts[first_card_to_add.code])
+        top_pile_card = self.cards[-1]
+        if not top_pile_card.face_up:
+            return False 
+        return bool(self.rules.tableau_accepts[top_pile_card.code * CARDS_PER_DECK + first_card_to_add.code])
 
     def flip_top_card_if_needed(self) -> bool:
         """Odsłania wierzchnią kartę, jeśli jest zakryta. Zwraca True, jeśli doszło do odsłonięcia."""
         top_card = self.peek_top_card()
         if top_card and not top_card.face_up:
             top_card.flip()
+            self.touch()
             return True
         return False
 
     def get_face_up_cards(self) -> List[Card]:
-        """Zwraca listę odkrytych kart z top stosu."""
-        face_up_stack = []
-        for card in reversed(self.cards):
-            if card.face_up:
-                face_up_stack.insert(0, card) 
-            else:
-                break 
+        """
+        Zwraca listę odkrytych kart z top stosu. Wynik jest zapamiętywany do następnej zmiany stosu
+        i współdzielony między wywołaniami - nie należy go modyfikować.
+        """
+        if self._face_up_cache is not None and self._face_up_cache[0] == self.version:
+            return self._face_up_cache[1]
+        start = len(self.cards)
+        while start > 0 and self.cards[start - 1].face_up:
+            start -= 1
+        face_up_stack = self.cards[start:]
+        self._face_up_cache = (self.version, face_up_stack)
         return face_up_stack
 
     def __str__(self) -> str:
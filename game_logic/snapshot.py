@@ -0,0 +1,104 @@
+"""
+Niezmienne migawki planszy (GameState.snapshot) do odczytu poza wątkiem gry.
+
+Stosy są zapisane jako krotki kart CardSnapshot (karta to para kod + odkrycie, obiekty
+współdzielone dla całej gry), a krotka stosu jest zapamiętywana do jego następnej zmiany.
+Kolejne migawki dzielą więc wszystkie niezmienione stosy - migawka po ruchu kosztuje tyle,
+ile kart mają zmienione stosy, a nie kopię wszystkich kart. Migawka nie ma żadnych
+odwołań do obiektów gry, więc wątki w tle (podpowiedzi, zapis, telemetria) mogą ją czytać
+bez blokad, a procesy robocze dostają ją w postaci dużo mniejszej niż cały GameState.
+"""
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Tuple
+from utils.constants import Suit, Rank, FACE_DOWN_CARD_STR, RANKS_PER_SUIT
+from .card import Card
+
+_SUITS_BY_INDEX = list(Suit)
+_RANKS_BY_INDEX = list(Rank)
+
+
+class CardSnapshot(NamedTuple):
+    """Niezmienny odpowiednik Card: kod 0-51 (Card.to_code) i odkrycie karty."""
+    code: int
+    face_up: bool
+
+    @property
+    def suit(self) -> Suit:
+        return _SUITS_BY_INDEX[self.code // RANKS_PER_SUIT]
+
+    @property
+    def rank(self) -> Rank:
+        return _RANKS_BY_INDEX[self.code % RANKS_PER_SUIT]
+
+    @property
+    def color(self):
+        return self.suit.color
+
+    @property
+    def value(self) -> int:
+        return self.rank.value
+
+    def to_code(self) -> int:
+        return self.code
+
+    def thaw(self) -> Card:
+        """Nowa, zmienna karta o tej samej tożsamości i odkryciu."""
+        return Card.from_code(self.code, self.face_up)
+
+    def __str__(self) -> str:
+        if not self.face_up:
+            return FACE_DOWN_CARD_STR
+        return f"{self.rank.symbol}{self.suit.value}"
+
+
+# Jedna instancja na (kod, odkrycie) - zamrożenie stosu nie tworzy nowych obiektów kart.
+_CARD_SNAPSHOTS = [(CardSnapshot(code, False), CardSnapshot(code, True)) for code in range(RANKS_PER_SUIT * len(Suit))]
+
+
+def freeze_card(card: Card) -> CardSnapshot:
+    return _CARD_SNAPSHOTS[card.code][card.face_up]
+
+
+def freeze_cards(cards: Iterable[Card]) -> Tuple[CardSnapshot, ...]:
+    return tuple(_CARD_SNAPSHOTS[card.code][card.face_up] for card in cards)
+
+
+class GameSnapshot(NamedTuple):
+    """
+    Stan planszy w chwili GameState.snapshot(): stosy jako krotki CardSnapshot (wierzch na końcu),
+    bufor talii jako kody kart (`talon[:talon_cursor]` to Waste, reszta to talia w kolejności
+    dobierania), liczniki i stan generatora gry. Bez historii ruchów i czasu gry.
+    GameState.from_snapshot() odtwarza z niej pełną grę (np. w procesie roboczym).
+    """
+    version: int
+    variant_name: str
+    difficulty: str
+    settings: Tuple[Tuple[str, Any], ...]
+    seed: Optional[int]
+    deal_number: Optional[int]
+    tableau: Tuple[Tuple[CardSnapshot, ...], ...]
+    foundations: Tuple[Tuple[CardSnapshot, ...], ...]
+    talon: Tuple[int, ...]
+    talon_cursor: int
+    stock_recycles: int
+    moves_count: int
+    rng_state: tuple
+
+    @property
+    def waste(self) -> Tuple[CardSnapshot, ...]:
+        """Karty Waste (odkryte, wierzch na końcu)."""
+        return tuple(_CARD_SNAPSHOTS[code][True] for code in self.talon[:self.talon_cursor])
+
+    @property
+    def stock(self) -> Tuple[CardSnapshot, ...]:
+        """Karty talii rezerwowej (zakryte, wierzch - następna dobierana karta - na końcu), jak StockPile.cards."""
+        return tuple(_CARD_SNAPSHOTS[code][False] for code in reversed(self.talon[self.talon_cursor:]))
+
+    def settings_dict(self) -> Dict[str, Any]:
+        return dict(self.settings)
+
+    def foundation_cards(self) -> int:
+        return sum(len(pile) for pile in self.foundations)
+
+    def is_won(self) -> bool:
+        """Wszystkie karty na fundamentach (talia, Waste i tableau puste)."""
+        return not self.talon and not any(self.tableau)
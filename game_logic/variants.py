@@ -0,0 +1,101 @@
+from typing import Dict, Optional, Tuple
+from utils.constants import (
+    Suit, Rank, CARDS_PER_DECK, RANKS_PER_SUIT, NUM_TABLEAU_PILES, DIFFICULTY_HARD
+)
+
+BUILD_ALTERNATE_COLOR = "alternate_color"
+BUILD_SAME_SUIT = "same_suit"
+BUILD_ANY_SUIT = "any_suit"
+EMPTY_COLUMN_KING = "king"
+EMPTY_COLUMN_ANY = "any"
+
+VARIANT_CLASSIC = "classic"
+VARIANT_KLONDIKE_DRAW_1 = "klondike-1"
+VARIANT_KLONDIKE_DRAW_3 = "klondike-3"
+VARIANT_KLONDIKE_LIMITED = "klondike-3-limited"
+VARIANT_DOUBLE_KLONDIKE = "double-klondike"
+
+
+class CompiledRules:
+    """
+    Zasady wariantu skompilowane do tablic przeglądowych indeksowanych kodem karty (Card.code).
+    Sprawdzenie ruchu to jedno indeksowanie tablicy zamiast porównań kolorów i rang.
+    """
+    def __init__(self, variant: 'Variant'):
+        self.num_decks = variant.num_decks
+        self.num_cards = variant.num_decks * CARDS_PER_DECK
+        self.num_tableau_piles = variant.num_tableau_piles
+        self.num_foundation_piles = variant.num_decks * len(Suit)
+        self.draw_count = variant.draw_count
+        self.max_stock_passes = variant.max_stock_passes
+        self.tableau_deal: Tuple[int, ...] = tuple(range(1, variant.num_tableau_piles + 1))
+
+        suits = list(Suit)
+        def suit_of(code: int) -> Suit: return suits[code // RANKS_PER_SUIT]
+        def rank_value_of(code: int) -> int: return code % RANKS_PER_SUIT + 1
+
+        tableau_accepts = bytearray(CARDS_PER_DECK * CARDS_PER_DECK)
+        for top in range(CARDS_PER_DECK):
+            for card in range(CARDS_PER_DECK):
+                if rank_value_of(card) != rank_value_of(top) - 1:
+                    continue
+                if variant.build_rule == BUILD_ALTERNATE_COLOR:
+                    allowed = suit_of(card).color != suit_of(top).color
+                elif variant.build_rule == BUILD_SAME_SUIT:
+                    allowed = suit_of(card) == suit_of(top)
+                else:
+                    allowed = True
+                tableau_accepts[top * CARDS_PER_DECK + card] = allowed
+        self.tableau_accepts = bytes(tableau_accepts)
+        # Odwrotny indeks tableau_accepts: kody kart, które można położyć na karcie o danym kodzie.
+        self.tableau_accepted_codes: Tuple[Tuple[int, ...], ...] = tuple(
+            tuple(card for card in range(CARDS_PER_DECK) if tableau_accepts[top * CARDS_PER_DECK + card])
+            for top in range(CARDS_PER_DECK))
+
+        self.empty_column_accepts = bytes(
+            variant.empty_column_rule == EMPTY_COLUMN_ANY or rank_value_of(code) == Rank.KING.value
+            for code in range(CARDS_PER_DECK))
+        self.foundation_base = bytes(rank_value_of(code) == Rank.ACE.value for code in range(CARDS_PER_DECK))
+        self.foundation_next: Tuple[int, ...] = tuple(
+            code + 1 if rank_value_of(code) < Rank.KING.value else -1 for code in range(CARDS_PER_DECK))
+
+
+class Variant:
+    """Definicja wariantu Klondike: liczba talii i kolumn, dobieranie, limit przejść przez talię i zasady budowania."""
+    def __init__(self, name: str, display_name: str, num_decks: int = 1, num_tableau_piles: int = NUM_TABLEAU_PILES,
+                 draw_count: int = 1, max_stock_passes: Optional[int] = None,
+                 build_rule: str = BUILD_ALTERNATE_COLOR, empty_column_rule: str = EMPTY_COLUMN_KING):
+        self.name = name
+        self.display_name = display_name
+        self.num_decks = num_decks
+        self.num_tableau_piles = num_tableau_piles
+        self.draw_count = draw_count
+        self.max_stock_passes = max_stock_passes
+        self.build_rule = build_rule
+        self.empty_column_rule = empty_column_rule
+        self.rules = CompiledRules(self)
+
+    def __repr__(self) -> str:
+        return f"Variant({self.name!r})"
+
+
+VARIANTS: Dict[str, Variant] = {v.name: v for v in (
+    Variant(VARIANT_KLONDIKE_DRAW_1, "Klondike (dobieranie 1)", draw_count=1),
+    Variant(VARIANT_KLONDIKE_DRAW_3, "Klondike (dobieranie 3)", draw_count=3),
+    Variant(VARIANT_KLONDIKE_LIMITED, "Klondike (dobieranie 3, maks. 3 przejścia)", draw_count=3, max_stock_passes=3),
+    Variant(VARIANT_DOUBLE_KLONDIKE, "Podwójny Klondike (104 karty, 9 kolumn)", num_decks=2, num_tableau_piles=9,
+            draw_count=1),
+)}
+DEFAULT_RULES = VARIANTS[VARIANT_KLONDIKE_DRAW_1].rules
+
+
+def resolve_variant(difficulty: str, variant_name: Optional[str] = None) -> Variant:
+    """
+    Zwraca wariant z ustawień. Wariant 'classic' (domyślny) wynika z poziomu trudności:
+    łatwy - dobieranie 1 karty, trudny - dobieranie 3 kart.
+    """
+    if variant_name and variant_name != VARIANT_CLASSIC:
+        if variant_name not in VARIANTS:
+            raise ValueError(f"Nieznany wariant gry: '{variant_name}'")
+        return VARIANTS[variant_name]
+    return VARIANTS[VARIANT_KLONDIKE_DRAW_3 if difficulty == DIFFICULTY_HARD else VARIANT_KLONDIKE_DRAW_1]
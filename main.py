@@ -1,57 +1,220 @@
 from game_logic.game_state import GameState
+from game_logic.move import Move
+from game_logic.snapshot import GameSnapshot
+from game_logic.variants import VARIANTS, VARIANT_CLASSIC
 from ui.console_ui import ConsoleUI
 from utils import high_score, game_settings
-from utils.constants import PILE_STOCK
+from utils.game_settings import DEAL_DIFFICULTY_ANY, DEAL_DIFFICULTY_WINNABLE
+from utils.constants import PILE_STOCK, ACTION_DRAW, ACTION_RESHUFFLE_STOCK, ACTION_MOVE, DIFFICULTY_EASY, DIFFICULTY_HARD
 from utils.helpers import clear_console 
+from utils.telemetry import (
+    get_event_logger, describe_action, EVENT_GAME_START, EVENT_ACTION, EVENT_UNDO, EVENT_GAME_END
+)
+import argparse
+import json
+import os
+import random
 import time
 import sys
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Sequence, TextIO, Tuple
 
 current_game_settings: dict = {}
+# Wszystkie ustawienia wpływające na reguły (variant, przełożenie i tasowanie Waste), żeby partię dało się odtworzyć z logu.
+TELEMETRY_SETTING_KEYS = ("difficulty", "variant", "undo_enabled", "timer_enabled", "reshuffle_waste_on_empty_stock",
+                          "shuffle_waste_on_recycle", "deal_difficulty")
+GAME_COMMANDS = ('undo', 'u', 'draw', 'd', 'move', 'm', 'auto', 'a')
+# Solvery, boty i pule procesów są importowane przy pierwszym użyciu - sama gra ich nie ładuje.
+# Równoległy solver podpowiedzi (z pulą procesów żyjącą do końca programu) powstaje przy pierwszym `hint`.
+_hint_solver = None
 
-def run_game_loop(ui: ConsoleUI, settings: dict):
-    """Główna pętla gry. Obsługuje logikę rozgrywki i wejście użytkownika."""
+def all_tableau_cards_revealed(game_state: GameState) -> bool:
+    """Odpowiednik solver.endgame.is_endgame bez importu solvera (sprawdzany co turę)."""
+    return all(card.face_up for pile in game_state.tableau_piles for card in pile.cards)
+
+def describe_high_score(entry: high_score.HighScore) -> str:
+    """Wynik wobec minimum ruchów rozdania z pliku solver.optimal (bez rozwiązywania; pusty, gdy go nie policzono)."""
+    if entry.seed is None or entry.rules_key is None:
+        return ""
+    from solver.optimal import get_optimal_cache, format_optimal_gap
+    return format_optimal_gap(entry.moves, get_optimal_cache().get(entry.rules_key, entry.seed))
+
+def solve_for_hint(game_state: GameState, time_limit: float):
+    """
+    Werdykt solvera dla komendy hint. Gdy wszystkie karty w kolumnach są odkryte, najpierw solver
+    końcówek (najkrótsze dokończenie); poza tym na wielu rdzeniach przeszukiwanie rozkładane jest na pulę procesów.
+    """
+    global _hint_solver
+    from solver.cache import get_shared_cache, STATUS_SOLVABLE
+    from solver.endgame import get_endgame_solver, is_endgame
+    from solver.search import Solver
+    if is_endgame(game_state):
+        result = get_endgame_solver().solve(game_state)
+        if result.status == STATUS_SOLVABLE:
+            return result
+    cache = get_shared_cache()
+    if (os.cpu_count() or 1) > 1:
+        from solver.parallel import ParallelSolver
+        cache.flush()
+        if _hint_solver is None:
+            _hint_solver = ParallelSolver(cache_path=cache.path, node_limit=None)
+        _hint_solver.time_limit = time_limit
+        return _hint_solver.solve(game_state)
+    return Solver(cache, node_limit=None, time_limit=time_limit).solve(game_state)
+
+def shortest_endgame_finish(entry: GameSnapshot) -> Optional[int]:
+    """Długość najkrótszego dokończenia z pozycji wejścia w końcówkę (None, gdy solver końcówek go nie znalazł)."""
+    from solver.cache import STATUS_SOLVABLE
+    from solver.endgame import get_endgame_solver
+    verdict = get_endgame_solver().solve(GameState.from_snapshot(entry))
+    return verdict.depth if verdict.status == STATUS_SOLVABLE else None
+
+def start_new_game(difficulty: str, settings: dict, telemetry, seed: Optional[int] = None) -> Tuple[GameState, str]:
+    """
+    Tworzy nową grę i zgłasza jej początek do telemetrii. Zwraca (gra, id gry).
+    Bez podanego ziarna, przy ustawionej trudności rozdań, ziarno pochodzi z puli wygrywalnych
+    rozdań albo z indeksu trudności (jeśli zbudowano go dla tych reguł).
+    """
+    deal_difficulty = settings.get("deal_difficulty", DEAL_DIFFICULTY_ANY)
+    if seed is None and deal_difficulty == DEAL_DIFFICULTY_WINNABLE:
+        from solver.seed_pool import get_seed_pool
+        seed = get_seed_pool().take(difficulty, settings)
+        if seed is None:
+            print("Nie znaleziono na czas rozdania z pewną wygraną - gra na losowym rozdaniu.")
+    elif seed is None and deal_difficulty != DEAL_DIFFICULTY_ANY:
+        from solver.difficulty_index import pick_seed
+        seed = pick_seed(difficulty, settings, deal_difficulty)
+    if seed is None:
+        seed = random.getrandbits(32)
+    game_state = GameState(difficulty, settings, seed=seed)
+    game_id = uuid.uuid4().hex
+    telemetry.emit(EVENT_GAME_START, game_id=game_id, seed=game_state.seed, rules_key=game_state.rules_key(),
+                   settings={key: settings.get(key) for key in TELEMETRY_SETTING_KEYS})
+    return game_state, game_id
+
+def execute_game_command(game_state: GameState, command: str, args: List[str], settings: dict,
+                         applied_moves: Optional[List[Move]] = None) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Wykonuje komendę zmieniającą stan gry (undo, draw, move, auto) bez wyświetlania czegokolwiek.
+    Wspólna dla pętli gry i trybu skryptowego. Zwraca (komunikat o wykonaniu, komunikat o błędzie).
+    Ruchy wykonane przez `auto` są dopisywane do `applied_moves` (dla telemetrii).
+    """
+    if command in ['undo', 'u']:
+        if not settings.get("undo_enabled", True):
+            return None, "Cofanie ruchów jest wyłączone w ustawieniach."
+        if game_state.undo_last_move():
+            return "Ostatni ruch cofnięty.", None
+        return None, "Brak ruchów do cofnięcia lub osiągnięto limit."
+    if command in ['draw', 'd']:
+        if not game_state.deal_from_stock():
+            return None, "Brak kart do pociągnięcia. Talia i stos odkrytych są puste lub przetasowanie wyłączone."
+        message = "Pociągnięto karty / Przetasowano." if game_state.last_action_was_reshuffle else "Pociągnięto karty."
+        game_state.last_action_was_reshuffle = False
+        return message, None
+    if command in ['move', 'm']:
+        if len(args) < 2 or len(args) > 3:
+            return None, "Format komendy: m <źródło> <cel> [liczba_kart]"
+        num_cards_to_move = 1
+        if len(args) == 3:
+            try:
+                num_cards_to_move = int(args[2])
+            except ValueError:
+                return None, "Niepoprawna liczba kart."
+            if num_cards_to_move < 1:
+                return None, "Liczba kart musi być dodatnia."
+        pile_counts = (len(game_state.foundation_piles), len(game_state.tableau_piles))
+        source_pile_type, source_idx = ConsoleUI.parse_pile_identifier(args[0], *pile_counts)
+        dest_pile_type, dest_idx = ConsoleUI.parse_pile_identifier(args[1], *pile_counts)
+        if source_pile_type is None or dest_pile_type is None:
+            return None, "Niepoprawny identyfikator stosu."
+        if source_pile_type == PILE_STOCK:
+            return None, "Użyj 'draw'."
+        success, message = game_state.move_cards(source_pile_type, source_idx, dest_pile_type, dest_idx, num_cards_to_move)
+        return (None, None) if success else (None, message)
+    if command in ['auto', 'a']:
+        if game_state.check_win_condition():
+            return None, "Partia jest już wygrana."
+        if not all_tableau_cards_revealed(game_state):
+            return None, "Autouzupełnianie działa dopiero, gdy wszystkie karty w kolumnach są odkryte."
+        from solver.cache import STATUS_SOLVABLE
+        from solver.endgame import get_endgame_solver
+        result = get_endgame_solver().solve(game_state)
+        if result.status != STATUS_SOLVABLE:
+            return None, "Nie udało się wyznaczyć dokończenia partii. Spróbuj 'hint'."
+        for move in result.solution:
+            success, message = game_state.apply_move(move)
+            if not success:
+                return None, message
+            if applied_moves is not None:
+                applied_moves.append(move)
+        return f"Partia dokończona w {len(result.solution)} ruchach.", None
+    return None, f"Nieznana komenda: '{command}'. Wpisz 'help' lub 'h'."
+
+def run_game_loop(ui: ConsoleUI, settings: dict, seed: Optional[int] = None):
+    """Główna pętla gry. Obsługuje logikę rozgrywki i wejście użytkownika. `seed` ustala pierwsze rozdanie."""
     global current_game_settings
     difficulty = settings.get("difficulty", game_settings.DEFAULT_DIFFICULTY)
-    game_state = GameState(difficulty, settings) 
+    telemetry = get_event_logger(settings)
+    game_state, game_id = start_new_game(difficulty, settings, telemetry, seed)
     timer_enabled = settings.get("timer_enabled", True)
     start_time = time.time() if timer_enabled else 0
     game_state.elapsed_time = 0 
+    # (liczba ruchów, migawka) z wejścia w końcówkę - najkrótsze dokończenie z tej pozycji jest liczone
+    # dopiero po wygranej, więc pętla gry nie czeka na solver przy wejściu w końcówkę ani po undo.
+    endgame_entry: Optional[Tuple[int, GameSnapshot]] = None
     while True:
         if timer_enabled:
             game_state.elapsed_time = time.time() - start_time
+
+        if not all_tableau_cards_revealed(game_state):
+            endgame_entry = None
+        elif (endgame_entry is None or game_state.moves_count < endgame_entry[0]) \
+                and not game_state.check_win_condition():
+            endgame_entry = (game_state.moves_count, game_state.snapshot())
         
         ui.display_board(game_state) 
         if game_state.check_win_condition():
+            telemetry.emit(EVENT_GAME_END, game_id=game_id, result="win", difficulty=difficulty,
+                           moves=game_state.moves_count, elapsed=game_state.elapsed_time)
             ui.display_win_screen(game_state.moves_count)
             if timer_enabled:
                 final_time = game_state.elapsed_time
                 minutes = int(final_time // 60); seconds = int(final_time % 60)
                 print(f"Czas gry: {minutes:02d}:{seconds:02d}")
-            high_score.save_high_score(game_state.moves_count)
-            ui.display_high_scores(high_score.get_formatted_high_scores())
+            optimal_moves = shortest_endgame_finish(endgame_entry[1]) if endgame_entry is not None else None
+            if optimal_moves is not None:
+                print(f"Końcówka (od odkrycia wszystkich kart): {game_state.moves_count - endgame_entry[0]} ruchów, "
+                      f"najkrócej: {optimal_moves}.")
+            high_score.save_high_score(game_state.moves_count, game_state.seed, game_state.rules_key())
+            ui.display_high_scores(high_score.get_formatted_high_scores(describe_high_score))
             input("\nNaciśnij Enter, aby wrócić do menu głównego..."); clear_console()
             return
 
-        reshuffle_on = settings.get("reshuffle_waste_on_empty_stock", True)
-        can_still_draw_or_reshuffle = not game_state.stock_pile.is_empty() or \
-                                      (reshuffle_on and not game_state.waste_pile.is_empty())
+        can_still_draw_or_reshuffle = not game_state.stock_pile.is_empty() or game_state.can_recycle_stock()
 
         if not can_still_draw_or_reshuffle and not game_state.has_possible_moves():
+            telemetry.emit(EVENT_GAME_END, game_id=game_id, result="loss", difficulty=difficulty,
+                           moves=game_state.moves_count, elapsed=game_state.elapsed_time)
             ui.display_loss_screen()
             if timer_enabled:
                 final_time = game_state.elapsed_time
                 minutes = int(final_time // 60); seconds = int(final_time % 60)
                 print(f"Czas gry: {minutes:02d}:{seconds:02d}")
-            ui.display_high_scores(high_score.get_formatted_high_scores())
+            ui.display_high_scores(high_score.get_formatted_high_scores(describe_high_score))
             input("\nNaciśnij Enter, aby wrócić do menu głównego..."); clear_console()
             return
         
+        prompt_time = time.perf_counter()
         raw_input_str = ui.get_user_input(f"({difficulty.capitalize()}) Twój ruch (lub 'h' aby zobaczyć pomoc): ")
+        command_time = time.perf_counter()
         
         if raw_input_str == 'menu':
             clear_console()
             confirm_exit = ui.get_user_input("Czy na pewno chcesz wrócić do menu głównego i zakończyć obecną grę? (tak/nie): ")
-            if confirm_exit == 'tak': clear_console(); return 
+            if confirm_exit == 'tak':
+                telemetry.emit(EVENT_GAME_END, game_id=game_id, result="abandon", difficulty=difficulty,
+                               moves=game_state.moves_count, elapsed=game_state.elapsed_time)
+                clear_console(); return 
             else: 
                 clear_console() 
                 continue 
@@ -69,6 +232,8 @@ def run_game_loop(ui: ConsoleUI, settings: dict):
                 clear_console()
                 confirm_exit_program = ui.get_user_input("Czy na pewno chcesz zakończyć program? (tak/nie): ")
                 if confirm_exit_program == 'tak': 
+                    telemetry.emit(EVENT_GAME_END, game_id=game_id, result="abandon", difficulty=difficulty,
+                                   moves=game_state.moves_count, elapsed=game_state.elapsed_time)
                     clear_console()
                     ui.display_message("Dziękujemy za grę! Do zobaczenia!")
                     sys.exit()
@@ -80,7 +245,9 @@ def run_game_loop(ui: ConsoleUI, settings: dict):
                 clear_console()
                 confirm_new = ui.get_user_input("Czy na pewno chcesz zrestartować grę? (tak/nie): ")
                 if confirm_new == 'tak':
-                    game_state = GameState(difficulty, settings) 
+                    telemetry.emit(EVENT_GAME_END, game_id=game_id, result="restart", difficulty=difficulty,
+                                   moves=game_state.moves_count, elapsed=game_state.elapsed_time)
+                    game_state, game_id = start_new_game(difficulty, settings, telemetry)
                     start_time = time.time() if timer_enabled else 0 
                     game_state.elapsed_time = 0
                     action_performed_message = "Gra zrestartowana."
@@ -88,56 +255,68 @@ def run_game_loop(ui: ConsoleUI, settings: dict):
                     clear_console() 
             
             elif command in ['undo', 'u']:
+                undone_action = describe_action(game_state.move_history[-1] if game_state.move_history else None)
+                action_performed_message, error_message = execute_game_command(game_state, command, args, settings)
                 if settings.get("undo_enabled", True):
-                    if game_state.undo_last_move():
-                        action_performed_message = "Ostatni ruch cofnięty."
-                    else:
-                        error_message = "Brak ruchów do cofnięcia lub osiągnięto limit."
-                else:
-                    error_message = "Cofanie ruchów jest wyłączone w ustawieniach."
-            elif command in ['draw', 'd']:
-                drew_successfully = game_state.deal_from_stock() 
-                if drew_successfully:
-                    action_performed_message = "Pociągnięto karty / Przetasowano." if game_state.last_action_was_reshuffle else "Pociągnięto karty."
-                    game_state.last_action_was_reshuffle = False 
-                else: 
-                     error_message = "Brak kart do pociągnięcia. Talia i stos odkrytych są puste lub przetasowanie wyłączone."
-            elif command in ['move', 'm']:
-                if len(args) < 2 or len(args) > 3:
-                    error_message = "Format komendy: m <źródło> <cel> [liczba_kart]"
+                    telemetry.emit(EVENT_UNDO, game_id=game_id, undone=undone_action,
+                                   success=error_message is None, moves=game_state.moves_count,
+                                   think_time=command_time - prompt_time)
+            elif command in ['auto', 'a']:
+                applied_moves: List[Move] = []
+                action_performed_message, error_message = execute_game_command(game_state, command, args, settings,
+                                                                               applied_moves)
+                # Jedno zdarzenie na wykonany ruch (w zapisie komendy move), żeby partię dało się odtworzyć
+                # z logu; czas namysłu tylko przy pierwszym. Odrzucone `auto` to jedno nieudane zdarzenie.
+                think_time, duration = command_time - prompt_time, time.perf_counter() - command_time
+                first_move_number = game_state.moves_count - len(applied_moves)
+                for i, move in enumerate(applied_moves):
+                    telemetry.emit(EVENT_ACTION, game_id=game_id, action=ACTION_DRAW if move.is_draw else ACTION_MOVE,
+                                   command=str(move), auto=True,
+                                   success=True, error=None, moves=first_move_number + i + 1,
+                                   think_time=think_time if i == 0 else None, duration=duration if i == 0 else None)
+                if not applied_moves:
+                    telemetry.emit(EVENT_ACTION, game_id=game_id, action=ACTION_MOVE, command=raw_input_str, auto=True,
+                                   success=False, error=error_message, moves=game_state.moves_count,
+                                   think_time=think_time, duration=duration)
+            elif command in GAME_COMMANDS:
+                action_performed_message, error_message = execute_game_command(game_state, command, args, settings)
+            elif command == 'scroll':
+                if not args:
+                    ui.scroll_tableau(None)
                 else:
-                    source_str = args[0]; dest_str = args[1]; num_cards_to_move = 1
-                    should_process_move = True
-                    if len(args) == 3:
-                        try:
-                            num_cards_to_move = int(args[2])
-                            if num_cards_to_move < 1:
-                                error_message = "Liczba kart musi być dodatnia."; should_process_move = False
-                        except ValueError:
-                            error_message = "Niepoprawna liczba kart."; should_process_move = False
-                    if should_process_move:
-                        source_pile_type, source_idx = ui.parse_pile_identifier(source_str)
-                        dest_pile_type, dest_idx = ui.parse_pile_identifier(dest_str)
-                        if source_pile_type is None or dest_pile_type is None:
-                            error_message = f"Niepoprawny identyfikator stosu."
-                        elif source_pile_type == PILE_STOCK:
-                            error_message = "Użyj 'draw'."
-                        else:
-                            success, message = game_state.move_cards(
-                                source_pile_type, source_idx, dest_pile_type, dest_idx, num_cards_to_move
-                            )
-                            if success:
-                                action_performed_message = None
-                            else:
-                                error_message = message
+                    try:
+                        ui.scroll_tableau(int(args[0]))
+                    except ValueError:
+                        error_message = "Format komendy: scroll [n] (n > 0 - w stronę spodu kolumn, ujemne - z powrotem)."
+            elif command == 'hint':
+                clear_console()
+                # Połowa budżetu na solver (z cache'em wspólnym dla sesji i zadań wsadowych), połowa na Monte Carlo.
+                from bots.win_probability import estimate_win_probability, hidden_cards, DEFAULT_TIME_BUDGET
+                hint_budget = settings.get("hint_time_budget", DEFAULT_TIME_BUDGET) / 2
+                ui.display_solver_verdict(solve_for_hint(game_state, hint_budget), bool(hidden_cards(game_state)))
+                ui.display_message("Liczę szansę wygranej (bez podglądania zakrytych kart)...")
+                estimate = None
+                for estimate in estimate_win_probability(game_state, hint_budget):
+                    ui.display_hint_progress(estimate)
+                ui.display_hint(estimate)
+                input("Naciśnij Enter, aby kontynuować...")
+                clear_console()
+                continue
             elif command in ['help', 'h']:
                 clear_console()
                 print("\nKomendy dostępne w trakcie gry:")
                 print("  draw (d)                     : Pociągnij kartę(y) z Talii Rezerwowej.")
                 print("  move (m) <źródło> <cel> [n]  : Przenieś n kart (domyślnie 1).")
-                print("                                 <źródło>, <cel>: W (Waste), F1-F4, T1-T7.")
+                pile_ranges = f"F1-F{len(game_state.foundation_piles)}, T1-T{len(game_state.tableau_piles)}"
+                print(f"                                 <źródło>, <cel>: W (Waste), {pile_ranges}.")
                 print("                                 Przykład: m W T1, m T2 F1, m T3 T5 2")
                 print("  undo (u)                     : Cofnij ostatni ruch (jeśli włączone).")
+                print("  auto (a)                     : Dokończ partię najkrótszą sekwencją ruchów")
+                print("                                 (gdy wszystkie karty w kolumnach są odkryte).")
+                print("  hint                         : Pokaż werdykt solvera (znającego zakryte karty),")
+                print("                                 szansę wygranej i najlepszy ruch (bez zakrytych kart).")
+                print("  scroll [n]                   : Przewiń wysokie kolumny o n wierszy w stronę spodu")
+                print("                                 (ujemne - z powrotem, bez n - do wierzchu stosów).")
                 print("  new (n)                      : Rozpocznij nową grę z obecnymi ustawieniami.")
                 print("  menu                         : Wróć do menu głównego (kończy obecną grę).")
                 print("  quit (q)                     : Kończy działanie programu.")
@@ -148,6 +327,16 @@ def run_game_loop(ui: ConsoleUI, settings: dict):
             else:
                 error_message = f"Nieznana komenda: '{command}'. Wpisz 'help' lub 'h'."
 
+            if command in ['draw', 'd', 'move', 'm']:
+                if command in ['move', 'm']:
+                    action_type = ACTION_MOVE
+                else:
+                    action_type = ACTION_RESHUFFLE_STOCK if error_message is None and game_state.move_history \
+                        and game_state.move_history[-1]['type'] == ACTION_RESHUFFLE_STOCK else ACTION_DRAW
+                telemetry.emit(EVENT_ACTION, game_id=game_id, action=action_type, command=raw_input_str,
+                               success=error_message is None, error=error_message, moves=game_state.moves_count,
+                               think_time=command_time - prompt_time, duration=time.perf_counter() - command_time)
+
         # Czyszczenie i wyświetlanie komunikatów po przetworzeniu komendy
         clear_console() 
         if error_message:
@@ -164,7 +353,7 @@ def show_settings_menu(ui: ConsoleUI):
 
     while True:
         ui.display_settings_menu(temp_settings)
-        choice = ui.get_user_input("Wybierz opcję (1-6), 's' aby zapisać, 'x' aby anulować: ").strip().lower()
+        choice = ui.get_user_input("Wybierz opcję (1-10), 's' aby zapisać, 'x' aby anulować: ").strip().lower()
         setting_changed_message = None
 
         if choice == '1':
@@ -197,6 +386,26 @@ def show_settings_menu(ui: ConsoleUI):
             if new_val != temp_settings.get("reshuffle_waste_on_empty_stock"):
                 temp_settings["reshuffle_waste_on_empty_stock"] = new_val
                 setting_changed_message = f"Przetasowanie Waste: {game_settings.SETTING_OPTIONS_RESHUFFLE[new_val]}."
+        elif choice == '7':
+            new_val = ui.ask_boolean_setting("Zapisywać anonimowe zdarzenia z gry (telemetria)?", temp_settings.get("telemetry_enabled", False))
+            if new_val != temp_settings.get("telemetry_enabled"):
+                temp_settings["telemetry_enabled"] = new_val
+                setting_changed_message = f"Telemetria: {game_settings.SETTING_OPTIONS_BOOLEAN[new_val]}."
+        elif choice == '8':
+            new_val = ui.ask_variant_setting(temp_settings.get("variant", "classic"))
+            if new_val != temp_settings.get("variant"):
+                temp_settings["variant"] = new_val
+                setting_changed_message = f"Wariant gry: {game_settings.SETTING_OPTIONS_VARIANT[new_val]}."
+        elif choice == '9':
+            new_val = ui.ask_shuffle_recycle_setting(temp_settings.get("shuffle_waste_on_recycle", True))
+            if new_val != temp_settings.get("shuffle_waste_on_recycle"):
+                temp_settings["shuffle_waste_on_recycle"] = new_val
+                setting_changed_message = f"Tasowanie Waste: {game_settings.SETTING_OPTIONS_SHUFFLE_RECYCLE[new_val]}."
+        elif choice == '10':
+            new_val = ui.ask_deal_difficulty_setting(temp_settings.get("deal_difficulty", DEAL_DIFFICULTY_ANY))
+            if new_val != temp_settings.get("deal_difficulty"):
+                temp_settings["deal_difficulty"] = new_val
+                setting_changed_message = f"Trudność rozdań: {game_settings.SETTING_OPTIONS_DEAL_DIFFICULTY[new_val]}."
         elif choice == 's':
             clear_console()
             if game_settings.save_settings(temp_settings):
@@ -221,27 +430,33 @@ def show_settings_menu(ui: ConsoleUI):
         clear_console() 
         if setting_changed_message:
             ui.display_message(setting_changed_message + " (Niezapisane)")
-        elif choice in ['1','2','3','4','5','6']: 
+        elif choice in ['1','2','3','4','5','6','7','8','9','10']: 
             ui.display_message("Brak zmian w tym ustawieniu.")
         input("Naciśnij Enter..."); 
 
-def main_menu_loop():
+def main_menu_loop(seed: Optional[int] = None):
+    """Menu główne. `seed` (np. z --seed) ustala rozdanie każdej gry rozpoczętej z menu."""
     global current_game_settings
     current_game_settings = game_settings.load_settings()
     ui = ConsoleUI()
     ui.update_settings_for_ui(current_game_settings.copy())
 
     while True:
+        if current_game_settings.get("deal_difficulty") == DEAL_DIFFICULTY_WINNABLE:
+            # Pula dopełnia się w tle, gdy gracz jest w menu i w trakcie gry.
+            from solver.seed_pool import get_seed_pool
+            get_seed_pool().watch(current_game_settings.get("difficulty", game_settings.DEFAULT_DIFFICULTY),
+                                  current_game_settings)
         ui.display_main_menu() 
         choice = ui.get_user_input("Wybierz opcję: ").strip()
 
         if choice == '1':
-            run_game_loop(ui, current_game_settings)
+            run_game_loop(ui, current_game_settings, seed)
         elif choice == '2':
             show_settings_menu(ui)
         elif choice == '3': 
             clear_console()
-            ui.display_high_scores(high_score.get_formatted_high_scores())
+            ui.display_high_scores(high_score.get_formatted_high_scores(describe_high_score))
             input("\nNaciśnij Enter, aby wrócić do menu..."); clear_console()
         elif choice == '4': 
             clear_console()
@@ -257,6 +472,86 @@ def main_menu_loop():
             input("Naciśnij Enter, aby kontynuować...");
            
 
+def game_state_summary(game_state: GameState) -> Dict[str, Any]:
+    """Stan gry w postaci do zapisu jako JSON (zakryte karty tableau tylko jako liczba, plus klucz pozycji)."""
+    return {
+        "moves": game_state.moves_count,
+        "won": game_state.check_win_condition(),
+        "stock": len(game_state.stock_pile),
+        "waste": [str(c) for c in game_state.waste_pile.cards],
+        "foundations": [[str(c) for c in pile.cards] for pile in game_state.foundation_piles],
+        "tableau": [{"face_down": sum(1 for c in pile.cards if not c.face_up),
+                     "face_up": [str(c) for c in pile.cards if c.face_up]} for pile in game_state.tableau_piles],
+        "position": game_state.position_key().hex(),
+    }
+
+def run_script(lines: Iterable[str], game_state: GameState, settings: dict, out: TextIO) -> Dict[str, Any]:
+    """
+    Tryb skryptowy: wykonuje komendy (w gramatyce konsoli, kilka w linii rozdzielonych ';',
+    linie od '#' to komentarze) bez rysowania planszy i pytań. Dla każdej komendy zapisuje do `out`
+    jedną linię JSON z wynikiem, na końcu linię ze stanem gry, którą też zwraca.
+    """
+    quit_requested = False
+    for line_number, line in enumerate(lines, 1):
+        if quit_requested:
+            break
+        if line.lstrip().startswith('#'):
+            continue
+        for raw_command in line.split(';'):
+            raw_command = raw_command.strip()
+            parsed_command_tuple = ConsoleUI.parse_command(raw_command.lower())
+            if not parsed_command_tuple:
+                continue
+            command, args = parsed_command_tuple
+            if command in ['quit', 'q']:
+                quit_requested = True
+                break
+            if command in GAME_COMMANDS:
+                message, error_message = execute_game_command(game_state, command, args, settings)
+            else:
+                message, error_message = None, f"Komenda '{command}' jest niedostępna w trybie skryptowym."
+            out.write(json.dumps({"line": line_number, "command": raw_command, "ok": error_message is None,
+                                  "message": message, "error": error_message, "moves": game_state.moves_count,
+                                  "won": game_state.check_win_condition()}, ensure_ascii=False) + "\n")
+    final_state = {"final": True, "seed": game_state.seed, **game_state_summary(game_state)}
+    out.write(json.dumps(final_state, ensure_ascii=False) + "\n")
+    return final_state
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Pasjans (Klondike) w konsoli.")
+    parser.add_argument("--script", nargs="?", const="-", metavar="PLIK",
+                        help="Tryb skryptowy: komendy z pliku (lub ze standardowego wejścia), wyniki jako JSON Lines.")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Ziarno rozdania (w trybie skryptowym domyślnie 0; w grze - rozdanie każdej nowej gry z menu).")
+    parser.add_argument("--deal", type=int, default=None, metavar="NUMER",
+                        help="Numer rozdania zgodny z numeracją Microsoft (tryb skryptowy, pierwszeństwo przed --seed).")
+    parser.add_argument("--difficulty", choices=[DIFFICULTY_EASY, DIFFICULTY_HARD], default=DIFFICULTY_EASY)
+    parser.add_argument("--variant", choices=[VARIANT_CLASSIC, *VARIANTS], default=VARIANT_CLASSIC,
+                        help="Wariant gry w trybie skryptowym (domyślnie wg poziomu trudności).")
+    args = parser.parse_args(argv)
+    if args.script is None:
+        if args.deal is not None:
+            parser.error("--deal działa tylko w trybie skryptowym (razem z --script).")
+        main_menu_loop(args.seed)
+        return
+
+    settings = game_settings.get_default_settings()
+    settings["difficulty"] = args.difficulty
+    settings["variant"] = args.variant
+    if args.deal is not None:
+        try:
+            game_state = GameState(args.difficulty, settings, seed=args.seed, deal_number=args.deal)
+        except ValueError as e:
+            parser.error(f"--deal: {e}")
+    else:
+        game_state = GameState(args.difficulty, settings, seed=args.seed if args.seed is not None else 0)
+    if args.script == "-":
+        run_script(sys.stdin, game_state, settings, sys.stdout)
+    else:
+        with open(args.script, encoding="utf-8") as script_file:
+            run_script(script_file, game_state, settings, sys.stdout)
+
+
 if __name__ == "__main__":
-    main_menu_loop()
+    main()
     
\ No newline at end of file
@@ -0,0 +1,145 @@
+"""
+Wspólny, trwały cache wyników solvera.
+
+Wyniki są kluczowane zestawem reguł (GameState.rules_key) i kanonicznym zapisem pozycji
+(GameState.position_key), więc przechodzą między sesjami gry, komendą `hint`, botami i zadaniami
+wsadowymi. Baza SQLite działa w trybie WAL - wiele procesów może czytać równocześnie, a zapisy
+są zbierane w paczki. Po przekroczeniu limitu wpisów usuwane są najdawniej używane.
+"""
+import atexit
+import os
+import sqlite3
+import time
+from typing import Dict, NamedTuple, Optional, Tuple
+from game_logic.move import Move
+
+DEFAULT_CACHE_PATH = "solve_cache.sqlite3"
+DEFAULT_MAX_ENTRIES = 2_000_000
+DEFAULT_BATCH_SIZE = 512
+TRIM_RATIO = 0.9
+
+STATUS_SOLVABLE = "solvable"
+STATUS_UNSOLVABLE = "unsolvable"
+# Przeszukiwanie z odcinaniem ruchów zdominowanych (solver.search) skończyło się bez wygranej.
+# To nie dowód przegranej - odcięte ruchy mogły jej wymagać - więc werdykt nie jest STATUS_UNSOLVABLE.
+# Kolejne przeszukiwania z tymi samymi regułami odcinania mogą jednak pomijać takie pozycje.
+STATUS_EXHAUSTED = "exhausted"
+STATUS_UNKNOWN = "unknown"
+
+
+_shared_cache: Optional['SolveCache'] = None
+
+
+class CacheEntry(NamedTuple):
+    """Zapamiętany wynik: status, najlepszy ruch i liczba ruchów do wygranej (dla pozycji wygrywalnych)."""
+    status: str
+    best_move: Optional[Move] = None
+    depth: Optional[int] = None
+
+
+class SolveCache:
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 batch_size: int = DEFAULT_BATCH_SIZE):
+        self.path = path
+        self.max_entries = max_entries
+        self.batch_size = batch_size
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, timeout=30.0)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS positions ("
+                " rules TEXT NOT NULL, position BLOB NOT NULL, status TEXT NOT NULL,"
+                " best_move TEXT, depth INTEGER, last_used REAL NOT NULL,"
+                " PRIMARY KEY (rules, position)) WITHOUT ROWID")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS positions_last_used ON positions (last_used)")
+        # Liczba wpisów szacowana od góry (INSERT OR REPLACE może nadpisać istniejący), by nie liczyć tabeli przy każdej paczce.
+        self._approx_entries = self._connection.execute("SELECT COUNT(*) FROM positions").fetchone()[0]
+        self._pending: Dict[Tuple[str, bytes], CacheEntry] = {}
+        self._touched: Dict[Tuple[str, bytes], float] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, rules: str, position: bytes) -> Optional[CacheEntry]:
+        key = (rules, position)
+        entry = self._pending.get(key)
+        if entry is None:
+            row = self._connection.execute(
+                "SELECT status, best_move, depth FROM positions WHERE rules = ? AND position = ?", key).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            status, best_move, depth = row
+            if status == STATUS_UNSOLVABLE:
+                # Starsze wersje zapisywały tak wyczerpane przeszukiwania z odcinaniem ruchów.
+                status = STATUS_EXHAUSTED
+            entry = CacheEntry(status, Move.parse(best_move) if best_move else None, depth)
+            self._touched[key] = time.time()
+            if len(self._touched) >= self.batch_size:
+                self.flush()
+        self.hits += 1
+        return entry
+
+    def put(self, rules: str, position: bytes, entry: CacheEntry) -> None:
+        """Dodaje wynik do paczki zapisu. Wyniki STATUS_UNKNOWN (przerwane przeszukiwanie) nie są zapisywane."""
+        if entry.status == STATUS_UNKNOWN:
+            return
+        self._pending[(rules, position)] = entry
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Zapisuje zebrane wyniki i znaczniki użycia w jednej transakcji, po czym pilnuje limitu wpisów."""
+        if not self._pending and not self._touched:
+            return
+        now = time.time()
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO positions (rules, position, status, best_move, depth, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                [(rules, position, entry.status, str(entry.best_move) if entry.best_move else None, entry.depth, now)
+                 for (rules, position), entry in self._pending.items()])
+            self._connection.executemany(
+                "UPDATE positions SET last_used = ? WHERE rules = ? AND position = ?",
+                [(used, rules, position) for (rules, position), used in self._touched.items()])
+            self._approx_entries += len(self._pending)
+            if self._approx_entries > self.max_entries:
+                self._trim()
+        self._pending.clear()
+        self._touched.clear()
+
+    def _trim(self) -> None:
+        count = self._connection.execute("SELECT COUNT(*) FROM positions").fetchone()[0]
+        if count > self.max_entries:
+            target = int(self.max_entries * TRIM_RATIO)
+            self._connection.execute(
+                "DELETE FROM positions WHERE (rules, position) IN"
+                " (SELECT rules, position FROM positions ORDER BY last_used LIMIT ?)", (count - target,))
+            count = target
+        self._approx_entries = count
+
+    def __len__(self) -> int:
+        self.flush()
+        return self._connection.execute("SELECT COUNT(*) FROM positions").fetchone()[0]
+
+    def close(self) -> None:
+        self.flush()
+        self._connection.close()
+
+    def __enter__(self) -> 'SolveCache':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def get_shared_cache(path: str = DEFAULT_CACHE_PATH) -> 'SolveCache':
+    """Cache wspólny dla całego procesu (otwierany przy pierwszym użyciu, zamykany przy wyjściu z programu)."""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = SolveCache(path)
+        atexit.register(_shared_cache.close)
+    return _shared_cache
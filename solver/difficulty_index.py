@@ -0,0 +1,264 @@
+"""
+Indeks trudności rozdań: "daj wygrywalne rozdanie o trudności X" bez rozwiązywania przy starcie gry.
+
+Indeksowanie (offline, na puli procesów) rozwiązuje kolejne ziarna solverem i dla każdego
+wygrywalnego rozdania zapisuje wysiłek solvera: liczbę węzłów, długość rozwiązania i liczbę
+przełożeń Waste do talii na tej drodze. Pierwsza wygrana znaleziona w DFS bywa dużo dłuższa
+od najkrótszej, więc jej końcówka (od odkrycia wszystkich kart) jest skracana solverem końcówek,
+jak górne ograniczenie w solver.optimal. Z nich liczony jest wynik trudności, a rekordy
+trafiają posortowane do zwartego pliku binarnego - osobnego dla każdego zestawu reguł
+(GameState.rules_key). Plik ma 32-bajtowy nagłówek, klucz reguł i 16-bajtowe rekordy.
+Czytnik mapuje plik do pamięci i wybiera ziarno wyszukiwaniem binarnym, bez wczytywania całości.
+
+Uruchomienie:
+    python -m solver.difficulty_index build --seeds 0-9999 --difficulty easy --workers 4
+    python -m solver.difficulty_index pick --tier hard --difficulty easy
+"""
+import argparse
+import math
+import mmap
+import os
+import random
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+from game_logic.game_state import GameState, make_rules_key
+from game_logic.variants import VARIANTS, VARIANT_CLASSIC, resolve_variant
+from utils.constants import DIFFICULTY_EASY, DIFFICULTY_HARD
+from utils.game_settings import get_default_settings as get_default_game_settings
+from .cache import STATUS_SOLVABLE
+from .endgame import EndgameSolver, shortened_solution
+from .search import DEFAULT_NODE_LIMIT, Solver, parse_seed_range
+
+INDEX_MAGIC = b"PSJDIFIX"
+INDEX_VERSION = 1
+HEADER_FORMAT = "<8sHHIQQ"  # magic, wersja, rozmiar rekordu, długość klucza reguł, liczba rekordów, zarezerwowane
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+RECORD_FORMAT = "<IIIHH"  # wynik trudności, ziarno, węzły, długość rozwiązania, przełożenia Waste
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+DEFAULT_INDEX_DIR = "deal_index"
+DEFAULT_CHUNK_SIZE = 16
+
+DEAL_DIFFICULTY_EASY = "easy"
+DEAL_DIFFICULTY_MEDIUM = "medium"
+DEAL_DIFFICULTY_HARD = "hard"
+# Przedziały percentyli wyniku trudności dla poziomów wybieranych w menu.
+TIER_PERCENTILES: Dict[str, Tuple[float, float]] = {
+    DEAL_DIFFICULTY_EASY: (0.0, 1 / 3),
+    DEAL_DIFFICULTY_MEDIUM: (1 / 3, 2 / 3),
+    DEAL_DIFFICULTY_HARD: (2 / 3, 1.0),
+}
+
+_worker_solver: Optional[Solver] = None
+_worker_endgame: Optional[EndgameSolver] = None
+
+
+class IndexRecord(NamedTuple):
+    score: int
+    seed: int
+    nodes: int
+    solution_length: int
+    recycles: int
+
+
+def effort_score(nodes: int, solution_length: int, recycles: int) -> int:
+    """Wynik trudności: rząd wielkości wysiłku solvera, długość rozwiązania i wymuszone przełożenia Waste."""
+    return round(1000 * math.log2(1 + nodes)) + 10 * solution_length + 500 * recycles
+
+
+def default_index_path(rules_key: str, directory: str = DEFAULT_INDEX_DIR) -> str:
+    """Ścieżka pliku indeksu dla zestawu reguł, np. deal_index/klondike-1_easy_reshuffle-1_shuffle-1.idx."""
+    return os.path.join(directory, rules_key.replace("/", "_").replace("=", "-") + ".idx")
+
+
+def _init_worker(node_limit: int) -> None:
+    # Bez cache'u: wynik trafienia w cache nie zawiera liczby węzłów ani całego rozwiązania.
+    global _worker_solver, _worker_endgame
+    _worker_solver = Solver(node_limit=node_limit)
+    _worker_endgame = EndgameSolver()
+
+
+
+def _index_chunk(task: Tuple[Sequence[int], str, Dict[str, Any]]) -> List[IndexRecord]:
+    """Rozwiązuje paczkę ziaren i zwraca rekordy dla rozdań, których wygraną udało się znaleźć."""
+    seeds, difficulty, settings = task
+    records = []
+    for seed in seeds:
+        game_state = GameState(difficulty, settings, seed=seed)
+        result = _worker_solver.solve(game_state)
+        if result.status != STATUS_SOLVABLE:
+            continue
+        solution = shortened_solution(game_state, result.solution, _worker_endgame)
+        recycles = 0
+        for move in solution:
+            if move.is_draw and game_state.stock_pile.is_empty():
+                recycles += 1
+            game_state.apply(move)
+        records.append(IndexRecord(effort_score(result.nodes, len(solution), recycles), seed,
+                                   result.nodes, min(len(solution), 0xFFFF), min(recycles, 0xFFFF)))
+    return records
+
+
+def build_index(seeds: Sequence[int], difficulty: str = DIFFICULTY_EASY, settings: Optional[Dict[str, Any]] = None,
+                node_limit: int = DEFAULT_NODE_LIMIT, workers: Optional[int] = None,
+                chunk_size: int = DEFAULT_CHUNK_SIZE) -> Tuple[str, List[IndexRecord]]:
+    """Indeksuje ziarna na puli procesów. Zwraca (klucz reguł, rekordy posortowane po wyniku trudności)."""
+    settings = settings if settings is not None else get_default_game_settings()
+    rules_key = make_rules_key(resolve_variant(difficulty, settings.get("variant")).name, difficulty, settings)
+    tasks = [(seeds[i:i + chunk_size], difficulty, settings) for i in range(0, len(seeds), chunk_size)]
+    records: List[IndexRecord] = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(node_limit,)) as executor:
+        for chunk_records in executor.map(_index_chunk, tasks):
+            records.extend(chunk_records)
+    records.sort()
+    return rules_key, records
+
+
+def write_index(path: str, rules_key: str, records: Sequence[IndexRecord]) -> None:
+    """Zapisuje posortowane rekordy (plik tymczasowy podmieniany na końcu, więc czytelnicy nie widzą połowy)."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    key_bytes = rules_key.encode("utf-8")
+    temporary_path = path + ".tmp"
+    with open(temporary_path, "wb") as f:
+        f.write(struct.pack(HEADER_FORMAT, INDEX_MAGIC, INDEX_VERSION, RECORD_SIZE, len(key_bytes), len(records), 0))
+        f.write(key_bytes)
+        for record in records:
+            f.write(struct.pack(RECORD_FORMAT, *record))
+    os.replace(temporary_path, path)
+
+
+class DifficultyIndex:
+    """Czytnik indeksu trudności mapowany do pamięci; wyszukiwanie po wyniku trudności w O(log n)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Plik indeksu '{path}' jest pusty.")
+        magic, version, record_size, key_length, self.count, _ = struct.unpack_from(HEADER_FORMAT, self._mmap, 0)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION or record_size != RECORD_SIZE:
+            self.close()
+            raise ValueError(f"Plik '{path}' nie jest indeksem trudności w wersji {INDEX_VERSION}.")
+        self.rules_key = self._mmap[HEADER_SIZE:HEADER_SIZE + key_length].decode("utf-8")
+        self._records_offset = HEADER_SIZE + key_length
+        if len(self._mmap) < self._records_offset + self.count * RECORD_SIZE:
+            self.close()
+            raise ValueError(f"Plik indeksu '{path}' jest niekompletny.")
+
+    def __len__(self) -> int:
+        return self.count
+
+    def record(self, index: int) -> IndexRecord:
+        if not 0 <= index < self.count:
+            raise IndexError(f"Brak rekordu {index} w indeksie ({self.count} rekordów).")
+        return IndexRecord(*struct.unpack_from(RECORD_FORMAT, self._mmap, self._records_offset + index * RECORD_SIZE))
+
+    def lower_bound(self, score: int) -> int:
+        """Pierwsza pozycja rekordu o wyniku trudności >= `score` (wyszukiwanie binarne po pliku)."""
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            middle_score, = struct.unpack_from("<I", self._mmap, self._records_offset + middle * RECORD_SIZE)
+            if middle_score < score:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def pick(self, tier: Optional[str] = None, min_score: Optional[int] = None, max_score: Optional[int] = None,
+             rng: Optional[random.Random] = None) -> Optional[IndexRecord]:
+        """
+        Losuje rekord z poziomu `tier` (przedział percentyli z TIER_PERCENTILES) albo z przedziału
+        wyników [min_score, max_score). Zwraca None, gdy w zakresie nie ma żadnego rozdania.
+        """
+        start, end = 0, self.count
+        if tier is not None:
+            low_percentile, high_percentile = TIER_PERCENTILES[tier]
+            start, end = int(self.count * low_percentile), int(self.count * high_percentile)
+        if min_score is not None:
+            start = max(start, self.lower_bound(min_score))
+        if max_score is not None:
+            end = min(end, self.lower_bound(max_score))
+        if start >= end:
+            return None
+        return self.record((rng or random).randrange(start, end))
+
+    def close(self) -> None:
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self) -> "DifficultyIndex":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def pick_seed(difficulty: str, settings: Dict[str, Any], tier: str, directory: str = DEFAULT_INDEX_DIR,
+              rng: Optional[random.Random] = None) -> Optional[int]:
+    """
+    Ziarno wygrywalnego rozdania z poziomu `tier` dla reguł wynikających z ustawień
+    albo None, gdy dla tych reguł nie zbudowano indeksu (wtedy gra losuje rozdanie jak zwykle).
+    """
+    rules_key = make_rules_key(resolve_variant(difficulty, settings.get("variant")).name, difficulty, settings)
+    path = default_index_path(rules_key, directory)
+    if not os.path.exists(path):
+        return None
+    with DifficultyIndex(path) as index:
+        record = index.pick(tier, rng=rng)
+    return record.seed if record is not None else None
+
+
+def _settings_from_args(args: argparse.Namespace) -> Dict[str, Any]:
+    settings = get_default_game_settings()
+    settings["difficulty"] = args.difficulty
+    settings["variant"] = args.variant
+    settings["reshuffle_waste_on_empty_stock"] = not args.no_reshuffle
+    settings["shuffle_waste_on_recycle"] = not args.no_shuffle
+    return settings
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Indeks trudności wygrywalnych rozdań.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="Rozwiąż ziarna i zapisz posortowany indeks.")
+    build_parser.add_argument("--seeds", default="0-999", help="Ziarna rozdań, np. 0-9999.")
+    build_parser.add_argument("--nodes", type=int, default=DEFAULT_NODE_LIMIT, help="Limit węzłów na rozdanie.")
+    build_parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Liczba procesów.")
+    pick_parser = subparsers.add_parser("pick", help="Wylosuj ziarno z indeksu.")
+    pick_parser.add_argument("--tier", choices=list(TIER_PERCENTILES), default=DEAL_DIFFICULTY_MEDIUM)
+    for subparser in (build_parser, pick_parser):
+        subparser.add_argument("--difficulty", choices=[DIFFICULTY_EASY, DIFFICULTY_HARD], default=DIFFICULTY_EASY)
+        subparser.add_argument("--variant", choices=[VARIANT_CLASSIC, *VARIANTS], default=VARIANT_CLASSIC)
+        subparser.add_argument("--no-reshuffle", action="store_true", help="Bez przekładania Waste do talii.")
+        subparser.add_argument("--no-shuffle", action="store_true", help="Przełożone Waste bez tasowania.")
+        subparser.add_argument("--dir", default=DEFAULT_INDEX_DIR, help="Katalog plików indeksu.")
+    args = parser.parse_args(argv)
+    settings = _settings_from_args(args)
+
+    if args.command == "build":
+        seeds = parse_seed_range(args.seeds)
+        start_time = time.perf_counter()
+        rules_key, records = build_index(seeds, args.difficulty, settings, args.nodes, args.workers)
+        path = default_index_path(rules_key, args.dir)
+        write_index(path, rules_key, records)
+        print(f"Reguły {rules_key}: {len(records)} z {len(seeds)} rozdań wygrywalnych, "
+              f"zapisano '{path}' w {time.perf_counter() - start_time:.1f} s.")
+        for tier, (low, high) in TIER_PERCENTILES.items():
+            if records:
+                first, last = records[int(len(records) * low)], records[min(len(records) - 1, int(len(records) * high))]
+                print(f"  {tier:<7} wynik {first.score:6d} - {last.score:6d}")
+    else:
+        seed = pick_seed(args.difficulty, settings, args.tier, args.dir)
+        print(seed if seed is not None else "Brak indeksu lub rozdań dla tych reguł.")
+
+
+if __name__ == "__main__":
+    main()
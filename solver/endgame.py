@@ -0,0 +1,417 @@
+"""
+Solver końcówek: najkrótsze dokończenie partii, gdy wszystkie karty w kolumnach są odkryte.
+
+Od tej chwili Klondike jest deterministyczną łamigłówką - ogólne przeszukiwanie w głąb
+(solver.search) znajduje jakąkolwiek wygraną i przechodzi przez silnik gry ruch po ruchu.
+Tu przeszukiwanie A* działa na zwartym, niezmiennym zapisie pozycji (krotki kodów kart,
+współdzielone między pozycjami), a tasowanie przy przekładaniu Waste odtwarza generatorem
+w stanie z gry - kolejne przejścia talii są więc znane dokładnie. Dolne ograniczenie to
+liczba kart poza fundamentami, dobrania potrzebne do opróżnienia talii i stosy, z których
+jakaś karta musi zejść inaczej niż na fundament; żaden ruch nie zmniejsza go o więcej niż 1,
+więc pierwsza zdjęta z kolejki wygrana jest najkrótsza.
+
+Odcinanie ruchów zdominowanych: bezpieczny ruch na fundament (wszystkie karty, które można
+na nim położyć, są już na fundamentach) jest jedynym kandydatem, dobierania występują tylko
+jako "dobierz k razy i zagraj" (najwyżej do końca następnego przejścia), karty nie wracają
+z fundamentów, a ruchy na drugą pustą kolumnę lub pusty fundament i przeniesienie całej kolumny
+na pustą są pomijane. Wynik jest najkrótszy wśród sekwencji spełniających te reguły. Przed
+zwróceniem sekwencja jest odtwarzana na kopii gry, a dokończenie zapamiętywane dla każdej
+pozycji na ścieżce - kolejne zapytania w trakcie końcówki są natychmiastowe.
+
+Uruchomienie (ogólny solver doprowadza rozdania do końcówki, która jest potem skracana):
+    python -m solver.endgame --seeds 0-49 --difficulty easy
+"""
+import argparse
+import heapq
+import itertools
+import random
+import time
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+from game_logic.game_state import GameState
+from game_logic.move import Move, DRAW_MOVE
+from utils.constants import (
+    DIFFICULTY_EASY, DIFFICULTY_HARD, PILE_FOUNDATION, PILE_TABLEAU, PILE_WASTE, CARDS_PER_DECK, RANKS_PER_SUIT
+)
+from utils.game_settings import get_default_settings as get_default_game_settings
+from .cache import STATUS_SOLVABLE, STATUS_UNKNOWN
+from .search import DEFAULT_NODE_LIMIT, Solver, SolveResult, parse_seed_range, _is_on_foundations
+
+DEFAULT_ENDGAME_NODE_LIMIT = 10_000
+DEFAULT_ENDGAME_TIME_LIMIT = 0.5
+DEFAULT_MEMO_SIZE = 4096
+
+_shared_solver: Optional['EndgameSolver'] = None
+
+
+def is_endgame(game_state: GameState) -> bool:
+    """Czy pozycja kwalifikuje się do solvera końcówek (żadnej zakrytej karty w kolumnach)."""
+    return all(card.face_up for pile in game_state.tableau_piles for card in pile.cards)
+
+
+class _Position(NamedTuple):
+    """
+    Pozycja w zapisie A* (z pełną wiedzą o kartach): kolumny jako kody od spodu, `hidden` - liczba
+    zakrytych kart na spodzie każdej kolumny (w końcówce same zera). Bufor talii jak Talon.ring
+    (Waste to `talon[:cursor]`).
+    """
+    tableau: Tuple[Tuple[int, ...], ...]
+    hidden: Tuple[int, ...]
+    foundations: Tuple[int, ...]
+    talon: Tuple[int, ...]
+    cursor: int
+    recycles: int
+    shuffles: Tuple[int, ...]
+
+
+class _AStarResult(NamedTuple):
+    goal: Optional[_Position]
+    parents: Dict[_Position, Tuple[Optional[_Position], Tuple[Move, ...]]]
+    nodes: int
+    bound: int  # bez wygranej: udowodnione dolne ograniczenie długości rozwiązania
+
+
+def _root_position(game_state: GameState) -> _Position:
+    return _Position(
+        tuple(tuple(card.code for card in pile.cards) for pile in game_state.tableau_piles),
+        tuple(sum(1 for card in pile.cards if not card.face_up) for pile in game_state.tableau_piles),
+        tuple(pile.cards[-1].code if pile.cards else -1 for pile in game_state.foundation_piles),
+        tuple(card.code for card in game_state.talon.ring), game_state.talon.cursor,
+        game_state.stock_recycles, ())
+
+
+class _Search:
+    """Jedno wywołanie A*: reguły rozdania, stany generatora po kolejnych tasowaniach i ruchy z pozycji."""
+    def __init__(self, game_state: GameState, dependents: List[List[int]]):
+        settings = game_state.current_settings
+        self.rules = game_state.rules
+        self.dependents = dependents
+        self.recycle_allowed = settings.get("reshuffle_waste_on_empty_stock", True)
+        self.shuffled = self.recycle_allowed and settings.get("shuffle_waste_on_recycle", True)
+        # Stan generatora zależy tylko od stanu w grze i długości kolejno tasowanych przejść.
+        self.rng_states: Dict[Tuple[int, ...], tuple] = {(): game_state.rng.getstate()} if self.shuffled else {}
+
+    def lower_bound(self, position: _Position) -> int:
+        """
+        Karty poza fundamentami, dobrania do opróżnienia talii i ruchy kart, które muszą zejść ze stosu
+        inaczej niż na fundament, bo pod nimi leżą wszystkie brakujące egzemplarze niższej karty tego
+        samego koloru: jeden ruch na odkrytą część kolumny (i na Waste), w której jest taka karta, oraz
+        po jednym na każdą taką zakrytą kartę - odkrywa się ona dopiero po zejściu wszystkiego, co na
+        niej leży, więc schodzi osobnym ruchem. Jeden ruch zdejmuje karty tylko z jednego stosu.
+        """
+        num_decks = self.rules.num_decks
+        stock = len(position.talon) - position.cursor
+        bound = sum(map(len, position.tableau)) + len(position.talon) + -(-stock // self.rules.draw_count)
+        placed = [-1] * 4
+        if num_decks > 1:
+            for top in position.foundations:
+                if top >= 0:
+                    suit, rank = divmod(top, RANKS_PER_SUIT)
+                    placed[suit] = max(placed[suit], rank)
+        for column, hidden in zip(position.tableau + (position.talon[:position.cursor],), position.hidden + (0,)):
+            lowest = [RANKS_PER_SUIT] * 4
+            seen: Dict[int, int] = {}
+            for index, code in enumerate(column):
+                suit, rank = divmod(code, RANKS_PER_SUIT)
+                if rank > lowest[suit]:
+                    bound += 1
+                    if index >= hidden:
+                        break
+                    continue
+                if num_decks == 1:
+                    lowest[suit] = rank
+                    continue
+                seen[code] = count = seen.get(code, 0) + 1
+                if count == num_decks and rank > placed[suit]:
+                    lowest[suit] = rank
+        return bound
+
+    def draw(self, position: _Position) -> Optional[_Position]:
+        """Jedno dobranie (albo przełożenie pustej talii), jak GameState.deal_from_stock()."""
+        talon = position.talon
+        if position.cursor < len(talon):
+            return position._replace(cursor=min(position.cursor + self.rules.draw_count, len(talon)))
+        max_passes = self.rules.max_stock_passes
+        if not talon or not self.recycle_allowed or (max_passes is not None and position.recycles >= max_passes - 1):
+            return None
+        shuffles = position.shuffles
+        if self.shuffled:
+            rng = random.Random()
+            rng.setstate(self.rng_states[shuffles])
+            order = list(talon)
+            rng.shuffle(order)
+            talon = tuple(order)
+            shuffles = shuffles + (len(order),)
+            self.rng_states.setdefault(shuffles, rng.getstate())
+        return position._replace(talon=talon, cursor=0, recycles=position.recycles + 1, shuffles=shuffles)
+
+    def steps(self, position: _Position) -> List[Tuple[Tuple[Move, ...], _Position]]:
+        """Kroki po odcięciu ruchów zdominowanych (patrz opis modułu) jako pary (ruchy, pozycja po nich)."""
+        rules = self.rules
+        tableau, foundations = position.tableau, position.foundations
+        empty_column = next((i for i, column in enumerate(tableau) if not column), None)
+        empty_foundation = next((i for i, top in enumerate(foundations) if top < 0), None)
+        heights: Dict[int, List[int]] = {}
+        for top in foundations:
+            if top >= 0:
+                heights.setdefault(top // RANKS_PER_SUIT, []).append(top % RANKS_PER_SUIT + 1)
+
+        def foundation_for(code: int) -> Optional[int]:
+            if rules.foundation_base[code]:
+                return empty_foundation
+            return next((i for i, top in enumerate(foundations) if top >= 0 and rules.foundation_next[top] == code), None)
+
+        def is_safe(code: int) -> bool:
+            return all(_is_on_foundations(card, heights, rules.num_decks) for card in self.dependents[code])
+
+        def to_foundation(state: _Position, f_idx: int, code: int) -> _Position:
+            return state._replace(foundations=foundations[:f_idx] + (code,) + foundations[f_idx + 1:])
+
+        def column_targets(code: int, skip: int = -1) -> List[int]:
+            targets = []
+            for t_idx, column in enumerate(tableau):
+                if t_idx == skip:
+                    continue
+                if column:
+                    if rules.tableau_accepts[column[-1] * CARDS_PER_DECK + code]:
+                        targets.append(t_idx)
+                elif t_idx == empty_column and rules.empty_column_accepts[code]:
+                    targets.append(t_idx)
+            return targets
+
+        hidden = position.hidden
+
+        def with_columns(state: _Position, changes: Dict[int, Tuple[int, ...]]) -> _Position:
+            flipped = hidden
+            for i, column in changes.items():
+                if hidden[i] and len(column) == hidden[i]:
+                    # Jak w silniku: odsłonięta zakryta karta od razu się odkrywa (bez osobnego ruchu).
+                    flipped = flipped[:i] + (hidden[i] - 1,) + flipped[i + 1:]
+            return state._replace(tableau=tuple(changes.get(i, column) for i, column in enumerate(tableau)), hidden=flipped)
+
+        result: List[Tuple[Tuple[Move, ...], _Position]] = []
+        for c_idx, column in enumerate(tableau):
+            if not column:
+                continue
+            f_idx = foundation_for(column[-1])
+            if f_idx is not None:
+                step = ((Move(PILE_TABLEAU, c_idx, PILE_FOUNDATION, f_idx),),
+                        to_foundation(with_columns(position, {c_idx: column[:-1]}), f_idx, column[-1]))
+                if is_safe(column[-1]):
+                    return [step]
+                result.append(step)
+            for start in range(hidden[c_idx], len(column)):
+                for t_idx in column_targets(column[start], skip=c_idx):
+                    if start == 0 and not tableau[t_idx]:
+                        continue
+                    child = with_columns(position, {c_idx: column[:start], t_idx: tableau[t_idx] + column[start:]})
+                    result.append(((Move(PILE_TABLEAU, c_idx, PILE_TABLEAU, t_idx, len(column) - start),), child))
+
+        # Karty z Waste: wierzchnia od razu, pozostałe po dobraniu (do końca następnego przejścia talii).
+        state: Optional[_Position] = position
+        draws = 0
+        passes_left = 2
+        while state is not None:
+            if state.cursor > 0:
+                code = state.talon[state.cursor - 1]
+                played = state._replace(talon=state.talon[:state.cursor - 1] + state.talon[state.cursor:],
+                                        cursor=state.cursor - 1)
+                prefix = (DRAW_MOVE,) * draws
+                f_idx = foundation_for(code)
+                if f_idx is not None:
+                    step = (prefix + (Move(PILE_WASTE, None, PILE_FOUNDATION, f_idx),), to_foundation(played, f_idx, code))
+                    if draws == 0 and is_safe(code):
+                        return [step]
+                    result.append(step)
+                for t_idx in column_targets(code):
+                    result.append((prefix + (Move(PILE_WASTE, None, PILE_TABLEAU, t_idx),),
+                                   with_columns(played, {t_idx: tableau[t_idx] + (code,)})))
+            if state.cursor == len(state.talon):
+                passes_left -= 1
+                if passes_left == 0:
+                    break
+            state = self.draw(state)
+            draws += 1
+        return result
+
+
+def _astar(search: _Search, root: _Position, node_limit: Optional[int], deadline: Optional[float]) -> _AStarResult:
+    """A* od `root` do wygranej (dolne ograniczenie równe 0) z limitem rozwiniętych węzłów i czasu."""
+    order = itertools.count()
+    best_cost = {root: 0}
+    parents: Dict[_Position, Tuple[Optional[_Position], Tuple[Move, ...]]] = {root: (None, ())}
+    # Przy równym oszacowaniu najpierw pozycje dalej od korzenia - przy dokładnym ograniczeniu
+    # przeszukiwanie idzie wtedy prosto do wygranej.
+    queue = [(search.lower_bound(root), 0, next(order), root)]
+    nodes = 0
+    bound = queue[0][0]
+    while queue:
+        estimate, negative_cost, _, position = heapq.heappop(queue)
+        cost = -negative_cost
+        if cost > best_cost[position]:
+            continue
+        bound = max(bound, estimate)
+        if estimate == cost:
+            return _AStarResult(position, parents, nodes, bound)
+        if (node_limit is not None and nodes >= node_limit) or (deadline is not None and time.perf_counter() > deadline):
+            break
+        nodes += 1
+        for moves, child in search.steps(position):
+            child_cost = cost + len(moves)
+            if child_cost < best_cost.get(child, child_cost + 1):
+                best_cost[child] = child_cost
+                parents[child] = (position, moves)
+                heapq.heappush(queue, (child_cost + search.lower_bound(child), -child_cost, next(order), child))
+    return _AStarResult(None, parents, nodes, bound)
+
+
+def _solution_path(goal: _Position, parents: Dict[_Position, Tuple[Optional[_Position], Tuple[Move, ...]]]) -> List[Move]:
+    steps: List[Tuple[Move, ...]] = []
+    position: Optional[_Position] = goal
+    while position is not None:
+        position, moves = parents[position]
+        steps.append(moves)
+    return [move for moves in reversed(steps) for move in moves]
+
+
+def replay_position_keys(game_state: GameState, solution: Sequence[Move]) -> Optional[List[bytes]]:
+    """
+    Odtwarza sekwencję na kopii gry. Zwraca klucze pozycji przed każdym ruchem albo None,
+    jeśli któryś ruch jest nielegalny lub sekwencja nie kończy się wygraną.
+    """
+    replay = GameState.from_snapshot(game_state.snapshot())
+    keys = []
+    for move in solution:
+        if move not in replay.get_legal_moves():
+            return None
+        keys.append(replay.position_key())
+        replay.apply(move)
+    return keys if replay.check_win_condition() else None
+
+
+class EndgameSolver:
+    """
+    Najkrótsze dokończenie odkrytych pozycji (A*). Gra przekazana do solve() nie jest zmieniana.
+    Pozycje, które nie są końcówką, i przekroczenie limitów dają STATUS_UNKNOWN
+    (wtedy trzeba użyć ogólnego solvera).
+    """
+    def __init__(self, node_limit: Optional[int] = DEFAULT_ENDGAME_NODE_LIMIT,
+                 time_limit: Optional[float] = DEFAULT_ENDGAME_TIME_LIMIT,
+                 memo_size: int = DEFAULT_MEMO_SIZE):
+        self.node_limit = node_limit
+        self.time_limit = time_limit
+        self.memo_size = memo_size
+        self._solutions: 'OrderedDict[Tuple[str, bytes], Tuple[Move, ...]]' = OrderedDict()
+        self._dependents: Dict[bytes, List[List[int]]] = {}
+
+    def solve(self, game_state: GameState) -> SolveResult:
+        start_time = time.perf_counter()
+        if not is_endgame(game_state):
+            return SolveResult(STATUS_UNKNOWN, None, None, 0, 0.0)
+        if game_state.check_win_condition():
+            return SolveResult(STATUS_SOLVABLE, None, 0, 0, 0.0, [])
+        memo_key = (game_state.rules_key(), game_state.position_key())
+        known = self._solutions.get(memo_key)
+        if known is not None:
+            self._solutions.move_to_end(memo_key)
+            return SolveResult(STATUS_SOLVABLE, known[0], len(known), 0, time.perf_counter() - start_time, list(known))
+
+        deadline = start_time + self.time_limit if self.time_limit is not None else None
+        search = _Search(game_state, self._dependents_for(game_state.rules))
+        root = _root_position(game_state)
+        found = _astar(search, root, self.node_limit, deadline)
+        if found.goal is not None:
+            solution = self._verify(game_state, _solution_path(found.goal, found.parents))
+            if solution is not None:
+                return SolveResult(STATUS_SOLVABLE, solution[0], len(solution), found.nodes,
+                                   time.perf_counter() - start_time, solution)
+        return SolveResult(STATUS_UNKNOWN, None, None, found.nodes, time.perf_counter() - start_time)
+
+    def _verify(self, game_state: GameState, solution: List[Move]) -> Optional[List[Move]]:
+        """Sprawdza sekwencję na kopii gry i zapamiętuje dokończenie dla każdej pozycji na niej. None, jeśli silnik się nie zgadza."""
+        keys = replay_position_keys(game_state, solution)
+        if keys is None:
+            return None
+        rules_key = game_state.rules_key()
+        for index, key in enumerate(keys):
+            self._solutions[(rules_key, key)] = tuple(solution[index:])
+            self._solutions.move_to_end((rules_key, key))
+        while len(self._solutions) > self.memo_size:
+            self._solutions.popitem(last=False)
+        return solution
+
+    def _dependents_for(self, rules) -> List[List[int]]:
+        """Dla każdej karty: karty (bez asów), które w tableau można na niej położyć."""
+        dependents = self._dependents.get(rules.tableau_accepts)
+        if dependents is None:
+            num_codes = len(rules.foundation_base)
+            dependents = [[card for card in range(num_codes)
+                           if rules.tableau_accepts[top * num_codes + card] and not rules.foundation_base[card]]
+                          for top in range(num_codes)]
+            self._dependents[rules.tableau_accepts] = dependents
+        return dependents
+
+
+def get_endgame_solver() -> EndgameSolver:
+    """Solver końcówek wspólny dla procesu (z pamięcią dokończeń między zapytaniami)."""
+    global _shared_solver
+    if _shared_solver is None:
+        _shared_solver = EndgameSolver()
+    return _shared_solver
+
+
+def reach_endgame(game_state: GameState, solution: Sequence[Move]) -> int:
+    """Wykonuje ruchy rozwiązania aż do pierwszej pozycji końcówki. Zwraca liczbę wykonanych ruchów."""
+    played = 0
+    for move in solution:
+        if is_endgame(game_state):
+            break
+        game_state.apply(move)
+        played += 1
+    return played
+
+
+def shortened_solution(game_state: GameState, solution: Sequence[Move], endgame: EndgameSolver) -> List[Move]:
+    """Rozwiązanie z końcówką zastąpioną najkrótszym dokończeniem (gdy solver końcówek je znajdzie i jest krótsze)."""
+    replay = GameState.from_snapshot(game_state.snapshot())
+    played = reach_endgame(replay, solution)
+    finish = endgame.solve(replay)
+    if finish.status == STATUS_SOLVABLE and played + finish.depth < len(solution):
+        return list(solution[:played]) + list(finish.solution)
+    return list(solution)
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Najkrótsze dokończenia końcówek rozdań (solver końcówek).")
+    parser.add_argument("--seeds", default="0-19", help="Ziarna rozdań, np. 0-99 lub 3,5,8.")
+    parser.add_argument("--difficulty", choices=[DIFFICULTY_EASY, DIFFICULTY_HARD], default=DIFFICULTY_EASY)
+    parser.add_argument("--nodes", type=int, default=DEFAULT_NODE_LIMIT, help="Limit węzłów ogólnego solvera na rozdanie.")
+    args = parser.parse_args(argv)
+
+    settings = get_default_game_settings()
+    general = Solver(node_limit=args.nodes)
+    endgame = EndgameSolver()
+    times: List[float] = []
+    print(f"{'ziarno':>8} {'ruchy do końcówki':>18} {'dokończenie solvera':>20} {'najkrótsze':>11} {'czas':>9}")
+    for seed in parse_seed_range(args.seeds):
+        game_state = GameState(args.difficulty, settings, seed=seed)
+        result = general.solve(game_state)
+        if result.status != STATUS_SOLVABLE:
+            print(f"{seed:>8} {'(ogólny solver: ' + result.status + ')':>18}")
+            continue
+        played = reach_endgame(game_state, result.solution)
+        optimal = endgame.solve(game_state)
+        if optimal.status != STATUS_SOLVABLE:
+            print(f"{seed:>8} {played:>18} {len(result.solution) - played:>20} {'?':>11}")
+            continue
+        times.append(optimal.elapsed)
+        print(f"{seed:>8} {played:>18} {len(result.solution) - played:>20} {optimal.depth:>11} "
+              f"{optimal.elapsed * 1000:>7.1f}ms")
+    if times:
+        times.sort()
+        print(f"\nKońcówki: {len(times)}, mediana {times[len(times) // 2] * 1000:.1f} ms, "
+              f"maksimum {times[-1] * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""
+Minimalna liczba ruchów rozdania - do weryfikacji i porównywania wyników z tabeli najlepszych.
+
+Przeszukiwanie A* solvera końcówek (solver.endgame) działa tu na całym rozdaniu: solver zna
+zakryte karty, a ich odkrycie jest darmowe jak w silniku gry. Dolne ograniczenie liczy dodatkowo
+po jednym ruchu na każdą zakrytą kartę, pod którą leży niższa karta tego samego koloru. Gdy A*
+dojdzie do wygranej w limicie węzłów, jej długość jest minimum (w ramach odcinania ruchów
+zdominowanych, jak w solverze końcówek) i sekwencja jest sprawdzana na kopii gry - tylko wtedy
+rekord ma optimum. Przy przekroczeniu limitu zostaje ograniczenie A* (obowiązuje tylko w ramach
+odcinania ruchów, więc to szacunek, a nie dowód) oraz górne ograniczenie - najkrótsza znana
+wygrana (ogólny solver do końcówki, dalej solver końcówek). Ograniczenie A* sprzeczne ze znaną
+wygraną jest pomijane. Przy domyślnym limicie A* rzadko kończy całe rozdanie, więc większość
+rozdań ma tylko przedział.
+
+Wyniki trafiają do pliku JSON osobno dla każdego zestawu reguł (GameState.rules_key), więc tabela
+wyników pokazuje "ruchy wobec optimum" bez rozwiązywania czegokolwiek, gdy gracz czeka. Kolejne
+uruchomienia z większym limitem zawężają przedziały rozdań, które nie mają jeszcze minimum.
+
+Uruchomienie:
+    python -m solver.optimal --seeds 0-99 --difficulty easy --workers 4
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+from game_logic.game_state import GameState, make_rules_key
+from game_logic.move import Move
+from game_logic.variants import VARIANTS, VARIANT_CLASSIC, resolve_variant
+from utils.constants import DIFFICULTY_EASY, DIFFICULTY_HARD
+from utils.game_settings import get_default_settings as get_default_game_settings
+from .cache import STATUS_SOLVABLE
+from .endgame import (
+    EndgameSolver, _Search, _astar, _root_position, _solution_path, replay_position_keys, shortened_solution
+)
+from .search import DEFAULT_NODE_LIMIT, Solver, parse_seed_range
+
+DEFAULT_OPTIMAL_PATH = "optimal_moves.json"
+DEFAULT_OPTIMAL_NODE_LIMIT = 100_000
+DEFAULT_CHUNK_SIZE = 4
+
+_shared_cache: Optional['OptimalCache'] = None
+_worker_solver: Optional['OptimalSolver'] = None
+
+
+class OptimalRecord(NamedTuple):
+    """
+    Wiedza o minimalnej liczbie ruchów rozdania: ograniczenie A* z odcinaniem ruchów (szacunek),
+    najkrótsza znana wygrana i to, czy jest ona minimum znalezionym przez samo A*.
+    """
+    search_bound: int
+    upper_bound: Optional[int]  # None - nie znaleziono żadnej wygranej
+    nodes: int
+    proven: bool = False  # A* doszedł do wygranej o długości upper_bound
+
+    @property
+    def optimum(self) -> Optional[int]:
+        """Minimalna liczba ruchów albo None, gdy A* nie doszedł do wygranej."""
+        return self.upper_bound if self.proven else None
+
+    @property
+    def lower_bound(self) -> Optional[int]:
+        """Dolny koniec przedziału: ograniczenie A*, o ile nie przeczy mu znana wygrana (None - pominięte)."""
+        if self.proven:
+            return self.upper_bound
+        if self.upper_bound is not None and self.search_bound >= self.upper_bound:
+            return None
+        return self.search_bound
+
+    def merged(self, other: 'OptimalRecord') -> 'OptimalRecord':
+        """
+        Przecięcie rekordów: większe ograniczenie A*, krótsza wygrana. Minimum z A* przestaje się
+        liczyć, gdy drugi rekord zna krótszą wygraną (wtedy zapis był błędny).
+        """
+        uppers = [bound for bound in (self.upper_bound, other.upper_bound) if bound is not None]
+        upper_bound = min(uppers) if uppers else None
+        proven = any(record.proven and record.upper_bound == upper_bound for record in (self, other))
+        return OptimalRecord(max(self.search_bound, other.search_bound), upper_bound,
+                             max(self.nodes, other.nodes), proven)
+
+
+class OptimalSolver:
+    """
+    A* po całym rozdaniu z limitem węzłów i czasu, a bez wygranej w limicie - górne ograniczenie
+    z ogólnego solvera skróconego solverem końcówek. Gra przekazana do solve() nie jest zmieniana.
+    """
+    def __init__(self, node_limit: Optional[int] = DEFAULT_OPTIMAL_NODE_LIMIT, time_limit: Optional[float] = None,
+                 upper_node_limit: int = DEFAULT_NODE_LIMIT):
+        self.node_limit = node_limit
+        self.time_limit = time_limit
+        self.upper_node_limit = upper_node_limit
+        self._endgame = EndgameSolver(node_limit=node_limit, time_limit=None)
+
+    def solve(self, game_state: GameState) -> Tuple[OptimalRecord, Optional[List[Move]]]:
+        """Zwraca (rekord, najkrótsza wygrana) - sekwencja tylko wtedy, gdy jest udowodnionym minimum."""
+        if game_state.check_win_condition():
+            return OptimalRecord(0, 0, 0), []
+        deadline = time.perf_counter() + self.time_limit if self.time_limit is not None else None
+        search = _Search(game_state, self._endgame._dependents_for(game_state.rules))
+        found = _astar(search, _root_position(game_state), self.node_limit, deadline)
+        if found.goal is not None:
+            solution = _solution_path(found.goal, found.parents)
+            if replay_position_keys(game_state, solution) is not None:
+                return OptimalRecord(len(solution), len(solution), found.nodes, True), solution
+        # Ograniczenie z A* obowiązuje w ramach odcinania ruchów, a wygrana ogólnego solvera nie musi go
+        # spełniać - zostaje w osobnym polu, a OptimalRecord.lower_bound pomija je przy sprzeczności.
+        return OptimalRecord(found.bound, self._upper_bound(game_state), found.nodes), None
+
+    def _upper_bound(self, game_state: GameState) -> Optional[int]:
+        result = Solver(node_limit=self.upper_node_limit).solve(game_state)
+        if result.status != STATUS_SOLVABLE:
+            return None
+        return len(shortened_solution(game_state, result.solution, self._endgame))
+
+
+def _record_from_json(values: Sequence[Any]) -> OptimalRecord:
+    # Starsze pliki mają trzy pola i ograniczenie przycięte do znanej wygranej, przez co przedział
+    # wyglądał na domknięty - takie rekordy nie mają potwierdzonego minimum.
+    search_bound, upper_bound, nodes = values[:3]
+    proven = bool(values[3]) if len(values) > 3 else False
+    return OptimalRecord(int(search_bound), None if upper_bound is None else int(upper_bound), int(nodes), proven)
+
+
+class OptimalCache:
+    """Rekordy OptimalRecord według klucza reguł i ziarna w pliku JSON."""
+
+    def __init__(self, path: str = DEFAULT_OPTIMAL_PATH):
+        self.path = path
+        self._records: Dict[str, Dict[int, OptimalRecord]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[int, OptimalRecord]]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            return {str(rules_key): {int(seed): _record_from_json(values) for seed, values in records.items()}
+                    for rules_key, records in data.items()}
+        except (OSError, ValueError, AttributeError, TypeError):
+            # Uszkodzony plik nie może blokować tabeli wyników - minima policzy się od nowa.
+            return {}
+
+    def save(self) -> None:
+        """Zapis atomowy (plik tymczasowy + os.replace)."""
+        data = {rules_key: {str(seed): list(record) for seed, record in sorted(records.items())}
+                for rules_key, records in self._records.items()}
+        temporary_path = self.path + ".tmp"
+        try:
+            with open(temporary_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=1)
+            os.replace(temporary_path, self.path)
+        except OSError:
+            pass
+
+    def get(self, rules_key: str, seed: int) -> Optional[OptimalRecord]:
+        return self._records.get(rules_key, {}).get(seed)
+
+    def update(self, rules_key: str, seed: int, record: OptimalRecord) -> OptimalRecord:
+        """Łączy nowy rekord z zapisanym (OptimalRecord.merged). Zwraca rekord po połączeniu."""
+        records = self._records.setdefault(rules_key, {})
+        known = records.get(seed)
+        records[seed] = record if known is None else known.merged(record)
+        return records[seed]
+
+
+def get_optimal_cache(path: str = DEFAULT_OPTIMAL_PATH) -> OptimalCache:
+    """Plik minimów wspólny dla procesu (wczytywany raz)."""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = OptimalCache(path)
+    return _shared_cache
+
+
+def _init_worker(node_limit: int) -> None:
+    global _worker_solver
+    _worker_solver = OptimalSolver(node_limit=node_limit)
+
+
+def _optimal_chunk(task: Tuple[Sequence[int], str, Dict[str, Any]]) -> List[Tuple[int, OptimalRecord]]:
+    seeds, difficulty, settings = task
+    return [(seed, _worker_solver.solve(GameState(difficulty, settings, seed=seed))[0]) for seed in seeds]
+
+
+def _needs_search(record: Optional[OptimalRecord], node_limit: int) -> bool:
+    return record is None or (record.optimum is None and record.nodes < node_limit)
+
+
+def compute_optimal(seeds: Sequence[int], difficulty: str = DIFFICULTY_EASY, settings: Optional[Dict[str, Any]] = None,
+                    node_limit: int = DEFAULT_OPTIMAL_NODE_LIMIT, workers: Optional[int] = None,
+                    cache: Optional[OptimalCache] = None,
+                    chunk_size: int = DEFAULT_CHUNK_SIZE) -> Tuple[str, Dict[int, OptimalRecord]]:
+    """
+    Liczy minima ziaren na puli procesów, pomijając rozdania z minimum już zapisanym w `cache`
+    i te, które przeszukano już co najmniej `node_limit` węzłami. Plik jest zapisywany po każdej paczce, więc przerwane obliczenia nie przepadają.
+    Zwraca (klucz reguł, rekordy wszystkich ziaren po połączeniu z zapisanymi).
+    """
+    settings = settings if settings is not None else get_default_game_settings()
+    cache = cache if cache is not None else get_optimal_cache()
+    rules_key = make_rules_key(resolve_variant(difficulty, settings.get("variant")).name, difficulty, settings)
+    pending = [seed for seed in seeds if _needs_search(cache.get(rules_key, seed), node_limit)]
+    tasks = [(pending[i:i + chunk_size], difficulty, settings) for i in range(0, len(pending), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(node_limit,)) as executor:
+        for chunk_records in executor.map(_optimal_chunk, tasks):
+            for seed, record in chunk_records:
+                cache.update(rules_key, seed, record)
+            cache.save()
+    return rules_key, {seed: cache.get(rules_key, seed) for seed in seeds if cache.get(rules_key, seed) is not None}
+
+
+def format_optimal_gap(moves: int, record: Optional[OptimalRecord]) -> str:
+    """
+    Opis wyniku wobec minimum, np. "optimum 98, +14", przedział "optimum 85-112" albo "optimum ≤112";
+    pusty bez rekordu. Wygrana krótsza niż zapisane optimum dowodzi, że zapis jest błędny.
+    """
+    if record is None:
+        return ""
+    if record.optimum is not None:
+        if moves >= record.optimum:
+            return f"optimum {record.optimum}, +{moves - record.optimum}"
+        return f"optimum ≤{moves}, zapisane {record.optimum} jest błędne"
+    # Wygrana gracza też jest górnym ograniczeniem.
+    upper_bound = moves if record.upper_bound is None else min(moves, record.upper_bound)
+    lower_bound = record.lower_bound
+    if lower_bound is None or lower_bound >= upper_bound:
+        return f"optimum ≤{upper_bound}"
+    return f"optimum {lower_bound}-{upper_bound}"
+
+
+def _settings_from_args(args: argparse.Namespace) -> Dict[str, Any]:
+    settings = get_default_game_settings()
+    settings["difficulty"] = args.difficulty
+    settings["variant"] = args.variant
+    settings["reshuffle_waste_on_empty_stock"] = not args.no_reshuffle
+    settings["shuffle_waste_on_recycle"] = not args.no_shuffle
+    return settings
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Minimalna liczba ruchów rozdań (A* z dolnym ograniczeniem).")
+    parser.add_argument("--seeds", default="0-19", help="Ziarna rozdań, np. 0-99 lub 3,5,8.")
+    parser.add_argument("--difficulty", choices=[DIFFICULTY_EASY, DIFFICULTY_HARD], default=DIFFICULTY_EASY)
+    parser.add_argument("--variant", choices=[VARIANT_CLASSIC, *VARIANTS], default=VARIANT_CLASSIC)
+    parser.add_argument("--no-reshuffle", action="store_true", help="Bez przekładania Waste do talii.")
+    parser.add_argument("--no-shuffle", action="store_true", help="Przełożone Waste bez tasowania.")
+    parser.add_argument("--nodes", type=int, default=DEFAULT_OPTIMAL_NODE_LIMIT, help="Limit węzłów A* na rozdanie (przy domyślnym zwykle wychodzi tylko przedział).")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Liczba procesów.")
+    parser.add_argument("--path", default=DEFAULT_OPTIMAL_PATH, help="Plik z minimami rozdań.")
+    args = parser.parse_args(argv)
+
+    seeds = parse_seed_range(args.seeds)
+    start_time = time.perf_counter()
+    rules_key, records = compute_optimal(seeds, args.difficulty, _settings_from_args(args), args.nodes,
+                                         args.workers, OptimalCache(args.path))
+    print(f"Reguły {rules_key}, zapisano '{args.path}' w {time.perf_counter() - start_time:.1f} s.")
+    print(f"{'ziarno':>8} {'minimum':>8} {'przedział':>12} {'węzły':>9}")
+    for seed in seeds:
+        record = records.get(seed)
+        if record is None:
+            continue
+        lower_bound = record.lower_bound if record.lower_bound is not None else "?"
+        bounds = f"{lower_bound}-{record.upper_bound if record.upper_bound is not None else '?'}"
+        print(f"{seed:>8} {record.optimum if record.optimum is not None else '?':>8} {bounds:>12} {record.nodes:>9}")
+    exact = sum(1 for record in records.values() if record.optimum is not None)
+    print(f"\nMinimum znalezione przez A* dla {exact} z {len(seeds)} rozdań (pozostałe - tylko przedział).")
+
+
+if __name__ == "__main__":
+    main()
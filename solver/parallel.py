@@ -0,0 +1,236 @@
+"""
+Równoległe rozwiązywanie jednego rozdania na puli procesów.
+
+Po krótkim przeszukiwaniu jednoprocesowym drzewo jest dzielone na jego nieprzeszukane gałęzie
+(ciągi ruchów od korzenia: rodzeństwo węzłów płytkiej części bieżącej ścieżki i kontynuacja jej
+głębszej części), które trafiają do wspólnej kolejki zadań puli. Gałąź, która przekroczy limit węzłów zadania, oddaje
+swoje nieprzeszukane poddrzewa (Solver.frontier) z powrotem do kolejki, więc wolne procesy przejmują
+pracę po zajętych. Pierwsze znalezione rozwiązanie ustawia wspólne zdarzenie przerywające pozostałe
+procesy. Procesy dzielą plik SolveCache (trwały albo tymczasowy): poddrzewa przeszukane do końca
+bez wygranej (STATUS_EXHAUSTED, Solver._exhausted_frame) są zapisywane w trakcie zadania, małymi
+paczkami, i pomijane przez pozostałe procesy, gdy do nich dotrą.
+
+Pula procesów powstaje przy pierwszym rozdaniu, które nie rozstrzygnie się w jednym procesie, i żyje
+do close() (albo końca programu) - kolejne wywołania solve() (np. komenda `hint`) jej nie odtwarzają.
+Zadania niosą migawkę gry, więc ta sama pula rozwiązuje kolejne pozycje.
+
+Uruchomienie:
+    python -m solver.parallel --seed 7 --difficulty hard --workers 4 --compare
+"""
+import argparse
+import atexit
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+from game_logic.game_state import GameState
+from game_logic.move import Move
+from game_logic.snapshot import GameSnapshot
+from utils.constants import DIFFICULTY_EASY, DIFFICULTY_HARD
+from utils.game_settings import get_default_settings as get_default_game_settings
+from .cache import CacheEntry, SolveCache, DEFAULT_CACHE_PATH, STATUS_SOLVABLE, STATUS_EXHAUSTED, STATUS_UNKNOWN
+from .search import Solver, SolveResult, DEFAULT_NODE_LIMIT
+
+DEFAULT_TASK_NODE_LIMIT = 20_000
+# Mniejsze paczki zapisu niż w zwykłym cache'u - wyczerpane poddrzewa mają szybko trafiać do innych procesów.
+WORKER_CACHE_BATCH_SIZE = 16
+
+
+class BranchResult(NamedTuple):
+    """Wynik jednej gałęzi: status, ruchy od korzenia gałęzi do wygranej, pozostała praca (Solver.frontier)."""
+    branch: List[Move]
+    status: str
+    solution: Optional[List[Move]]
+    depth: Optional[int]
+    nodes: int
+    frontier: List[Tuple[List[Move], int]]
+
+
+_worker_snapshot: Optional[GameSnapshot] = None
+_worker_state: Optional[GameState] = None
+_worker_solver: Optional[Solver] = None
+_worker_cache: Optional[SolveCache] = None
+_worker_stop_event = None
+_worker_node_limit = DEFAULT_TASK_NODE_LIMIT
+
+
+def _init_worker(stop_event, task_node_limit: int):
+    global _worker_stop_event, _worker_node_limit
+    _worker_stop_event = stop_event
+    _worker_node_limit = task_node_limit
+    atexit.register(_close_worker_cache)
+
+
+def _close_worker_cache() -> None:
+    if _worker_cache is not None:
+        _worker_cache.close()
+
+
+def _prepare_worker(snapshot: GameSnapshot, cache_path: str) -> None:
+    """Odtwarza grę i otwiera cache tylko wtedy, gdy zadanie dotyczy innej pozycji lub pliku niż poprzednie."""
+    global _worker_snapshot, _worker_state, _worker_solver, _worker_cache
+    if _worker_cache is None or _worker_cache.path != cache_path:
+        _close_worker_cache()
+        _worker_cache = SolveCache(cache_path, batch_size=WORKER_CACHE_BATCH_SIZE)
+        _worker_solver = Solver(_worker_cache, node_limit=_worker_node_limit, stop_event=_worker_stop_event)
+    if snapshot != _worker_snapshot:
+        _worker_snapshot = snapshot
+        _worker_state = GameState.from_snapshot(snapshot)
+
+
+def _solve_branch(task: Tuple[GameSnapshot, str, List[Move], int]) -> BranchResult:
+    snapshot, cache_path, branch, first_candidate = task
+    _prepare_worker(snapshot, cache_path)
+    tokens = [_worker_state.apply(move) for move in branch]
+    try:
+        result = _worker_solver.solve(_worker_state, first_candidate)
+    finally:
+        for token in reversed(tokens):
+            _worker_state.revert(token)
+    # Reszta wyczerpanych poddrzew (i ścieżki wygranych) od razu widoczna dla pozostałych procesów.
+    _worker_cache.flush()
+    frontier = [(branch + suffix, skip) for suffix, skip in _worker_solver.frontier]
+    solution = result.solution
+    if solution is None and result.status == STATUS_SOLVABLE:
+        # Korzeń gałęzi był już w cache'u - znany jest tylko pierwszy ruch i długość wygranej.
+        solution = [result.best_move] if result.best_move is not None else []
+    return BranchResult(branch, result.status, solution, result.depth, result.nodes, frontier)
+
+
+class ParallelSolver:
+    """
+    Odpowiednik Solver.solve rozkładający przeszukiwanie na `workers` procesów.
+    `node_limit` i `time_limit` ograniczają całe wywołanie (suma węzłów wszystkich procesów).
+    """
+    def __init__(self, workers: Optional[int] = None, cache_path: Optional[str] = DEFAULT_CACHE_PATH,
+                 node_limit: Optional[int] = DEFAULT_NODE_LIMIT, time_limit: Optional[float] = None,
+                 task_node_limit: int = DEFAULT_TASK_NODE_LIMIT):
+        self.workers = workers or os.cpu_count() or 1
+        self.cache_path = cache_path
+        self.node_limit = node_limit
+        self.time_limit = time_limit
+        self.task_node_limit = task_node_limit
+        self._context = multiprocessing.get_context()
+        self._stop_event = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._stop_event = self._context.Event()
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=self._context,
+                                                 initializer=_init_worker,
+                                                 initargs=(self._stop_event, self.task_node_limit))
+            atexit.register(self.close)
+        return self._executor
+
+    def close(self) -> None:
+        """Zamyka pulę procesów (następne solve() utworzy ją od nowa)."""
+        if self._executor is not None:
+            self._stop_event.set()
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def solve(self, game_state: GameState) -> SolveResult:
+        start_time = time.perf_counter()
+        deadline = start_time + self.time_limit if self.time_limit is not None else None
+        # Najpierw zwykłe przeszukiwanie z limitem jednego zadania - łatwe rozdania (i pozycje z cache'u)
+        # nie płacą za uruchamianie puli, a trudne dzielą się według jego nieprzeszukanych gałęzi.
+        cache = SolveCache(self.cache_path) if self.cache_path else None
+        probe = Solver(cache, node_limit=self.task_node_limit, time_limit=self.time_limit)
+        try:
+            result = probe.solve(game_state)
+        finally:
+            if cache is not None:
+                cache.close()
+        if result.status != STATUS_UNKNOWN or (deadline is not None and time.perf_counter() > deadline):
+            return result
+        # Stos zadań koordynatora: zdejmowane jest ostatnie (najgłębsze - kolejność jak w przeszukiwaniu
+        # jednoprocesowym), a płytkie, największe poddrzewa czekają na spodzie, aż któryś proces się zwolni.
+        tasks = list(probe.frontier)
+
+        # Bez trwałego cache'u procesy wymieniają wyniki przez plik tymczasowy usuwany po rozwiązaniu.
+        exchange_directory = tempfile.TemporaryDirectory() if not self.cache_path else None
+        exchange_path = self.cache_path or os.path.join(exchange_directory.name, "exchange.sqlite3")
+        # Bazę (tabele, tryb WAL) zakłada koordynator - procesy zakładające ją równocześnie blokują się nawzajem.
+        SolveCache(exchange_path).close()
+        executor = self._pool()
+        self._stop_event.clear()
+        snapshot = game_state.snapshot()
+        nodes = result.nodes
+        status = STATUS_EXHAUSTED
+        found: Optional[BranchResult] = None
+        try:
+            pending = set()
+            while True:
+                while tasks and len(pending) < self.workers:
+                    branch, first_candidate = tasks.pop()
+                    pending.add(executor.submit(_solve_branch, (snapshot, exchange_path, branch, first_candidate)))
+                if not pending:
+                    break
+                timeout = max(0.0, deadline - time.perf_counter()) if deadline is not None else None
+                done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    status = STATUS_UNKNOWN
+                    break
+                for future in done:
+                    result = future.result()
+                    nodes += result.nodes
+                    if result.status == STATUS_SOLVABLE and found is None:
+                        found = result
+                    elif result.status == STATUS_UNKNOWN:
+                        tasks.extend(result.frontier)
+                if found is not None:
+                    status = STATUS_SOLVABLE
+                    break
+                if self.node_limit is not None and nodes >= self.node_limit and (tasks or pending):
+                    status = STATUS_UNKNOWN
+                    break
+        finally:
+            # Pozostałe zadania przerywa wspólne zdarzenie; pula czeka na nie przed następnym solve().
+            self._stop_event.set()
+            for future in pending:
+                future.cancel()
+            wait(pending)
+            if exchange_directory is not None:
+                exchange_directory.cleanup()
+
+        elapsed = time.perf_counter() - start_time
+        if status == STATUS_SOLVABLE:
+            solution = found.branch + found.solution
+            tail_depth = found.depth - len(found.solution)
+            return SolveResult(status, solution[0], len(solution) + tail_depth, nodes, elapsed, solution)
+        if status == STATUS_EXHAUSTED and self.cache_path:
+            with SolveCache(self.cache_path) as cache:
+                cache.put(game_state.rules_key(), game_state.position_key(), CacheEntry(STATUS_EXHAUSTED))
+        return SolveResult(status, None, None, nodes, elapsed)
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Równoległe rozwiązywanie jednego rozdania.")
+    parser.add_argument("--seed", type=int, required=True, help="Ziarno rozdania.")
+    parser.add_argument("--difficulty", choices=[DIFFICULTY_EASY, DIFFICULTY_HARD], default=DIFFICULTY_EASY)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Liczba procesów.")
+    parser.add_argument("--nodes", type=int, default=DEFAULT_NODE_LIMIT * 10, help="Łączny limit węzłów.")
+    parser.add_argument("--time", type=float, default=None, help="Limit czasu w sekundach.")
+    parser.add_argument("--compare", action="store_true", help="Porównaj z solverem jednoprocesowym.")
+    args = parser.parse_args(argv)
+
+    settings = get_default_game_settings()
+    game_state = GameState(args.difficulty, settings, seed=args.seed)
+    # Bez cache'u - czas ma mierzyć przeszukiwanie, a nie odczyt wcześniejszego wyniku.
+    solvers = [("równolegle", ParallelSolver(args.workers, cache_path=None, node_limit=args.nodes,
+                                             time_limit=args.time))]
+    if args.compare:
+        solvers.append(("1 proces", Solver(None, node_limit=args.nodes, time_limit=args.time)))
+    for label, solver in solvers:
+        result = solver.solve(game_state)
+        if isinstance(solver, ParallelSolver):
+            solver.close()
+        depth = f"{result.depth} ruchów" if result.depth is not None else "-"
+        print(f"{label:<11}: {result.status:<10} {depth:>10}  węzły: {result.nodes:9d}  {result.elapsed:7.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,427 @@
+"""
+Solver pasjansa z pełną wiedzą o rozdaniu (widzi zakryte karty i kolejność talii).
+
+Przeszukiwanie w głąb na jednym obiekcie GameState (GameState.apply/revert, bez kopiowania),
+z tablicą transpozycji po GameState.position_key i bezpiecznymi ruchami na fundament wykonywanymi
+od razu. Wyniki (wygrywalna z najlepszym ruchem i liczbą ruchów do wygranej albo STATUS_EXHAUSTED -
+brak wygranej wśród ruchów, które zostają po odcięciu zdominowanych; to nie dowód przegranej)
+trafiają do wspólnego SolveCache, więc kolejne zapytania o te same pozycje są natychmiastowe.
+
+Uruchomienie:
+    python -m solver.search --seeds 0-99 --difficulty easy --nodes 200000
+"""
+import argparse
+import time
+from typing import Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+from game_logic.game_state import GameState
+from game_logic.move import Move, DRAW_MOVE
+from utils.constants import (
+    DIFFICULTY_EASY, DIFFICULTY_HARD, PILE_WASTE, PILE_FOUNDATION, PILE_TABLEAU, RANKS_PER_SUIT, CARDS_PER_DECK
+)
+from utils.game_archive import ArchiveWriter, RESULT_UNKNOWN, RESULT_WIN
+from utils.game_settings import get_default_settings as get_default_game_settings
+from .cache import (
+    CacheEntry, SolveCache, DEFAULT_CACHE_PATH, STATUS_SOLVABLE, STATUS_EXHAUSTED, STATUS_UNKNOWN
+)
+
+DEFAULT_NODE_LIMIT = 200_000
+TIME_CHECK_INTERVAL = 1024
+FRONTIER_DEPTH = 4
+# Wyczerpane poddrzewa od tylu węzłów trafiają do cache'u w trakcie przeszukiwania (mniejsze taniej przeszukać ponownie).
+EXHAUSTED_SUBTREE_MIN_NODES = 64
+
+# Kolejność rozpatrywania ruchów: najpierw te, które odsłaniają karty i budują fundamenty.
+_PRIORITY_REVEAL = 0
+_PRIORITY_TO_FOUNDATION = 1
+_PRIORITY_FROM_WASTE = 2
+_PRIORITY_TABLEAU = 3
+_PRIORITY_DRAW = 4
+_PRIORITY_FROM_FOUNDATION = 5
+
+
+class SolveResult(NamedTuple):
+    """Wynik rozwiązywania: status, pierwszy ruch znalezionej wygranej i jej długość, koszt przeszukiwania."""
+    status: str
+    best_move: Optional[Move]
+    depth: Optional[int]
+    nodes: int
+    elapsed: float
+    solution: Optional[List[Move]] = None
+
+
+def _foundation_heights(game_state: GameState) -> Dict[int, List[int]]:
+    """Wysokości fundamentów według koloru (indeks koloru -> lista liczby kart w stosach tego koloru)."""
+    heights: Dict[int, List[int]] = {}
+    for pile in game_state.foundation_piles:
+        if pile.cards:
+            heights.setdefault(pile.cards[-1].code // RANKS_PER_SUIT, []).append(len(pile.cards))
+    return heights
+
+
+def _is_on_foundations(code: int, heights: Dict[int, List[int]], num_decks: int) -> bool:
+    """Czy wszystkie egzemplarze karty `code` leżą już na fundamentach."""
+    rank_value = code % RANKS_PER_SUIT + 1
+    return sum(1 for height in heights.get(code // RANKS_PER_SUIT, ()) if height >= rank_value) == num_decks
+
+
+class Solver:
+    """
+    Rozwiązuje pozycje w miejscu (stan gry po solve() jest identyczny jak przed).
+    `node_limit` i `time_limit` ograniczają jedno wywołanie solve(); po ich przekroczeniu (albo po
+    ustawieniu `stop_event`) wynik ma status STATUS_UNKNOWN i nie jest zapisywany w cache'u (zapisane
+    zostają tylko poddrzewa wyczerpane wcześniej - patrz _exhausted_frame), a `frontier`
+    zawiera pozostałą pracę jako pary (ruchy od korzenia, pierwszy kandydat do sprawdzenia) - do podziału
+    między procesy (solver.parallel).
+    """
+    def __init__(self, cache: Optional[SolveCache] = None, node_limit: Optional[int] = DEFAULT_NODE_LIMIT,
+                 time_limit: Optional[float] = None, stop_event=None):
+        self.cache = cache
+        self.node_limit = node_limit
+        self.time_limit = time_limit
+        self.stop_event = stop_event
+        self.frontier: List[Tuple[List[Move], int]] = []
+        self._dependents: Dict[bytes, List[List[int]]] = {}
+
+    def solve(self, game_state: GameState, first_candidate: int = 0) -> SolveResult:
+        """`first_candidate` > 0 pomija początkowych kandydatów korzenia (przeszukanych już gdzie indziej)."""
+        start_time = time.perf_counter()
+        self.frontier = []
+        rules_key = game_state.rules_key()
+        root_key = game_state.position_key()
+        if game_state.check_win_condition():
+            return SolveResult(STATUS_SOLVABLE, None, 0, 0, 0.0, [])
+        if self.cache is not None:
+            entry = self.cache.get(rules_key, root_key)
+            if entry is not None:
+                return SolveResult(entry.status, entry.best_move, entry.depth, 0, time.perf_counter() - start_time)
+
+        deadline = start_time + self.time_limit if self.time_limit is not None else None
+        # Przy swobodnie krążącej talii (dobieranie po 1 bez tasowania) pozycje różniące się tylko
+        # kursorem talii są równoważne - tablica transpozycji ich nie rozróżnia.
+        cursor_matters = not game_state.talon_cycles_freely()
+        root_transposition_key = game_state.position_key(cursor_matters)
+        visited: Set[bytes] = {root_transposition_key}
+        # Ramka: [ruchy do sprawdzenia, indeks następnego ruchu, token ruchu prowadzącego tu, klucz pozycji,
+        #         klucz transpozycji, najpłytsza ramka na stosie, od której zależy wynik poddrzewa, węzły przy wejściu]
+        stack = [[self._ordered_moves(game_state), first_candidate, None, root_key, root_transposition_key, 0, 0]]
+        # Głębokość ramek na stosie i - dla zdjętych poddrzew zależnych od ramki niżej - ta głębokość.
+        on_stack: Dict[bytes, int] = {root_transposition_key: 0}
+        depends_on: Dict[bytes, int] = {}
+        nodes = 0
+        status = STATUS_EXHAUSTED
+        tail_depth = 0
+        while stack:
+            frame = stack[-1]
+            moves, index = frame[0], frame[1]
+            if index == len(moves):
+                stack.pop()
+                self._exhausted_frame(frame, len(stack), stack, on_stack, depends_on, rules_key, nodes)
+                if frame[2] is not None:
+                    self._revert(game_state, frame[2])
+                continue
+            if (self.node_limit is not None and nodes >= self.node_limit) or \
+                    (nodes % TIME_CHECK_INTERVAL == 0 and self._interrupted(deadline)):
+                status = STATUS_UNKNOWN
+                self.frontier = self._unexplored(stack)
+                break
+            frame[1] = index + 1
+            token = [game_state.apply(move) for move in moves[index]]
+            nodes += 1
+            if game_state.check_win_condition():
+                status = STATUS_SOLVABLE
+                self._revert(game_state, token)
+                break
+            transposition_key = game_state.position_key(cursor_matters)
+            if transposition_key in visited:
+                # Pozycja na bieżącej ścieżce (cykl) albo zależna od niej: wynik tej ramki jest warunkowy.
+                dependency = on_stack.get(transposition_key, depends_on.get(transposition_key))
+                if dependency is not None and dependency < frame[5]:
+                    frame[5] = dependency
+                self._revert(game_state, token)
+                continue
+            visited.add(transposition_key)
+            key = game_state.position_key() if self.cache is not None else transposition_key
+            entry = self.cache.get(rules_key, key) if self.cache is not None else None
+            if entry is not None:
+                if entry.status == STATUS_SOLVABLE:
+                    status = STATUS_SOLVABLE
+                    tail_depth = entry.depth or 0
+                    self._revert(game_state, token)
+                    break
+                self._revert(game_state, token)
+                continue
+            on_stack[transposition_key] = len(stack)
+            stack.append([self._ordered_moves(game_state), 0, token, key, transposition_key, len(stack), nodes])
+
+        solution = None
+        if status == STATUS_SOLVABLE:
+            steps = [frame[0][frame[1] - 1] for frame in stack]
+            solution = [move for step in steps for move in step]
+            if self.cache is not None:
+                remaining = len(solution) + tail_depth
+                for step, frame in zip(steps, stack):
+                    self.cache.put(rules_key, frame[3], CacheEntry(STATUS_SOLVABLE, step[0], remaining))
+                    remaining -= len(step)
+        for frame in reversed(stack):
+            if frame[2] is not None:
+                self._revert(game_state, frame[2])
+        if status == STATUS_EXHAUSTED and first_candidate == 0 and self.cache is not None:
+            self.cache.put(rules_key, root_key, CacheEntry(STATUS_EXHAUSTED))
+
+        if status == STATUS_SOLVABLE:
+            return SolveResult(status, solution[0], len(solution) + tail_depth, nodes,
+                               time.perf_counter() - start_time, solution)
+        return SolveResult(status, None, None, nodes, time.perf_counter() - start_time)
+
+    def _exhausted_frame(self, frame: list, depth: int, stack: List[list], on_stack: Dict[bytes, int],
+                         depends_on: Dict[bytes, int], rules_key: str, nodes: int) -> None:
+        """
+        Ramka na głębokości `depth` (> 0) przeszukana do końca bez wygranej. Jeśli jej poddrzewo nie
+        odcięło żadnej pozycji z płytszej części ścieżki (cykl), wyczerpanie nie zależy od reszty
+        przeszukiwania i trafia do cache'u od razu - inne procesy (solver.parallel) pomijają je, zanim
+        skończy się całe zadanie. W przeciwnym razie zależność przechodzi na ramkę rodzica.
+        """
+        del on_stack[frame[4]]
+        if depth == 0:
+            return
+        if frame[5] < depth:
+            depends_on[frame[4]] = frame[5]
+            parent = stack[-1]
+            parent[5] = min(parent[5], frame[5])
+        elif self.cache is not None and nodes - frame[6] >= EXHAUSTED_SUBTREE_MIN_NODES:
+            self.cache.put(rules_key, frame[3], CacheEntry(STATUS_EXHAUSTED))
+
+    def _interrupted(self, deadline: Optional[float]) -> bool:
+        return (deadline is not None and time.perf_counter() > deadline) or \
+            (self.stop_event is not None and self.stop_event.is_set())
+
+    @staticmethod
+    def _unexplored(stack: List[list]) -> List[Tuple[List[Move], int]]:
+        """
+        Pozostała praca: nieodwiedzeni kandydaci z płytkich ramek stosu (do FRONTIER_DEPTH) osobno,
+        a głębsza część ścieżki jako jedna kontynuacja od rozpoczętego kandydata (przeszukiwanego
+        ponownie) - osobne gałęzie z pełną ścieżką dla każdej ramki głębokiego stosu nie mieszczą się w pamięci.
+        Ostatni element listy jest następny w kolejności przeszukiwania, pierwszy - ostatni.
+        """
+        branches: List[Tuple[List[Move], int]] = []
+        path: List[Move] = []
+        for depth, frame in enumerate(stack):
+            moves, index = frame[0], frame[1]
+            if depth == FRONTIER_DEPTH:
+                branches.append((path, max(index - 1, 0)))
+                break
+            branches.extend((path + list(step), 0) for step in reversed(moves[index:]))
+            if index:
+                path = path + list(moves[index - 1])
+        return branches
+
+    @staticmethod
+    def _revert(game_state: GameState, tokens: List[tuple]) -> None:
+        for token in reversed(tokens):
+            game_state.revert(token)
+
+    def _ordered_moves(self, game_state: GameState) -> List[Tuple[Move, ...]]:
+        """
+        Kandydaci na następny krok w kolejności rozpatrywania; każdy kandydat to krotka ruchów.
+        Karty z talii są zagrywane jednym krokiem "dobierz k razy i zagraj" (Talon.reachable_cards),
+        zamiast osobno przeszukiwać każde dobranie. Zdjęcie karty z fundamentu ma sens tylko wtedy,
+        gdy od razu coś się na niej położy, więc jest łączone z takim ruchem (_follow_ups).
+        Bezpieczny ruch na fundament (żadna karta, która mogłaby się na nim położyć w tableau,
+        nie jest już potrzebna) jest jedynym kandydatem, ruchy na drugą pustą kolumnę lub pusty
+        fundament powtarzają ruch na pierwszą, a przeniesienie całej odkrytej kolumny na pustą
+        kolumnę niczego nie zmienia - te są pomijane.
+        """
+        rules = game_state.rules
+        dependents = self._dependents_for(rules)
+        heights = None
+        empty_tableau = next((i for i, p in enumerate(game_state.tableau_piles) if not p.cards), None)
+        empty_foundation = next((i for i, p in enumerate(game_state.foundation_piles) if not p.cards), None)
+        scored = []
+        for move in game_state.get_legal_moves():
+            if move.is_draw or move.from_pile_type == PILE_WASTE:
+                continue
+            if move.to_pile_type == PILE_TABLEAU and move.to_idx != empty_tableau \
+                    and not game_state.tableau_piles[move.to_idx].cards:
+                continue
+            if move.to_pile_type == PILE_FOUNDATION and move.to_idx != empty_foundation \
+                    and not game_state.foundation_piles[move.to_idx].cards:
+                continue
+            if move.from_pile_type == PILE_FOUNDATION:
+                follow_ups = self._follow_ups(game_state, move)
+                scored.extend((_PRIORITY_FROM_FOUNDATION, len(follow_up), (move,) + follow_up)
+                              for follow_up in follow_ups)
+                continue
+            source = game_state.tableau_piles[move.from_idx].cards
+            reveals = len(source) > move.num_cards and not source[-move.num_cards - 1].face_up
+            if move.to_pile_type == PILE_FOUNDATION:
+                if heights is None:
+                    heights = _foundation_heights(game_state)
+                if all(_is_on_foundations(code, heights, rules.num_decks) for code in dependents[source[-1].code]):
+                    return [(move,)]
+                scored.append((_PRIORITY_REVEAL if reveals else _PRIORITY_TO_FOUNDATION, 0, (move,)))
+            elif reveals:
+                scored.append((_PRIORITY_REVEAL, 0, (move,)))
+            elif move.num_cards == len(source):
+                if move.to_idx != empty_tableau:
+                    scored.append((_PRIORITY_TABLEAU, 0, (move,)))
+            elif self._exposes_foundation_card(game_state, source[-move.num_cards - 1]):
+                scored.append((_PRIORITY_TABLEAU, 0, (move,)))
+
+        for num_draws, _, card in game_state.talon_reachable_cards():
+            draws = (DRAW_MOVE,) * num_draws
+            for f_idx, f_pile in enumerate(game_state.foundation_piles):
+                fits = rules.foundation_next[f_pile.cards[-1].code] == card.code if f_pile.cards \
+                    else f_idx == empty_foundation and rules.foundation_base[card.code]
+                if fits:
+                    if num_draws == 0:
+                        if heights is None:
+                            heights = _foundation_heights(game_state)
+                        if all(_is_on_foundations(code, heights, rules.num_decks) for code in dependents[card.code]):
+                            return [(Move(PILE_WASTE, None, PILE_FOUNDATION, f_idx),)]
+                    scored.append((_PRIORITY_TO_FOUNDATION, num_draws, draws + (Move(PILE_WASTE, None, PILE_FOUNDATION, f_idx),)))
+            for t_idx, t_pile in enumerate(game_state.tableau_piles):
+                if t_pile.cards:
+                    top = t_pile.cards[-1]
+                    fits = top.face_up and rules.tableau_accepts[top.code * CARDS_PER_DECK + card.code]
+                else:
+                    fits = t_idx == empty_tableau and rules.empty_column_accepts[card.code]
+                if fits:
+                    scored.append((_PRIORITY_FROM_WASTE, num_draws, draws + (Move(PILE_WASTE, None, PILE_TABLEAU, t_idx),)))
+        if self._needs_blind_recycle(game_state):
+            draws_left = (len(game_state.stock_pile) + rules.draw_count - 1) // rules.draw_count
+            scored.append((_PRIORITY_DRAW, draws_left, (DRAW_MOVE,) * (draws_left + 1)))
+        scored.sort(key=lambda item: (item[0], item[1]))
+        return [moves for _, _, moves in scored]
+
+    def _follow_ups(self, game_state: GameState, pull: Move) -> List[Tuple[Move, ...]]:
+        """
+        Kandydaci po zdjęciu karty z fundamentu (`pull`): ruchy na tę kartę z innych kolumn i z talii,
+        oceniane jak w _ordered_moves. Liczone bez wykonywania zdjęcia - pozostałe kolumny i talia się
+        nie zmieniają, a fundament źródłowy przyjmuje po nim tylko tę samą kartę (albo asa, gdy zostaje pusty).
+        """
+        rules = game_state.rules
+        source_foundation = game_state.foundation_piles[pull.from_idx].cards
+        pulled_code = source_foundation[-1].code
+        other_foundations = [pile for i, pile in enumerate(game_state.foundation_piles) if i != pull.from_idx]
+
+        def exposes_foundation_card(card) -> bool:
+            fits_source = rules.foundation_base[card.code] if len(source_foundation) == 1 else card.code == pulled_code
+            return fits_source or any(pile.can_add_card(card) for pile in other_foundations)
+
+        scored = []
+        for move in self._moves_onto(game_state, pull.to_idx, pulled_code):
+            source = game_state.tableau_piles[move.from_idx].cards
+            if len(source) > move.num_cards and not source[-move.num_cards - 1].face_up:
+                scored.append((_PRIORITY_REVEAL, 0, (move,)))
+            elif move.num_cards == len(source) or exposes_foundation_card(source[-move.num_cards - 1]):
+                scored.append((_PRIORITY_TABLEAU, 0, (move,)))
+        accepts_offset = pulled_code * CARDS_PER_DECK
+        for num_draws, _, card in game_state.talon_reachable_cards():
+            if rules.tableau_accepts[accepts_offset + card.code]:
+                scored.append((_PRIORITY_FROM_WASTE, num_draws,
+                               (DRAW_MOVE,) * num_draws + (Move(PILE_WASTE, None, PILE_TABLEAU, pull.to_idx),)))
+        scored.sort(key=lambda item: (item[0], item[1]))
+        return [moves for _, _, moves in scored]
+
+    @staticmethod
+    def _moves_onto(game_state: GameState, onto_column: int, top_code: int) -> List[Move]:
+        """
+        Ruchy z innych kolumn na kartę `top_code` położoną na kolumnie `onto_column`, w kolejności
+        get_legal_moves() (kolumny źródłowe po kolei, od najdłuższej sekwencji). Korzysta
+        z zapamiętanych odkrytych sekwencji kolumn.
+        """
+        accepted_codes = game_state.rules.tableau_accepted_codes[top_code]
+        moves = []
+        for t_idx, t_pile in enumerate(game_state.tableau_piles):
+            if t_idx == onto_column or not t_pile.cards or not t_pile.cards[-1].face_up:
+                continue
+            face_up_stack = t_pile.get_face_up_cards()
+            moves.extend(Move(PILE_TABLEAU, t_idx, PILE_TABLEAU, onto_column, len(face_up_stack) - k)
+                         for k, card in enumerate(face_up_stack) if card.code in accepted_codes)
+        return moves
+
+    @staticmethod
+    def _exposes_foundation_card(game_state: GameState, card) -> bool:
+        return any(pile.can_add_card(card) for pile in game_state.foundation_piles)
+
+    @staticmethod
+    def _needs_blind_recycle(game_state: GameState) -> bool:
+        """
+        Czy trzeba osobno rozważyć przełożenie Waste do talii. Bez tasowania następne przejście jest już
+        w Talon.reachable_cards; z tasowaniem jego kolejność zależy od generatora gry, więc solver
+        dobiera do końca, przekłada i dopiero wtedy widzi nową kolejność.
+        """
+        settings = game_state.current_settings
+        if not settings.get("reshuffle_waste_on_empty_stock", True) or not settings.get("shuffle_waste_on_recycle", True):
+            return False
+        max_passes = game_state.rules.max_stock_passes
+        return bool(game_state.talon.ring) and (max_passes is None or game_state.stock_recycles < max_passes - 1)
+
+    def _dependents_for(self, rules) -> List[List[int]]:
+        """Dla każdej karty: karty (bez asów), które w tableau można na niej położyć."""
+        dependents = self._dependents.get(rules.tableau_accepts)
+        if dependents is None:
+            num_codes = len(rules.foundation_base)
+            dependents = [[card for card in range(num_codes)
+                           if rules.tableau_accepts[top * num_codes + card] and not rules.foundation_base[card]]
+                          for top in range(num_codes)]
+            self._dependents[rules.tableau_accepts] = dependents
+        return dependents
+
+
+def parse_seed_range(text: str) -> List[int]:
+    """Zamienia zapis "0-99" lub "1,5,7" na listę ziaren."""
+    seeds: List[int] = []
+    for part in text.split(","):
+        if "-" in part:
+            first, last = part.split("-", 1)
+            seeds.extend(range(int(first), int(last) + 1))
+        elif part:
+            seeds.append(int(part))
+    return seeds
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Rozwiązywanie rozdań z pełną wiedzą i wspólnym cache'em wyników.")
+    parser.add_argument("--seeds", default="0-19", help="Ziarna rozdań, np. 0-99 lub 3,5,8.")
+    parser.add_argument("--numbered", action="store_true",
+                        help="Traktuj --seeds jako numery rozdań zgodne z numeracją Microsoft (porównania z innymi solverami).")
+    parser.add_argument("--difficulty", choices=[DIFFICULTY_EASY, DIFFICULTY_HARD], default=DIFFICULTY_EASY)
+    parser.add_argument("--nodes", type=int, default=DEFAULT_NODE_LIMIT, help="Limit węzłów na rozdanie.")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH, help="Plik cache'u wyników (SQLite).")
+    parser.add_argument("--no-cache", action="store_true", help="Rozwiązuj bez cache'u.")
+    parser.add_argument("--archive", metavar="PLIK",
+                        help="Zapisz wyniki (z rozwiązaniami) do archiwum kolumnowego (utils.game_archive).")
+    args = parser.parse_args(argv)
+
+    settings = get_default_game_settings()
+    cache = None if args.no_cache else SolveCache(args.cache)
+    solver = Solver(cache, node_limit=args.nodes)
+    counts = {STATUS_SOLVABLE: 0, STATUS_EXHAUSTED: 0, STATUS_UNKNOWN: 0}
+    label = "rozdanie" if args.numbered else "ziarno"
+    archive = ArchiveWriter(args.archive) if args.archive else None
+    # Wyczerpane przeszukiwanie z odcinaniem ruchów nie dowodzi przegranej.
+    archive_results = {STATUS_SOLVABLE: RESULT_WIN, STATUS_EXHAUSTED: RESULT_UNKNOWN, STATUS_UNKNOWN: RESULT_UNKNOWN}
+    try:
+        for seed in parse_seed_range(args.seeds):
+            if args.numbered:
+                game_state = GameState(args.difficulty, settings, deal_number=seed)
+            else:
+                game_state = GameState(args.difficulty, settings, seed=seed)
+            result = solver.solve(game_state)
+            counts[result.status] += 1
+            if archive is not None:
+                archive.append(seed, game_state.rules_key(), archive_results[result.status], result.depth or 0,
+                               result.elapsed, result.solution or (), label="solver-numbered" if args.numbered else "solver")
+            depth = f"{result.depth:4d} ruchów" if result.depth is not None else " " * 10
+            print(f"{label} {seed:8d}: {result.status:<10} {depth}  węzły: {result.nodes:8d}  {result.elapsed:6.2f} s")
+    finally:
+        if cache is not None:
+            cache.close()
+        if archive is not None:
+            archive.close()
+    print(", ".join(f"{status}: {count}" for status, count in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+Pula ziaren rozdań sprawdzonych w tle jako wygrywalne.
+
+Tryb "tylko wygrywalne rozdania" wymagałby rozwiązania rozdania przed jego pokazaniem, co
+dokłada sekundy do rozpoczęcia gry. Wątek w tle utrzymuje zamiast tego dla każdego zestawu
+reguł (GameState.rules_key - wariant, poziom, przekładanie i tasowanie Waste) ograniczoną
+kolejkę ziaren, dla których solver znalazł wygraną. Dopełnia ją, gdy gracz jest w menu albo
+w trakcie gry (input() zwalnia GIL), a niewykorzystane ziarna zapisuje do pliku JSON, więc
+przechodzą do następnego uruchomienia. Nowa gra zdejmuje ziarno z kolejki tak szybko jak
+losowanie zwykłego rozdania; tylko przy pustej kolejce rozdanie jest sprawdzane na miejscu,
+w limicie prób i czasu (TAKE_MAX_ATTEMPTS, TAKE_TIME_LIMIT) - potem take() zwraca None,
+a gra dostaje zwykłe losowe rozdanie.
+
+Uruchomienie (ręczne dopełnienie puli, np. przed pierwszą grą):
+    python -m solver.seed_pool --difficulty easy --count 16
+"""
+import argparse
+import atexit
+import json
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from game_logic.game_state import GameState, make_rules_key
+from game_logic.variants import resolve_variant
+from utils.constants import DIFFICULTY_EASY, DIFFICULTY_HARD
+from utils.game_settings import get_default_settings as get_default_game_settings
+from .cache import SolveCache, DEFAULT_CACHE_PATH, STATUS_SOLVABLE
+from .search import Solver
+
+DEFAULT_POOL_PATH = "winnable_seeds.json"
+DEFAULT_POOL_CAPACITY = 8
+# Rozdania, których solver nie rozstrzygnie w tym limicie, są pomijane - pula nie musi być
+# reprezentatywna, ma tylko szybko dostarczać rozdania z pewną wygraną.
+DEFAULT_VERIFY_NODE_LIMIT = 50_000
+# Sprawdzanie na miejscu przy pustej kolejce wstrzymuje start gry - po tylu próbach albo
+# sekundach gracz dostaje zwykłe losowe rozdanie.
+TAKE_MAX_ATTEMPTS = 8
+TAKE_TIME_LIMIT = 5.0
+
+_shared_pool: Optional['SeedPool'] = None
+
+
+def _rules_key(difficulty: str, settings: Dict[str, Any]) -> str:
+    return make_rules_key(resolve_variant(difficulty, settings.get("variant")).name, difficulty, settings)
+
+
+def find_winnable_seed(difficulty: str, settings: Dict[str, Any], solver: Solver,
+                       rng: random.Random, max_attempts: Optional[int] = None,
+                       deadline: Optional[float] = None) -> Optional[int]:
+    """
+    Losuje ziarna, aż solver udowodni, że rozdanie jest wygrywalne. Zwraca None po `max_attempts`
+    próbach albo po chwili `deadline` (time.perf_counter()); ostatnia próba jest wtedy ucinana
+    przez time_limit solvera.
+    """
+    attempts = 0
+    time_limit = solver.time_limit
+    try:
+        while max_attempts is None or attempts < max_attempts:
+            if deadline is not None:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    return None
+                solver.time_limit = remaining if time_limit is None else min(time_limit, remaining)
+            attempts += 1
+            seed = rng.getrandbits(32)
+            result = solver.solve(GameState(difficulty, settings, seed=seed))
+            if result.status == STATUS_SOLVABLE:
+                return seed
+            if solver.stop_event is not None and solver.stop_event.is_set():
+                return None
+    finally:
+        solver.time_limit = time_limit
+    return None
+
+
+class SeedPool:
+    """
+    Kolejki wygrywalnych ziaren według zestawu reguł, dopełniane przez wątek w tle.
+    watch() dodaje zestaw reguł do dopełniania (i uruchamia wątek), take() zdejmuje ziarno.
+    """
+    def __init__(self, path: str = DEFAULT_POOL_PATH, capacity: int = DEFAULT_POOL_CAPACITY,
+                 node_limit: int = DEFAULT_VERIFY_NODE_LIMIT, cache_path: Optional[str] = DEFAULT_CACHE_PATH):
+        self.path = path
+        self.capacity = capacity
+        self.node_limit = node_limit
+        self.cache_path = cache_path
+        self._queues: Dict[str, List[int]] = self._load()
+        self._watched: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._rng = random.Random()
+
+    def _load(self) -> Dict[str, List[int]]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            return {str(key): [int(seed) for seed in seeds] for key, seeds in data.items()}
+        except (OSError, ValueError, AttributeError, TypeError):
+            # Uszkodzony plik puli nie może blokować gry - pula zapełni się od nowa.
+            return {}
+
+    def _save(self) -> None:
+        """Zapis atomowy (plik tymczasowy + os.replace); wołany pod blokadą."""
+        temporary_path = self.path + ".tmp"
+        try:
+            with open(temporary_path, "w", encoding="utf-8") as f:
+                json.dump(self._queues, f, indent=1)
+            os.replace(temporary_path, self.path)
+        except OSError:
+            pass
+
+    def available(self, difficulty: str, settings: Dict[str, Any]) -> int:
+        with self._lock:
+            return len(self._queues.get(_rules_key(difficulty, settings), ()))
+
+    def watch(self, difficulty: str, settings: Dict[str, Any]) -> None:
+        """Dopełniaj w tle kolejkę dla reguł wynikających z ustawień."""
+        rules_key = _rules_key(difficulty, settings)
+        with self._lock:
+            self._watched[rules_key] = (difficulty, dict(settings))
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._refill_loop, name="seed-pool", daemon=True)
+            self._thread.start()
+        self._wake.set()
+
+    def take(self, difficulty: str, settings: Dict[str, Any], max_attempts: int = TAKE_MAX_ATTEMPTS,
+             time_limit: Optional[float] = TAKE_TIME_LIMIT) -> Optional[int]:
+        """
+        Ziarno wygrywalnego rozdania dla reguł z ustawień. Przy pustej kolejce rozdanie jest
+        sprawdzane od razu (najwyżej `max_attempts` rozdań w `time_limit` sekund), a zestaw reguł
+        trafia do dopełniania. None, gdy w tym limicie nie znaleziono wygrywalnego rozdania.
+        """
+        rules_key = _rules_key(difficulty, settings)
+        with self._lock:
+            queue = self._queues.get(rules_key)
+            seed = queue.pop(0) if queue else None
+            if seed is not None:
+                self._save()
+        self.watch(difficulty, settings)
+        if seed is not None:
+            return seed
+        deadline = time.perf_counter() + time_limit if time_limit is not None else None
+        cache = SolveCache(self.cache_path) if self.cache_path else None
+        try:
+            return find_winnable_seed(difficulty, settings, Solver(cache, node_limit=self.node_limit), self._rng,
+                                      max_attempts=max_attempts, deadline=deadline)
+        finally:
+            if cache is not None:
+                cache.close()
+
+    def fill(self, difficulty: str, settings: Dict[str, Any], count: int) -> int:
+        """Dopełnia kolejkę do `count` ziaren na bieżącym wątku. Zwraca liczbę ziaren w kolejce."""
+        rules_key = _rules_key(difficulty, settings)
+        cache = SolveCache(self.cache_path) if self.cache_path else None
+        solver = Solver(cache, node_limit=self.node_limit)
+        try:
+            while self.available(difficulty, settings) < count:
+                self._add(rules_key, find_winnable_seed(difficulty, settings, solver, self._rng))
+        finally:
+            if cache is not None:
+                cache.close()
+        return self.available(difficulty, settings)
+
+    def _add(self, rules_key: str, seed: Optional[int]) -> None:
+        if seed is None:
+            return
+        with self._lock:
+            self._queues.setdefault(rules_key, []).append(seed)
+            self._save()
+
+    def _next_to_refill(self) -> Optional[Tuple[str, str, Dict[str, Any]]]:
+        with self._lock:
+            for rules_key, (difficulty, settings) in self._watched.items():
+                if len(self._queues.get(rules_key, ())) < self.capacity:
+                    return rules_key, difficulty, settings
+        return None
+
+    def _refill_loop(self) -> None:
+        # SQLite nie pozwala dzielić połączenia między wątkami - wątek puli ma własne.
+        cache = SolveCache(self.cache_path) if self.cache_path else None
+        solver = Solver(cache, node_limit=self.node_limit, stop_event=self._stop)
+        try:
+            while not self._stop.is_set():
+                target = self._next_to_refill()
+                if target is None:
+                    self._wake.wait()
+                    self._wake.clear()
+                    continue
+                rules_key, difficulty, settings = target
+                self._add(rules_key, find_winnable_seed(difficulty, settings, solver, self._rng, max_attempts=1))
+        finally:
+            if cache is not None:
+                cache.close()
+
+    def close(self) -> None:
+        """Przerywa dopełnianie (solver sprawdza zdarzenie co TIME_CHECK_INTERVAL węzłów) i czeka na wątek."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def get_seed_pool(path: str = DEFAULT_POOL_PATH) -> SeedPool:
+    """Pula wspólna dla całego procesu (wątek zatrzymywany przy wyjściu z programu)."""
+    global _shared_pool
+    if _shared_pool is None:
+        _shared_pool = SeedPool(path)
+        atexit.register(_shared_pool.close)
+    return _shared_pool
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Dopełnianie puli wygrywalnych rozdań.")
+    parser.add_argument("--difficulty", choices=[DIFFICULTY_EASY, DIFFICULTY_HARD], default=DIFFICULTY_EASY)
+    parser.add_argument("--variant", default=None, help="Wariant gry (domyślnie wg poziomu trudności).")
+    parser.add_argument("--count", type=int, default=DEFAULT_POOL_CAPACITY, help="Docelowa liczba ziaren w puli.")
+    parser.add_argument("--nodes", type=int, default=DEFAULT_VERIFY_NODE_LIMIT, help="Limit węzłów na rozdanie.")
+    parser.add_argument("--path", default=DEFAULT_POOL_PATH, help="Plik puli (JSON).")
+    args = parser.parse_args(argv)
+
+    settings = get_default_game_settings()
+    settings["difficulty"] = args.difficulty
+    if args.variant:
+        settings["variant"] = args.variant
+    pool = SeedPool(args.path, node_limit=args.nodes)
+    available = pool.fill(args.difficulty, settings, args.count)
+    print(f"{_rules_key(args.difficulty, settings)}: {available} ziaren w '{args.path}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Pomiar opóźnienia od naciśnięcia Enter do narysowania klatki w prawdziwym terminalu.
+
+Uruchamia main.py w pseudoterminalu (pty) w katalogu tymczasowym (domyślne ustawienia, bez
+zapisu wyników), przechodzi nagraną sekwencję komend przez menu i pętlę gry i dla każdej komendy
+mierzy czas od jej wysłania do ostatniego bajtu klatki zakończonej pytaniem o następną komendę.
+Obejmuje to wszystko, co odczuwa gracz: input(), podprocesy clear_console, colorama i print.
+Raport podaje p50/p99 opóźnienia i liczbę bajtów na klatkę; wynik można zapisać (--save) i porównać
+z wcześniejszym (--compare), np. przed i po zmianie ConsoleUI. Wymaga systemu z modułem pty (POSIX).
+
+Uruchomienie:
+    python -m tools.bench_latency --runs 5 --save before.json
+    python -m tools.bench_latency --runs 5 --compare before.json
+"""
+import argparse
+import fcntl
+import json
+import os
+import re
+import select
+import struct
+import subprocess
+import sys
+import tempfile
+import termios
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+MAIN_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+DEFAULT_SEED = 7
+DEFAULT_ROWS = 50
+DEFAULT_COLUMNS = 120
+DEFAULT_TIMEOUT = 30.0
+# Po bajtach wyglądających na pytanie o komendę czekamy chwilę, czy klatka na pewno się skończyła.
+QUIET_PERIOD = 0.05
+READ_SIZE = 65536
+REPORTED_PERCENTILES = (50, 99)
+
+# Menu -> nowa gra (rozdanie DEFAULT_SEED) -> ruchy, dobieranie, cofnięcie, błędny ruch, pomoc ->
+# powrót do menu -> zasady -> wyjście. Pusta linia to samo Enter (po komunikacie błędu, pomocy, zasadach).
+DEFAULT_COMMANDS = [
+    "1",
+    "m T4 T2", "m T1 T4", "d", "d", "d", "u", "d",
+    "m T9 T1", "",
+    "h", "",
+    "d", "d",
+    "menu", "tak",
+    "4", "",
+    "5",
+]
+
+_ANSI_PATTERN = re.compile(r'\x1B[@-_][0-?]*[ -/]*[@-~]')
+# Pytania kończą się ": " (komenda, wybór opcji, tak/nie) albo "..." (Naciśnij Enter...).
+_PROMPT_PATTERN = re.compile(r'(: |\.\.\.)\s*$')
+
+
+class FrameSample(NamedTuple):
+    """Jedna klatka: komenda, która ją wywołała, opóźnienie w sekundach i liczba bajtów wyjścia."""
+    command: str
+    latency: float
+    num_bytes: int
+
+
+class _Frame(NamedTuple):
+    data: bytes
+    last_byte_time: float
+    closed: bool
+
+
+def _set_window_size(fd: int, rows: int, columns: int) -> None:
+    fcntl.ioctl(fd, termios.TIOCSWINSZ, struct.pack("HHHH", rows, columns, 0, 0))
+
+
+def _looks_like_prompt(data: bytes) -> bool:
+    tail = _ANSI_PATTERN.sub('', data[-256:].decode("utf-8", errors="replace"))
+    return bool(_PROMPT_PATTERN.search(tail))
+
+
+def _read_frame(master: int, timeout: float) -> _Frame:
+    """
+    Czyta wyjście gry do końca klatki: pytania o komendę, po którym przez QUIET_PERIOD nic nie
+    przychodzi, albo zamknięcia terminala przez proces.
+    """
+    chunks: List[bytes] = []
+    last_byte_time = time.perf_counter()
+    deadline = last_byte_time + timeout
+    prompt_seen = False
+    while True:
+        now = time.perf_counter()
+        if now > deadline:
+            raise TimeoutError("Gra nie narysowała klatki w wyznaczonym czasie: "
+                               + b"".join(chunks)[-200:].decode("utf-8", errors="replace"))
+        wait_time = QUIET_PERIOD if prompt_seen else deadline - now
+        readable, _, _ = select.select([master], [], [], wait_time)
+        if not readable:
+            if prompt_seen:
+                return _Frame(b"".join(chunks), last_byte_time, False)
+            continue
+        try:
+            chunk = os.read(master, READ_SIZE)
+        except OSError:
+            # Linux zgłasza EIO, gdy proces po drugiej stronie zamknął terminal.
+            chunk = b""
+        if not chunk:
+            return _Frame(b"".join(chunks), last_byte_time, True)
+        last_byte_time = time.perf_counter()
+        chunks.append(chunk)
+        prompt_seen = _looks_like_prompt(chunks[-1] if len(chunk) >= 256 else b"".join(chunks[-4:]))
+
+
+def run_session(commands: Sequence[str], seed: int = DEFAULT_SEED, rows: int = DEFAULT_ROWS,
+                columns: int = DEFAULT_COLUMNS, timeout: float = DEFAULT_TIMEOUT) -> List[FrameSample]:
+    """Jedna sesja gry w pty. Pierwsza próbka ("<start>") to czas od uruchomienia do menu głównego."""
+    master, slave = os.openpty()
+    _set_window_size(slave, rows, columns)
+    environment = dict(os.environ, TERM=os.environ.get("TERM", "xterm-256color"),
+                       LINES=str(rows), COLUMNS=str(columns), PYTHONIOENCODING="utf-8")
+    samples: List[FrameSample] = []
+    with tempfile.TemporaryDirectory() as working_directory:
+        start_time = time.perf_counter()
+        process = subprocess.Popen([sys.executable, MAIN_SCRIPT, "--seed", str(seed)], stdin=slave, stdout=slave,
+                                   stderr=slave, cwd=working_directory, env=environment, start_new_session=True)
+        os.close(slave)
+        try:
+            frame = _read_frame(master, timeout)
+            samples.append(FrameSample("<start>", frame.last_byte_time - start_time, len(frame.data)))
+            for command in commands:
+                if frame.closed:
+                    break
+                sent_time = time.perf_counter()
+                os.write(master, command.encode("utf-8") + b"\n")
+                frame = _read_frame(master, timeout)
+                samples.append(FrameSample(command, frame.last_byte_time - sent_time, len(frame.data)))
+        finally:
+            if process.poll() is None:
+                process.kill()
+            process.wait()
+            os.close(master)
+    return samples
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Percentyl metodą najbliższej rangi (dokładny - próbek jest niewiele)."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize(samples: Sequence[FrameSample]) -> Dict[str, Any]:
+    frames = [s for s in samples if s.command != "<start>"]
+    starts = [s.latency for s in samples if s.command == "<start>"]
+    latencies = [s.latency for s in frames]
+    sizes = [s.num_bytes for s in frames]
+    summary: Dict[str, Any] = {"frames": len(frames)}
+    for q in REPORTED_PERCENTILES:
+        summary[f"latency_p{q}_ms"] = percentile(latencies, q) * 1000
+        summary[f"bytes_p{q}"] = percentile(sizes, q)
+    summary["bytes_mean"] = sum(sizes) / len(sizes) if sizes else 0.0
+    summary["startup_p50_ms"] = percentile(starts, 50) * 1000
+    return summary
+
+
+def load_commands(path: str) -> List[str]:
+    """Komendy z pliku, po jednej w linii; linie od '#' to komentarze, pusta linia to samo Enter."""
+    with open(path, encoding="utf-8") as f:
+        return [line.rstrip("\n") for line in f if not line.startswith("#")]
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Opóźnienie komenda -> klatka w pseudoterminalu.")
+    parser.add_argument("--commands", help="Plik z sekwencją komend (domyślnie wbudowana sekwencja).")
+    parser.add_argument("--runs", type=int, default=3, help="Liczba powtórzeń całej sesji.")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Ziarno rozdania.")
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS)
+    parser.add_argument("--columns", type=int, default=DEFAULT_COLUMNS)
+    parser.add_argument("--verbose", action="store_true", help="Wypisz każdą klatkę.")
+    parser.add_argument("--save", metavar="PLIK", help="Zapisz podsumowanie jako JSON.")
+    parser.add_argument("--compare", metavar="PLIK", help="Porównaj z podsumowaniem zapisanym przez --save.")
+    args = parser.parse_args(argv)
+
+    commands = load_commands(args.commands) if args.commands else DEFAULT_COMMANDS
+    samples: List[FrameSample] = []
+    for _ in range(args.runs):
+        session = run_session(commands, args.seed, args.rows, args.columns)
+        samples.extend(session)
+        if args.verbose:
+            for sample in session:
+                print(f"  {sample.command!r:<12} {sample.latency * 1000:8.2f} ms  {sample.num_bytes:6d} B")
+
+    summary = summarize(samples)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print(f"klatek: {summary['frames']} ({args.runs} sesji), start gry p50: {summary['startup_p50_ms']:.1f} ms")
+    for key in [f"latency_p{q}_ms" for q in REPORTED_PERCENTILES] + \
+               [f"bytes_p{q}" for q in REPORTED_PERCENTILES] + ["bytes_mean"]:
+        line = f"  {key:<16} {summary[key]:10.2f}"
+        if baseline is not None and baseline.get(key):
+            change = (summary[key] - baseline[key]) / baseline[key] * 100
+            line += f"   (było {baseline[key]:.2f}, {change:+.1f}%)"
+        print(line)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
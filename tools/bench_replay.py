@@ -0,0 +1,376 @@
+"""
+Makro-benchmark: odtwarzanie korpusu nagranych, całych partii przez silnik i renderer.
+
+Mikro-pomiary pojedynczych wywołań nie pokazują, jak GameState i ConsoleUI.display_board
+zachowują się w realistycznej mieszance akcji: z cofnięciami, przełożeniami Waste i długimi
+sekwencjami w kolumnach. Korpus (tools/replay_corpus.jsonl, jedna partia w linii: reguły, ziarno,
+komendy w gramatyce konsoli i oczekiwany wynik) jest odtwarzany tak jak w pętli gry: akcja,
+zapytania o wygraną i dostępne ruchy, opcjonalnie narysowanie planszy do bufora w pamięci
+(bez czyszczenia ekranu - koszt terminala mierzy tools.bench_latency). Raport podaje łączny czas,
+koszt na typ akcji i szczytowe zużycie pamięci (tracemalloc, osobny przebieg); --save zapisuje
+wynik jako punkt odniesienia, a --compare zgłasza regresje ponad próg (kod wyjścia 1).
+
+Partie w korpusie pochodzą z botów (`record`) albo z logów telemetrii rozgrywek ludzi (`import`).
+Zapisany w repozytorium korpus zawiera na razie tylko partie botów ("source": "bot:<strategia>"), bo nie ma
+zebranych logów ludzi; cofnięcia są dokładane do partii botów losowo (`undo_rate`), żeby mieszanka
+akcji była bliższa ludzkiej. Partie ludzi dołącza się przez `import --append`, gdy pojawią się logi.
+Każda odtwarzana akcja musi się udać, a wynik partii zgadzać z zapisanym - zmiana reguł silnika
+wymaga nagrania korpusu na nowo.
+
+Uruchomienie:
+    python -m tools.bench_replay run --render --save baseline.json
+    python -m tools.bench_replay run --render --compare baseline.json
+    python -m tools.bench_replay record tools/replay_corpus.jsonl
+    python -m tools.bench_replay import telemetry/ tools/replay_corpus.jsonl --append
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from bots.policy import GameView, create_policy
+from bots.runner import DEFAULT_MAX_MOVES, DEFAULT_STALL_LIMIT, progress_key
+from game_logic.game_state import GameState
+from game_logic.move import Move
+from game_logic.variants import VARIANT_CLASSIC
+from ui import console_ui
+from utils.constants import DIFFICULTY_EASY, DIFFICULTY_HARD
+from utils.game_settings import get_default_settings as get_default_game_settings
+from utils.telemetry import EVENT_GAME_START, EVENT_ACTION, EVENT_UNDO
+from .stats import find_log_files, read_lines
+
+DEFAULT_CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "replay_corpus.jsonl")
+DEFAULT_REGRESSION_THRESHOLD = 0.10
+UNDO_COMMAND = "u"
+CATEGORY_QUERIES = "zapytania"
+CATEGORY_RENDER = "render"
+
+# (strategia, poziom, wariant, prawdopodobieństwo cofnięcia po ruchu, liczba partii) dla `record`.
+RECORD_PLAN = [
+    ("greedy", DIFFICULTY_EASY, VARIANT_CLASSIC, 0.05, 6),
+    ("greedy", DIFFICULTY_HARD, VARIANT_CLASSIC, 0.05, 4),
+    ("lookahead", DIFFICULTY_EASY, VARIANT_CLASSIC, 0.0, 4),
+    ("random", DIFFICULTY_EASY, VARIANT_CLASSIC, 0.15, 4),
+    ("greedy", DIFFICULTY_HARD, "klondike-3-limited", 0.05, 2),
+    ("lookahead", DIFFICULTY_EASY, "double-klondike", 0.0, 2),
+]
+
+
+def _settings_for(game: Dict[str, Any]) -> Dict[str, Any]:
+    settings = get_default_game_settings()
+    settings.update(game.get("settings", {}))
+    settings["difficulty"] = game["difficulty"]
+    return settings
+
+
+def load_corpus(path: str) -> List[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def write_corpus(path: str, games: Sequence[Dict[str, Any]], append: bool = False) -> None:
+    with open(path, "a" if append else "w", encoding="utf-8") as f:
+        for game in games:
+            f.write(json.dumps(game, ensure_ascii=False) + "\n")
+
+
+def record_bot_game(policy_name: str, seed: int, difficulty: str, variant: str, undo_rate: float,
+                    max_moves: int = DEFAULT_MAX_MOVES, stall_limit: int = DEFAULT_STALL_LIMIT) -> Dict[str, Any]:
+    """
+    Rozgrywa partię botem jak bots.runner.play_game i zapisuje ją jako komendy konsoli.
+    Po ruchu z prawdopodobieństwem `undo_rate` ruch jest cofany (bot może go potem powtórzyć),
+    żeby korpus zawierał też cofnięcia.
+    """
+    settings = get_default_game_settings()
+    settings["difficulty"] = difficulty
+    settings["variant"] = variant
+    game_state = GameState(difficulty, settings, seed=seed)
+    policy = create_policy(policy_name)
+    policy.reset(seed)
+    view = GameView(game_state)
+    rng = random.Random(seed)
+    commands: List[str] = []
+    last_progress = progress_key(game_state)
+    moves_without_progress = 0
+    while not game_state.check_win_condition() and len(commands) < max_moves:
+        legal_moves = game_state.get_legal_moves()
+        if not legal_moves:
+            break
+        move = policy.choose_move(view, legal_moves)
+        success, _ = game_state.apply_move(move)
+        if not success:
+            break
+        commands.append(str(move))
+        if rng.random() < undo_rate and game_state.undo_last_move():
+            commands.append(UNDO_COMMAND)
+        current_progress = progress_key(game_state)
+        if current_progress != last_progress:
+            last_progress, moves_without_progress = current_progress, 0
+        else:
+            moves_without_progress += 1
+            if moves_without_progress >= stall_limit:
+                break
+    return {"source": f"bot:{policy_name}", "difficulty": difficulty, "settings": {"variant": variant},
+            "seed": seed, "commands": commands,
+            "expected": {"moves": game_state.moves_count, "won": game_state.check_win_condition()}}
+
+
+def _canonical_command(raw_command: str) -> Optional[str]:
+    """Komenda wpisana przez gracza ("draw", "move w t1 2") w zapisie Move.__str__ ("d", "m W T1 2")."""
+    parts = raw_command.split()
+    if not parts:
+        return None
+    if parts[0] in ("draw", "d") and len(parts) == 1:
+        return "d"
+    if parts[0] in ("move", "m") and len(parts) in (3, 4):
+        return " ".join(["m"] + [part.upper() for part in parts[1:]])
+    return None
+
+
+def import_telemetry_games(paths: Sequence[str]) -> Iterator[Dict[str, Any]]:
+    """
+    Partie ludzi z logów telemetrii: udane komendy draw/move i cofnięcia w kolejności zdarzeń.
+    Oczekiwany wynik jest wyliczany przez odtworzenie, bo log nie zawiera stanu planszy.
+    """
+    games: Dict[str, Dict[str, Any]] = {}
+    order: List[str] = []
+    for path in find_log_files(paths):
+        for line in read_lines(path):
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            game_id = event.get("game_id")
+            if event.get("event") == EVENT_GAME_START and event.get("seed") is not None:
+                settings = dict(event.get("settings") or {})
+                games[game_id] = {"source": "human", "difficulty": settings.pop("difficulty", None) or DIFFICULTY_EASY,
+                                  "settings": settings, "seed": event["seed"], "commands": []}
+                order.append(game_id)
+            elif game_id in games and event.get("success"):
+                command = _canonical_command(event.get("command") or "")
+                if event.get("event") == EVENT_ACTION and command is not None:
+                    games[game_id]["commands"].append(command)
+                elif event.get("event") == EVENT_UNDO:
+                    games[game_id]["commands"].append(UNDO_COMMAND)
+    for game_id in order:
+        game = games[game_id]
+        if not game["commands"]:
+            continue
+        game_state = GameState(game["difficulty"], _settings_for(game), seed=game["seed"])
+        for command in game["commands"]:
+            _apply_command(game_state, command)
+        game["expected"] = {"moves": game_state.moves_count, "won": game_state.check_win_condition()}
+        yield game
+
+
+def _apply_command(game_state: GameState, command: str) -> str:
+    """Wykonuje komendę z korpusu i zwraca jej kategorię. ValueError, gdy się nie udała."""
+    if command == UNDO_COMMAND:
+        if not game_state.undo_last_move():
+            raise ValueError("cofnięcie nie powiodło się")
+        return "undo"
+    move = Move.parse(command)
+    success, message = game_state.apply_move(move)
+    if not success:
+        raise ValueError(message)
+    if move.is_draw:
+        category = "reshuffle" if game_state.last_action_was_reshuffle else "draw"
+        game_state.last_action_was_reshuffle = False
+        return category
+    return f"move {move.from_pile_type}->{move.to_pile_type}"
+
+
+class ReplayStats:
+    """Łączny czas i liczba wywołań według kategorii (typ akcji, zapytania pętli gry, render)."""
+    def __init__(self):
+        self.totals: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self.games = 0
+
+    def add(self, category: str, elapsed: float) -> None:
+        self.totals[category] = self.totals.get(category, 0.0) + elapsed
+        self.counts[category] = self.counts.get(category, 0) + 1
+
+    def keep_fastest(self, other: 'ReplayStats') -> None:
+        """Łączy powtórzenia: dla każdej kategorii zostaje najmniejszy łączny czas."""
+        for category, total in other.totals.items():
+            self.totals[category] = min(self.totals.get(category, total), total)
+            self.counts[category] = other.counts[category]
+        self.games = other.games
+
+
+def replay_corpus(games: Sequence[Dict[str, Any]], ui: Optional[console_ui.ConsoleUI] = None) -> ReplayStats:
+    """
+    Odtwarza wszystkie partie tak jak pętla gry i mierzy czas każdej fazy. Z `ui` plansza jest
+    rysowana po każdej akcji - jeden obiekt na cały pomiar, jak w grze (każdy ConsoleUI() owija
+    sys.stdout przez colorama od nowa).
+    """
+    stats = ReplayStats()
+    clock = time.perf_counter
+    original_clear_console = console_ui.clear_console
+    console_ui.clear_console = lambda: None
+    try:
+        for game_number, game in enumerate(games, 1):
+            settings = _settings_for(game)
+            game_state = GameState(game["difficulty"], settings, seed=game["seed"])
+            if ui is not None:
+                ui.update_settings_for_ui(settings)
+            buffer = io.StringIO()
+            for command in [None] + game["commands"]:
+                if command is not None:
+                    start = clock()
+                    try:
+                        category = _apply_command(game_state, command)
+                    except ValueError as e:
+                        raise ValueError(f"Partia {game_number} ({game.get('source')}, ziarno {game['seed']}): "
+                                         f"komenda '{command}' nie powiodła się ({e}). Nagraj korpus ponownie.")
+                    stats.add(category, clock() - start)
+                if ui is not None:
+                    start = clock()
+                    with contextlib.redirect_stdout(buffer):
+                        ui.display_board(game_state)
+                    stats.add(CATEGORY_RENDER, clock() - start)
+                    buffer.seek(0)
+                    buffer.truncate()
+                start = clock()
+                if not game_state.check_win_condition():
+                    if game_state.stock_pile.is_empty() and not game_state.can_recycle_stock():
+                        game_state.has_possible_moves()
+                stats.add(CATEGORY_QUERIES, clock() - start)
+            expected = game.get("expected")
+            actual = {"moves": game_state.moves_count, "won": game_state.check_win_condition()}
+            if expected is not None and expected != actual:
+                raise ValueError(f"Partia {game_number} (ziarno {game['seed']}): wynik {actual} zamiast {expected}.")
+            stats.games += 1
+    finally:
+        console_ui.clear_console = original_clear_console
+    return stats
+
+
+def measure_peak_memory(games: Sequence[Dict[str, Any]], ui: Optional[console_ui.ConsoleUI] = None) -> int:
+    """Szczytowa pamięć (bajty) zaalokowana podczas odtwarzania - osobny przebieg, bo tracemalloc spowalnia."""
+    tracemalloc.start()
+    try:
+        replay_corpus(games, ui)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def summarize(stats: ReplayStats, peak_bytes: Optional[int], render: bool) -> Dict[str, Any]:
+    categories = {category: {"count": stats.counts[category], "total_ms": total * 1000,
+                             "mean_us": total / stats.counts[category] * 1e6}
+                  for category, total in sorted(stats.totals.items())}
+    return {"games": stats.games, "render": render, "total_ms": sum(stats.totals.values()) * 1000,
+            "peak_kib": peak_bytes / 1024 if peak_bytes is not None else None, "categories": categories}
+
+
+def format_report(summary: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None,
+                  threshold: float = DEFAULT_REGRESSION_THRESHOLD) -> Tuple[str, List[str]]:
+    """Tekst raportu i lista regresji (wzrost czasu lub pamięci o więcej niż `threshold`)."""
+    regressions: List[str] = []
+
+    def delta(name: str, value: Optional[float], old: Optional[float]) -> str:
+        if value is None or not old:
+            return ""
+        change = (value - old) / old
+        if change > threshold:
+            regressions.append(f"{name}: {old:.2f} -> {value:.2f} ({change:+.1%})")
+        return f"  (było {old:.2f}, {change:+.1%})"
+
+    old_categories = baseline.get("categories", {}) if baseline else {}
+    lines = [f"partie: {summary['games']}, łącznie: {summary['total_ms']:.1f} ms"
+             + delta("łącznie [ms]", summary["total_ms"], baseline.get("total_ms") if baseline else None)]
+    if summary["peak_kib"] is not None:
+        lines.append(f"szczyt pamięci: {summary['peak_kib']:.0f} KiB"
+                     + delta("pamięć [KiB]", summary["peak_kib"], baseline.get("peak_kib") if baseline else None))
+    lines.append(f"  {'kategoria':<14} {'liczba':>8} {'łącznie ms':>11} {'µs/akcję':>10}")
+    for category, values in summary["categories"].items():
+        old_mean = old_categories.get(category, {}).get("mean_us")
+        lines.append(f"  {category:<14} {values['count']:>8d} {values['total_ms']:>11.2f} {values['mean_us']:>10.2f}"
+                     + delta(f"{category} [µs/akcję]", values["mean_us"], old_mean))
+    return "\n".join(lines), regressions
+
+
+def _run(args: argparse.Namespace) -> int:
+    games = load_corpus(args.corpus)
+    ui = console_ui.ConsoleUI() if args.render else None
+    best: Optional[ReplayStats] = None
+    for _ in range(args.repeat):
+        stats = replay_corpus(games, ui)
+        if best is None:
+            best = stats
+        else:
+            best.keep_fastest(stats)
+    peak_bytes = None if args.no_memory else measure_peak_memory(games, ui)
+    summary = summarize(best, peak_bytes, args.render)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("render") != summary["render"] or baseline.get("games") != summary["games"]:
+            print("Punkt odniesienia zmierzono z innym --render albo innym korpusem - porównanie pominięte.")
+            baseline = None
+    report, regressions = format_report(summary, baseline, args.threshold)
+    print(report)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+    if regressions:
+        print(f"Regresje ponad {args.threshold:.0%}:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    return 0
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Odtwarzanie korpusu nagranych partii przez silnik i renderer.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Odtwórz korpus i zmierz czas.")
+    run_parser.add_argument("--corpus", default=DEFAULT_CORPUS_PATH, help="Plik korpusu (JSON Lines).")
+    run_parser.add_argument("--render", action="store_true", help="Rysuj planszę po każdej akcji (do bufora).")
+    run_parser.add_argument("--repeat", type=int, default=3, help="Liczba powtórzeń (liczy się najszybsze).")
+    run_parser.add_argument("--no-memory", action="store_true", help="Pomiń pomiar pamięci.")
+    run_parser.add_argument("--save", metavar="PLIK", help="Zapisz wynik jako punkt odniesienia (JSON).")
+    run_parser.add_argument("--compare", metavar="PLIK", help="Porównaj z zapisanym punktem odniesienia.")
+    run_parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                            help="Próg regresji jako ułamek (domyślnie 0.10).")
+
+    record_parser = subparsers.add_parser("record", help="Nagraj partie botów według RECORD_PLAN.")
+    record_parser.add_argument("output", help="Plik korpusu do zapisania.")
+    record_parser.add_argument("--seed", type=int, default=0, help="Pierwsze ziarno rozdań.")
+
+    import_parser = subparsers.add_parser("import", help="Dołącz partie ludzi z logów telemetrii.")
+    import_parser.add_argument("paths", nargs="+", help="Pliki lub katalogi z logami, ostatni to plik korpusu.")
+    import_parser.add_argument("--append", action="store_true", help="Dopisz do istniejącego korpusu.")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        sys.exit(_run(args))
+    if args.command == "record":
+        games = []
+        seed = args.seed
+        for policy_name, difficulty, variant, undo_rate, count in RECORD_PLAN:
+            for _ in range(count):
+                games.append(record_bot_game(policy_name, seed, difficulty, variant, undo_rate))
+                seed += 1
+        write_corpus(args.output, games)
+        print(f"Zapisano {len(games)} partii ({sum(len(g['commands']) for g in games)} komend) do '{args.output}'.")
+        return
+    *log_paths, output = args.paths
+    if not log_paths:
+        parser.error("Podaj co najmniej jeden plik lub katalog z logami i plik korpusu.")
+    games = list(import_telemetry_games(log_paths))
+    write_corpus(output, games, append=args.append)
+    print(f"Zaimportowano {len(games)} partii do '{output}'.")
+
+
+if __name__ == "__main__":
+    main()
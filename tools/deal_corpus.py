@@ -0,0 +1,131 @@
+"""
+Korpus rozdań w płaskim pliku binarnym.
+
+Plik składa się z 32-bajtowego nagłówka i rekordów po 52 bajty - każdy bajt to kod
+karty (Card.to_code) w kolejności talii przed rozdaniem. Rozdania są generowane
+paczkami przez NumPy (wektorowe permutacje), a każda paczka ma własne ziarno
+wyprowadzone z (seed, numer paczki), więc ten sam korpus można odtworzyć wszędzie.
+Czytnik mapuje plik do pamięci, więc dowolne rozdanie N wczytuje się w O(1).
+
+Uruchomienie:
+    python -m tools.deal_corpus generate deals.bin --count 1000000 --seed 42
+    python -m tools.deal_corpus show deals.bin 12345
+"""
+import argparse
+import mmap
+import os
+import struct
+import time
+from typing import Any, Dict, Iterator, Optional, Sequence
+from game_logic.game_state import GameState
+from utils.constants import CARDS_PER_DECK, DIFFICULTY_EASY, DIFFICULTY_HARD
+
+CORPUS_MAGIC = b"PSJDEALS"
+CORPUS_VERSION = 1
+HEADER_FORMAT = "<8sHHIQQ"  # magic, wersja, rozmiar rekordu, rozmiar paczki, liczba rozdań, ziarno
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+RECORD_SIZE = CARDS_PER_DECK
+DEFAULT_BATCH_SIZE = 65536
+
+
+def generate_batches(count: int, seed: int, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator["np.ndarray"]:
+    """Zwraca kolejne paczki rozdań jako tablice uint8 o kształcie (n, 52)."""
+    import numpy as np
+
+    identity = np.arange(CARDS_PER_DECK, dtype=np.uint8)
+    for batch_index, start in enumerate(range(0, count, batch_size)):
+        size = min(batch_size, count - start)
+        rng = np.random.Generator(np.random.PCG64(np.random.SeedSequence([seed, batch_index])))
+        yield rng.permuted(np.broadcast_to(identity, (size, CARDS_PER_DECK)), axis=1)
+
+
+def write_corpus(path: str, count: int, seed: int, batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+    """Generuje `count` rozdań i zapisuje je do pliku `path`."""
+    with open(path, "wb") as f:
+        f.write(struct.pack(HEADER_FORMAT, CORPUS_MAGIC, CORPUS_VERSION, RECORD_SIZE, batch_size, count, seed))
+        for batch in generate_batches(count, seed, batch_size):
+            f.write(batch.tobytes())
+
+
+class DealCorpus:
+    """Czytnik korpusu rozdań mapowany do pamięci (bez wczytywania i parsowania całego pliku)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Plik korpusu '{path}' jest pusty.")
+        magic, version, record_size, self.batch_size, self.count, self.seed = \
+            struct.unpack_from(HEADER_FORMAT, self._mmap, 0)
+        if magic != CORPUS_MAGIC or version != CORPUS_VERSION or record_size != RECORD_SIZE:
+            self.close()
+            raise ValueError(f"Plik '{path}' nie jest korpusem rozdań w wersji {CORPUS_VERSION}.")
+        if len(self._mmap) < HEADER_SIZE + self.count * RECORD_SIZE:
+            self.close()
+            raise ValueError(f"Plik korpusu '{path}' jest niekompletny.")
+
+    def __len__(self) -> int:
+        return self.count
+
+    def deal_codes(self, index: int) -> bytes:
+        """Zwraca 52 kody kart rozdania o numerze `index`."""
+        if not 0 <= index < self.count:
+            raise IndexError(f"Brak rozdania {index} w korpusie ({self.count} rozdań).")
+        offset = HEADER_SIZE + index * RECORD_SIZE
+        return self._mmap[offset:offset + RECORD_SIZE]
+
+    def game_state(self, index: int, difficulty: str = DIFFICULTY_EASY,
+                   settings: Optional[Dict[str, Any]] = None) -> GameState:
+        """Tworzy GameState z rozdaniem `index` (ziarno tasowania Waste = numer rozdania)."""
+        return GameState(difficulty, settings, seed=index, deal=self.deal_codes(index))
+
+    def as_array(self) -> "np.ndarray":
+        """Zwraca cały korpus jako tablicę NumPy (n, 52) - widok na mapowaną pamięć, bez kopiowania."""
+        import numpy as np
+
+        return np.frombuffer(self._mmap, dtype=np.uint8, count=self.count * RECORD_SIZE,
+                             offset=HEADER_SIZE).reshape(self.count, RECORD_SIZE)
+
+    def close(self) -> None:
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self) -> "DealCorpus":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Generator i czytnik korpusu rozdań.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    generate_parser = subparsers.add_parser("generate", help="Wygeneruj korpus rozdań.")
+    generate_parser.add_argument("path")
+    generate_parser.add_argument("--count", type=int, default=1_000_000)
+    generate_parser.add_argument("--seed", type=int, default=0)
+    generate_parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    show_parser = subparsers.add_parser("show", help="Pokaż układ rozdania o podanym numerze.")
+    show_parser.add_argument("path")
+    show_parser.add_argument("index", type=int)
+    show_parser.add_argument("--difficulty", choices=[DIFFICULTY_EASY, DIFFICULTY_HARD], default=DIFFICULTY_EASY)
+    args = parser.parse_args(argv)
+
+    if args.command == "generate":
+        start_time = time.perf_counter()
+        write_corpus(args.path, args.count, args.seed, args.batch_size)
+        elapsed = time.perf_counter() - start_time
+        print(f"Zapisano {args.count} rozdań do '{args.path}' ({os.path.getsize(args.path)} B) w {elapsed:.2f} s.")
+    else:
+        with DealCorpus(args.path) as corpus:
+            game_state = corpus.game_state(args.index, args.difficulty)
+        for i, pile in enumerate(game_state.tableau_piles):
+            print(f"T{i + 1}: {pile}")
+        print(f"S: {' '.join(str(c) for c in game_state.stock_pile.cards)}")
+
+
+if __name__ == "__main__":
+    main()
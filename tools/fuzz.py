@@ -0,0 +1,487 @@
+"""
+Fuzzer silnika gry: losowe sekwencje dozwolonych i błędnych komend przeciw GameState
+ze sprawdzaniem niezmienników po każdym kroku.
+
+Każdy przypadek to rozdanie (ziarno wyznacza też wariant, poziom i ustawienia przekładania
+Waste) i lista akcji: ruch z listy dozwolonych, losowa komenda konsoli (także błędna),
+cofnięcie, dobieranie wielokrotne oraz próbne apply()/revert() jak w solverach. Po każdym
+kroku sprawdzane są niezmienniki: komplet kart (każdy kod tyle razy, ile talii), zakryte
+karty tylko pod odkrytymi, poprawne sekwencje fundamentów i odkrytych kart w kolumnach,
+niezmieniona plansza po odrzuconym ruchu, dokładny stan sprzed ruchu po undo i po revert.
+Co `--oracle-every` kroków lista ruchów z get_legal_moves() (indeksowana i zapamiętywana)
+jest porównywana z niezależnym wyliczeniem z definicji wariantu, a gra odtworzona z migawki -
+z oryginałem.
+
+Równolegle z grą działa bliźniak - druga implementacja silnika (`--engine moduł:Klasa`,
+domyślnie naiwny silnik wzorcowy tools.reference_engine.ReferenceGame na zwykłych listach),
+która musi dawać identyczne wyniki i planszę (łącznie ze stanem generatora) po każdej akcji.
+Bliźniak dostaje ruchy wybrane przez grę wprost, więc może wyliczać dozwolone ruchy w innej
+kolejności. Undo musi przywrócić dokładnie migawkę sprzed ruchu, także stan generatora po
+cofnięciu przełożenia Waste z tasowaniem. Przypadki są rozdzielane na pulę procesów;
+znalezione błędy są zmniejszane (usuwanie coraz mniejszych fragmentów listy akcji)
+do minimalnej reprodukcji zapisywanej jako JSON, którą odtwarza `--replay`.
+
+Jeden proces wykonuje około 0,2-0,25 mln akcji na minutę (przy --oracle-every 8; większość czasu
+to wyliczanie dozwolonych ruchów przez testowany GameState), więc milion akcji na minutę
+wymaga 4-5 rdzeni. Podsumowanie podaje wynik łączny i na proces.
+
+Uruchomienie:
+    python -m tools.fuzz --cases 2000 --steps 500 --workers 4
+    python -m tools.fuzz --engine game_logic.game_state:GameState --cases 200
+    python -m tools.fuzz --replay fuzz_failures/failure_1.json
+"""
+import argparse
+import importlib
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+from game_logic.game_state import GameState
+from game_logic.move import Move
+from game_logic.snapshot import GameSnapshot
+from game_logic.variants import VARIANTS, VARIANT_CLASSIC
+from utils.constants import DIFFICULTY_EASY, DIFFICULTY_HARD, MAX_UNDO_MOVES, PILE_FOUNDATION
+from utils.game_settings import get_default_settings as get_default_game_settings
+from .reference_engine import ReferenceGame, can_add_to_foundation, can_build
+
+DEFAULT_CASES = 200
+DEFAULT_STEPS = 400
+DEFAULT_ORACLE_EVERY = 8
+DEFAULT_CHUNK_SIZE = 10
+DEFAULT_FAILURES_DIR = "fuzz_failures"
+MAX_SHRINK_REPLAYS = 2000
+
+ACTION_LEGAL = "legal"
+ACTION_COMMAND = "cmd"
+ACTION_UNDO = "undo"
+ACTION_PROBE = "probe"
+ACTION_DRAW_UNTIL = "draw_until"
+ACTION_WEIGHTS = ((ACTION_LEGAL, 55), (ACTION_COMMAND, 20), (ACTION_UNDO, 10), (ACTION_PROBE, 10),
+                  (ACTION_DRAW_UNTIL, 5))
+# Elementy losowych komend - także stosy spoza planszy i błędna składnia.
+_COMMAND_PILES = ("W", "S", "X", "F0", "T0", "F99", "T99") + tuple(f"F{i}" for i in range(1, 9)) \
+    + tuple(f"T{i}" for i in range(1, 10))
+_GARBAGE_COMMANDS = ("", "m", "m T1", "m T1 T2 0", "m T1 T2 -1", "m T1 T2 x", "d d", "x", "m W", "m W F1 2")
+
+
+class InvariantViolation(Exception):
+    """Naruszenie niezmiennika; `kind` grupuje błędy (zmniejszanie zachowuje rodzaj błędu)."""
+    def __init__(self, kind: str, message: str):
+        super().__init__(f"{kind}: {message}")
+        self.kind = kind
+        self.message = message
+
+
+class Failure(NamedTuple):
+    kind: str
+    step: int
+    message: str
+
+
+class FuzzCase(NamedTuple):
+    """Przypadek testowy - reguły, ziarno rozdania i akcje (listy zapisywalne w JSON)."""
+    seed: int
+    difficulty: str
+    variant: str
+    reshuffle: bool
+    shuffle: bool
+    actions: List[list]
+
+    def settings(self) -> Dict[str, Any]:
+        settings = get_default_game_settings()
+        settings["variant"] = self.variant
+        settings["reshuffle_waste_on_empty_stock"] = self.reshuffle
+        settings["shuffle_waste_on_recycle"] = self.shuffle
+        return settings
+
+
+def case_rules(seed: int) -> Tuple[str, str, bool, bool]:
+    """Reguły przypadku wyznaczone przez ziarno: (poziom, wariant, przekładanie Waste, tasowanie)."""
+    rng = random.Random(f"rules-{seed}")
+    return (rng.choice((DIFFICULTY_EASY, DIFFICULTY_HARD)), rng.choice((VARIANT_CLASSIC, *VARIANTS)),
+            rng.random() < 0.8, rng.random() < 0.5)
+
+
+def random_command(rng: random.Random) -> str:
+    if rng.random() < 0.15:
+        return rng.choice(_GARBAGE_COMMANDS)
+    if rng.random() < 0.2:
+        return "d"
+    command = f"m {rng.choice(_COMMAND_PILES)} {rng.choice(_COMMAND_PILES)}"
+    if rng.random() < 0.3:
+        command += f" {rng.randint(0, 14)}"
+    return command
+
+
+def random_action(rng: random.Random) -> list:
+    kind = rng.choices([kind for kind, _ in ACTION_WEIGHTS], [weight for _, weight in ACTION_WEIGHTS])[0]
+    if kind in (ACTION_LEGAL, ACTION_PROBE):
+        return [kind, rng.randrange(1 << 16)]
+    if kind == ACTION_COMMAND:
+        return [kind, random_command(rng)]
+    if kind == ACTION_DRAW_UNTIL:
+        return [kind, rng.randint(0, 9)]
+    return [kind]
+
+
+def load_engine(spec: Optional[str]) -> type:
+    """
+    Klasa bliźniaka z zapisu 'moduł:Klasa' (domyślnie ReferenceGame). Musi mieć from_snapshot(), snapshot(),
+    get_legal_moves(), apply_move(), draw_until() i undo_last_move().
+    """
+    if not spec:
+        return ReferenceGame
+    module_name, _, class_name = spec.partition(":")
+    return getattr(importlib.import_module(module_name), class_name or "GameState")
+
+
+def execute(game: GameState, action: list) -> tuple:
+    """Wykonuje akcję na grze. Zwraca porównywalny opis wyniku (bez tekstów komunikatów)."""
+    kind = action[0]
+    if kind in (ACTION_LEGAL, ACTION_PROBE):
+        moves = game.get_legal_moves()
+        if not moves:
+            return (kind, None)
+        move = moves[action[1] % len(moves)]
+        if kind == ACTION_PROBE:
+            game.revert(game.apply(move))
+            return (kind, str(move))
+        return (kind, str(move), game.apply_move(move)[0])
+    if kind == ACTION_COMMAND:
+        try:
+            move = Move.parse(action[1])
+        except ValueError:
+            return (kind, None)
+        return (kind, str(move), game.apply_move(move)[0])
+    if kind == ACTION_UNDO:
+        return (kind, game.undo_last_move())
+    if kind == ACTION_DRAW_UNTIL:
+        return (kind, game.draw_until(action[1]))
+    raise ValueError(f"Nieznana akcja: {action!r}")
+
+
+def execute_twin(twin, action: list, result: tuple) -> tuple:
+    """
+    Ta sama akcja na bliźniaku. Ruch wylosowany z listy gry jest podawany wprost (bliźniak musi
+    go wykonać), a próbne apply()/revert() dotyczy tylko gry. Pełna lista ruchów bliźniaka nie jest
+    wyliczana w każdym kroku - listy porównuje check_oracles co `--oracle-every` kroków.
+    """
+    kind = action[0]
+    if kind == ACTION_PROBE:
+        return result
+    if kind == ACTION_LEGAL:
+        if result[1] is None:
+            twin_moves = twin.get_legal_moves()
+            return (kind, None) if not twin_moves else (kind, sorted(str(move) for move in twin_moves))
+        return (kind, result[1], twin.apply_move(Move.parse(result[1]))[0])
+    return execute(twin, action)
+
+
+def _state(snapshot: GameSnapshot) -> GameSnapshot:
+    """Migawka bez numeru wersji - do porównań stanu planszy."""
+    return snapshot._replace(version=0)
+
+
+def reference_legal_moves(game: GameState) -> Set[Move]:
+    """Dozwolone ruchy wyliczone przez silnik wzorcowy z migawki gry (wprost z reguł wariantu)."""
+    return set(ReferenceGame.from_snapshot(game.snapshot()).get_legal_moves())
+
+
+def check_invariants(game: GameState) -> None:
+    """Niezmienniki planszy, które muszą zachodzić po każdej akcji (także po błędnej komendzie)."""
+    variant = game.variant
+    rules = game.rules
+    talon = game.talon
+    codes = Counter([card.code for card in talon.ring]
+                    + [card.code for pile in game.tableau_piles + game.foundation_piles for card in pile.cards])
+    if sum(codes.values()) != rules.num_cards or any(count != rules.num_decks for count in codes.values()) \
+            or len(codes) * rules.num_decks != rules.num_cards:
+        raise InvariantViolation("cards", f"niepełny komplet kart: {sum(codes.values())} kart, {len(codes)} kodów")
+    if not 0 <= talon.cursor <= len(talon.ring):
+        raise InvariantViolation("talon", f"kursor {talon.cursor} poza buforem {len(talon.ring)}")
+    if any(not card.face_up for card in talon.ring[:talon.cursor]) \
+            or any(card.face_up for card in talon.ring[talon.cursor:]):
+        raise InvariantViolation("talon", "zakryta karta w Waste albo odkryta w talii")
+    for t_idx, pile in enumerate(game.tableau_piles):
+        cards = pile.cards
+        if cards and not cards[-1].face_up:
+            raise InvariantViolation("tableau", f"zakryty wierzch kolumny T{t_idx + 1}")
+        start = len(cards)
+        while start > 0 and cards[start - 1].face_up:
+            start -= 1
+        if any(card.face_up for card in cards[:start]):
+            raise InvariantViolation("tableau", f"odkryta karta pod zakrytą w kolumnie T{t_idx + 1}")
+        for below, above in zip(cards[start:], cards[start + 1:]):
+            if not can_build(variant, below, above):
+                raise InvariantViolation("tableau", f"błędna sekwencja w kolumnie T{t_idx + 1}: {below} {above}")
+    for f_idx, pile in enumerate(game.foundation_piles):
+        for i, card in enumerate(pile.cards):
+            if not card.face_up or not can_add_to_foundation(pile.cards[:i], card):
+                raise InvariantViolation("foundation", f"błędna sekwencja na fundamencie F{f_idx + 1}: {pile}")
+    max_passes = rules.max_stock_passes
+    if game.stock_recycles < 0 or (max_passes is not None and game.stock_recycles > max_passes - 1):
+        raise InvariantViolation("counters", f"liczba przełożeń talii {game.stock_recycles}")
+    if game.moves_count < 0:
+        raise InvariantViolation("counters", f"liczba ruchów {game.moves_count}")
+
+
+def check_oracles(game: GameState, restored: Optional[GameState] = None) -> None:
+    """
+    Kosztowniejsze porównania: lista ruchów z wyliczeniem wzorcowym i GameState odtworzony z migawki.
+    `restored` to gra tego samego wariantu, do której migawka jest wczytywana przez restore()
+    (bez niej - nowa gra z from_snapshot, co kosztuje rozdanie całej talii).
+    """
+    legal = game.get_legal_moves()
+    if legal != game._compute_legal_moves():
+        raise InvariantViolation("legal-memo", "zapamiętana lista ruchów różni się od wyliczonej na nowo")
+    if len(set(legal)) != len(legal):
+        raise InvariantViolation("legal-duplicates", f"powtórzone ruchy: {[str(m) for m in legal]}")
+    reference = reference_legal_moves(game)
+    if set(legal) != reference:
+        missing = sorted(str(m) for m in reference - set(legal))
+        extra = sorted(str(m) for m in set(legal) - reference)
+        raise InvariantViolation("legal-moves", f"brakujące {missing}, nadmiarowe {extra}")
+    if game.has_possible_moves() and not legal:
+        raise InvariantViolation("has-moves", "has_possible_moves() bez dozwolonych ruchów")
+    snapshot = game.snapshot()
+    if game.check_win_condition() != snapshot.is_won():
+        raise InvariantViolation("win", "check_win_condition() niezgodne z planszą")
+    if restored is None:
+        restored = GameState.from_snapshot(snapshot)
+    else:
+        restored.restore(snapshot)
+    if _state(restored.snapshot()) != _state(snapshot) or restored.get_legal_moves() != legal \
+            or restored.position_key() != game.position_key():
+        raise InvariantViolation("restore", "gra odtworzona z migawki różni się od oryginału")
+
+
+class Harness:
+    """Gra i jej bliźniak (druga implementacja silnika) wykonujące te same akcje z kontrolą po każdym kroku."""
+    def __init__(self, case: FuzzCase, engine: type = ReferenceGame, oracle_every: int = DEFAULT_ORACLE_EVERY):
+        self.oracle_every = oracle_every
+        self.game = GameState(case.difficulty, case.settings(), seed=case.seed)
+        self.twin = engine.from_snapshot(self.game.snapshot())
+        # Gra, do której check_oracles wczytuje migawki (from_snapshot sprawdzane raz, przy tworzeniu).
+        self.restored = GameState.from_snapshot(self.game.snapshot())
+        # Migawki sprzed ruchów, które undo może jeszcze cofnąć (tyle, ile trzyma move_history).
+        self.undo_stack: List[GameSnapshot] = []
+        self.steps = 0
+        # Migawka po poprzednim kroku - kontrole między krokami tylko czytają grę, więc jest też stanem sprzed następnego.
+        self.last_snapshot = self.game.snapshot()
+
+    def step(self, action: list) -> tuple:
+        game = self.game
+        before = self.last_snapshot
+        legal_before = game.get_legal_moves()
+        try:
+            result = execute(game, action)
+        except Exception as e:
+            raise InvariantViolation("exception", f"{type(e).__name__}: {e}")
+        try:
+            twin_result = execute_twin(self.twin, action, result)
+        except Exception as e:
+            raise InvariantViolation("twin-exception", f"{type(e).__name__}: {e}")
+        after = self.last_snapshot = game.snapshot()
+        self.steps += 1
+
+        kind = action[0]
+        changed = _state(after) != _state(before)
+        if kind in (ACTION_LEGAL, ACTION_COMMAND) and result[1] is not None:
+            move, success = Move.parse(result[1]), result[2]
+            foundation_shuffle = move.from_pile_type == PILE_FOUNDATION and move.to_pile_type == PILE_FOUNDATION
+            if success and move not in legal_before and not foundation_shuffle:
+                raise InvariantViolation("illegal-accepted", f"wykonano ruch spoza listy dozwolonych: {move}")
+            if not success and move in legal_before:
+                raise InvariantViolation("legal-rejected", f"odrzucono dozwolony ruch: {move}")
+            self._check_outcome(success, changed, before, str(move))
+        elif kind == ACTION_DRAW_UNTIL:
+            self._check_outcome(result[1], changed, before, f"draw_until {action[1]}")
+        elif kind == ACTION_UNDO:
+            if result[1]:
+                expected = self.undo_stack.pop() if self.undo_stack else None
+                if expected is None or _state(after) != _state(expected):
+                    raise InvariantViolation("undo", "undo nie przywróciło planszy sprzed ruchu")
+            elif self.undo_stack or changed:
+                raise InvariantViolation("undo", "odrzucone undo mimo historii albo zmiana planszy")
+        elif changed:
+            raise InvariantViolation("unchanged", f"akcja {action!r} zmieniła planszę ({result!r})")
+
+        if twin_result != result:
+            raise InvariantViolation("twin", f"wynik bliźniaka {twin_result!r} zamiast {result!r}")
+        if _state(self.twin.snapshot()) != _state(after):
+            raise InvariantViolation("twin", "plansza bliźniaka różni się od planszy gry")
+        check_invariants(game)
+        if self.oracle_every and self.steps % self.oracle_every == 0:
+            check_oracles(game, self.restored)
+        return result
+
+    def _check_outcome(self, success: bool, changed: bool, before: GameSnapshot, description: str) -> None:
+        if not success:
+            if changed:
+                raise InvariantViolation("rejected-changed", f"odrzucony ruch {description} zmienił planszę")
+            return
+        if not changed:
+            raise InvariantViolation("accepted-unchanged", f"ruch {description} nie zmienił planszy")
+        self.undo_stack.append(before)
+        if len(self.undo_stack) > MAX_UNDO_MOVES:
+            self.undo_stack.pop(0)
+
+
+def replay(case: FuzzCase, engine: type = ReferenceGame, oracle_every: int = 1) -> Optional[Failure]:
+    """Odtwarza przypadek; zwraca pierwsze naruszenie (None, gdy wszystkie kroki przeszły)."""
+    try:
+        harness = Harness(case, engine, oracle_every)
+    except Exception as e:
+        return Failure("exception", 0, f"{type(e).__name__}: {e}")
+    for i, action in enumerate(case.actions):
+        try:
+            harness.step(action)
+        except InvariantViolation as e:
+            return Failure(e.kind, i, e.message)
+    return None
+
+
+def shrink(case: FuzzCase, failure: Failure, engine: type = ReferenceGame,
+           max_replays: int = MAX_SHRINK_REPLAYS) -> Tuple[FuzzCase, Failure]:
+    """
+    Zmniejsza przypadek z zachowaniem rodzaju błędu: obcina akcje po błędzie, a potem usuwa
+    coraz mniejsze fragmenty listy akcji (aż do pojedynczych), dopóki błąd się powtarza.
+    """
+    actions = case.actions[:failure.step + 1]
+    replays = 0
+    chunk = max(1, len(actions) // 2)
+    while chunk >= 1 and replays < max_replays:
+        i = 0
+        while i < len(actions) and replays < max_replays:
+            candidate = case._replace(actions=actions[:i] + actions[i + chunk:])
+            result = replay(candidate, engine)
+            replays += 1
+            if result is not None and result.kind == failure.kind:
+                actions = candidate.actions[:result.step + 1]
+                failure = result
+            else:
+                i += chunk
+        chunk //= 2
+    return case._replace(actions=actions), failure
+
+
+def _generate_and_run(seed: int, steps: int, engine: type, oracle_every: int) -> Tuple[int, Optional[Tuple[FuzzCase, Failure]]]:
+    difficulty, variant, reshuffle, shuffle = case_rules(seed)
+    case = FuzzCase(seed, difficulty, variant, reshuffle, shuffle, [])
+    rng = random.Random(seed)
+    try:
+        harness = Harness(case, engine, oracle_every)
+    except Exception as e:
+        return 0, (case, Failure("exception", 0, f"{type(e).__name__}: {e}"))
+    for i in range(steps):
+        action = random_action(rng)
+        case.actions.append(action)
+        try:
+            harness.step(action)
+        except InvariantViolation as e:
+            return i + 1, (case, Failure(e.kind, i, e.message))
+    return steps, None
+
+
+def _run_chunk(task: Tuple[Sequence[int], int, Optional[str], int]) -> Tuple[int, List[Tuple[FuzzCase, Failure]]]:
+    seeds, steps, engine_spec, oracle_every = task
+    engine = load_engine(engine_spec)
+    total_actions = 0
+    failures = []
+    for seed in seeds:
+        actions, failure = _generate_and_run(seed, steps, engine, oracle_every)
+        total_actions += actions
+        if failure is not None:
+            failures.append(failure)
+    return total_actions, failures
+
+
+def save_case(path: str, case: FuzzCase, failure: Failure) -> None:
+    data = case._asdict()
+    data["failure"] = failure._asdict()
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+
+
+def load_case(path: str) -> FuzzCase:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return FuzzCase(data["seed"], data["difficulty"], data["variant"], data["reshuffle"], data["shuffle"],
+                    data["actions"])
+
+
+def _replay_verbose(case: FuzzCase, engine: type) -> Optional[Failure]:
+    print(f"Rozdanie {case.seed}: {case.variant}/{case.difficulty}, przekładanie={case.reshuffle}, "
+          f"tasowanie={case.shuffle}, {len(case.actions)} akcji")
+    harness = Harness(case, engine, oracle_every=1)
+    for i, action in enumerate(case.actions):
+        try:
+            result = harness.step(action)
+        except InvariantViolation as e:
+            print(f"  {i:>4}: {action!r} -> BŁĄD {e}")
+            return Failure(e.kind, i, e.message)
+        print(f"  {i:>4}: {action!r} -> {result!r}")
+    return None
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Fuzzer silnika gry z kontrolą niezmienników.")
+    parser.add_argument("--cases", type=int, default=DEFAULT_CASES, help="Liczba przypadków (rozdań).")
+    parser.add_argument("--steps", type=int, default=DEFAULT_STEPS, help="Akcje na przypadek.")
+    parser.add_argument("--seed", type=int, default=0, help="Pierwsze ziarno przypadków.")
+    parser.add_argument("--oracle-every", type=int, default=DEFAULT_ORACLE_EVERY,
+                        help="Co ile kroków porównywać ruchy z wyliczeniem wzorcowym (0 = nigdy).")
+    parser.add_argument("--engine", metavar="MODUŁ:KLASA",
+                        help="Druga implementacja silnika sprawdzana krok w krok (domyślnie tools.reference_engine:ReferenceGame).")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Liczba procesów.")
+    parser.add_argument("--failures", default=DEFAULT_FAILURES_DIR, help="Katalog na zmniejszone reprodukcje.")
+    parser.add_argument("--replay", metavar="PLIK", help="Odtwórz zapisany przypadek krok po kroku.")
+    args = parser.parse_args(argv)
+    engine = load_engine(args.engine)
+
+    if args.replay:
+        failure = _replay_verbose(load_case(args.replay), engine)
+        print("Brak błędów." if failure is None else f"Błąd {failure.kind} w kroku {failure.step}: {failure.message}")
+        sys.exit(1 if failure else 0)
+
+    seeds = list(range(args.seed, args.seed + args.cases))
+    tasks = [(seeds[i:i + DEFAULT_CHUNK_SIZE], args.steps, args.engine, args.oracle_every)
+             for i in range(0, len(seeds), DEFAULT_CHUNK_SIZE)]
+    start_time = time.perf_counter()
+    total_actions = 0
+    failures: List[Tuple[FuzzCase, Failure]] = []
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        for actions, chunk_failures in executor.map(_run_chunk, tasks):
+            total_actions += actions
+            failures.extend(chunk_failures)
+    elapsed = time.perf_counter() - start_time
+    rate = total_actions / elapsed if elapsed > 0 else 0.0
+    workers_used = max(1, min(args.workers or os.cpu_count() or 1, len(tasks)))
+    print(f"{args.cases} przypadków, {total_actions} akcji w {elapsed:.1f} s "
+          f"({rate:.0f} akcji/s, {rate * 60 / 1e6:.2f} mln akcji/min; "
+          f"{rate * 60 / 1e6 / workers_used:.2f} mln akcji/min na proces, {workers_used} proc.)")
+
+    if not failures:
+        print("Brak naruszeń niezmienników.")
+        return
+    os.makedirs(args.failures, exist_ok=True)
+    seen_kinds: Set[str] = set()
+    for number, (case, failure) in enumerate(failures, 1):
+        if failure.kind in seen_kinds:
+            print(f"  rozdanie {case.seed}: {failure.kind} (ten sam rodzaj co wcześniej, bez zmniejszania)")
+            continue
+        seen_kinds.add(failure.kind)
+        small_case, small_failure = shrink(case, failure, engine)
+        path = os.path.join(args.failures, f"failure_{number}.json")
+        save_case(path, small_case, small_failure)
+        print(f"  rozdanie {case.seed}: {small_failure.kind} - {small_failure.message}")
+        print(f"    {len(case.actions)} -> {len(small_case.actions)} akcji, reprodukcja: '{path}'")
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
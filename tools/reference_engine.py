@@ -0,0 +1,219 @@
+"""
+Wzorcowa, celowo naiwna implementacja silnika gry - bliźniak GameState dla tools.fuzz.
+
+Reguły są tu czytane wprost z definicji wariantu (game_logic.variants.Variant: zasada budowania,
+pusta kolumna, dobieranie, limit przejść), a plansza to zwykłe listy kart CardSnapshot: talia
+w kolejności dobierania i Waste osobno, bez wspólnego bufora z kursorem, tablic CompiledRules,
+indeksów kodów, wersji i pamięci podręcznej. Historia ruchów to pełne kopie planszy sprzed
+ruchu, więc undo nie zależy od zapisu akcji w GameState. Wspólny z GameState jest tylko
+generator random.Random (ta sama kolejność tasowania Waste) i format migawki, przez który
+obie implementacje są porównywane po każdej akcji fuzzera.
+"""
+import random
+from typing import Any, Dict, List, Optional, Set, Tuple
+from game_logic.move import Move, DRAW_MOVE
+from game_logic.snapshot import CardSnapshot, GameSnapshot
+from game_logic.variants import VARIANTS, BUILD_ALTERNATE_COLOR, BUILD_SAME_SUIT, EMPTY_COLUMN_ANY, Variant
+from utils.constants import MAX_UNDO_MOVES, PILE_FOUNDATION, PILE_TABLEAU, PILE_WASTE, Rank
+
+
+def can_build(variant: Variant, top: CardSnapshot, card: CardSnapshot) -> bool:
+    """Czy `card` można położyć na odkrytym `top` w kolumnie (z definicji wariantu)."""
+    if card.rank.value != top.rank.value - 1:
+        return False
+    if variant.build_rule == BUILD_ALTERNATE_COLOR:
+        return card.suit.color != top.suit.color
+    if variant.build_rule == BUILD_SAME_SUIT:
+        return card.suit == top.suit
+    return True
+
+
+def can_start_column(variant: Variant, card: CardSnapshot) -> bool:
+    return variant.empty_column_rule == EMPTY_COLUMN_ANY or card.rank == Rank.KING
+
+
+def can_add_to_foundation(pile: List[CardSnapshot], card: CardSnapshot) -> bool:
+    if not pile:
+        return card.rank == Rank.ACE
+    top = pile[-1]
+    return card.suit == top.suit and card.rank.value == top.rank.value + 1
+
+
+def _face_up(card: CardSnapshot, face_up: bool = True) -> CardSnapshot:
+    return CardSnapshot(card.code, face_up)
+
+
+class ReferenceGame:
+    """
+    Gra z migawki (tylko from_snapshot) z interfejsem używanym przez fuzzer: get_legal_moves(),
+    apply_move(), draw_until(), undo_last_move() i snapshot().
+    """
+    def __init__(self, snapshot: GameSnapshot):
+        self.variant = VARIANTS[snapshot.variant_name]
+        self.difficulty = snapshot.difficulty
+        self.settings = snapshot.settings
+        self.seed = snapshot.seed
+        self.deal_number = snapshot.deal_number
+        self.tableau: List[List[CardSnapshot]] = [list(pile) for pile in snapshot.tableau]
+        self.foundations: List[List[CardSnapshot]] = [list(pile) for pile in snapshot.foundations]
+        self.waste: List[CardSnapshot] = list(snapshot.waste)
+        # Talia w kolejności dobierania (następna karta na początku).
+        self.stock: List[CardSnapshot] = [CardSnapshot(code, False) for code in snapshot.talon[snapshot.talon_cursor:]]
+        self.stock_recycles = snapshot.stock_recycles
+        self.moves_count = snapshot.moves_count
+        self.rng = random.Random()
+        self.rng.setstate(snapshot.rng_state)
+        self.history: List[Tuple[Dict[str, Any], int]] = []
+
+    @classmethod
+    def from_snapshot(cls, snapshot: GameSnapshot) -> 'ReferenceGame':
+        return cls(snapshot)
+
+    def snapshot(self) -> GameSnapshot:
+        """Migawka w formacie GameState.snapshot() (bez numeru wersji - zawsze 0)."""
+        return GameSnapshot(
+            0, self.variant.name, self.difficulty, self.settings, self.seed, self.deal_number,
+            tuple(tuple(pile) for pile in self.tableau), tuple(tuple(pile) for pile in self.foundations),
+            tuple(card.code for card in self.waste + self.stock), len(self.waste),
+            self.stock_recycles, self.moves_count, self.rng.getstate())
+
+    def _setting(self, name: str) -> bool:
+        return dict(self.settings).get(name, True)
+
+    def _can_recycle(self) -> bool:
+        max_passes = self.variant.max_stock_passes
+        return bool(self.waste) and not self.stock and self._setting("reshuffle_waste_on_empty_stock") \
+            and (max_passes is None or self.stock_recycles < max_passes - 1)
+
+    def _save(self, num_moves: int) -> None:
+        board = {
+            "tableau": [list(pile) for pile in self.tableau],
+            "foundations": [list(pile) for pile in self.foundations],
+            "waste": list(self.waste),
+            "stock": list(self.stock),
+            "stock_recycles": self.stock_recycles,
+            "rng_state": self.rng.getstate(),
+        }
+        self.history.append((board, num_moves))
+        if len(self.history) > MAX_UNDO_MOVES:
+            self.history.pop(0)
+
+    def get_legal_moves(self) -> List[Move]:
+        """Wszystkie dozwolone ruchy (bez przenoszenia między fundamentami), w dowolnej kolejności."""
+        moves: Set[Move] = set()
+        if self.stock or self._can_recycle():
+            moves.add(DRAW_MOVE)
+
+        def add_single_card_moves(card: CardSnapshot, source_type: str, source_idx: Optional[int]) -> None:
+            for f_idx, pile in enumerate(self.foundations):
+                if source_type != PILE_FOUNDATION and can_add_to_foundation(pile, card):
+                    moves.add(Move(source_type, source_idx, PILE_FOUNDATION, f_idx))
+            for t_idx, column in enumerate(self.tableau):
+                if (column and column[-1].face_up and can_build(self.variant, column[-1], card)) \
+                        or (not column and can_start_column(self.variant, card)):
+                    moves.add(Move(source_type, source_idx, PILE_TABLEAU, t_idx))
+
+        if self.waste:
+            add_single_card_moves(self.waste[-1], PILE_WASTE, None)
+        for f_idx, pile in enumerate(self.foundations):
+            if pile:
+                add_single_card_moves(pile[-1], PILE_FOUNDATION, f_idx)
+        for t_idx, column in enumerate(self.tableau):
+            if not column or not column[-1].face_up:
+                continue
+            for f_idx, pile in enumerate(self.foundations):
+                if can_add_to_foundation(pile, column[-1]):
+                    moves.add(Move(PILE_TABLEAU, t_idx, PILE_FOUNDATION, f_idx))
+            start = len(column)
+            while start > 0 and column[start - 1].face_up:
+                start -= 1
+            for k in range(start, len(column)):
+                for dest_idx, dest in enumerate(self.tableau):
+                    if dest_idx == t_idx:
+                        continue
+                    if (dest and dest[-1].face_up and can_build(self.variant, dest[-1], column[k])) \
+                            or (not dest and can_start_column(self.variant, column[k])):
+                        moves.add(Move(PILE_TABLEAU, t_idx, PILE_TABLEAU, dest_idx, len(column) - k))
+        return list(moves)
+
+    def _draw(self, count: int) -> None:
+        self.waste.extend(_face_up(card) for card in self.stock[:count])
+        del self.stock[:count]
+
+    def apply_move(self, move: Move) -> Tuple[bool, str]:
+        """Wykonuje ruch gracza (z zapisem do undo); zwraca (sukces, komunikat) jak GameState.apply_move."""
+        if move.is_draw:
+            if self.stock:
+                self._save(1)
+                self._draw(self.variant.draw_count)
+            elif self._can_recycle():
+                self._save(1)
+                self.stock = [_face_up(card, False) for card in self.waste]
+                self.waste = []
+                if self._setting("shuffle_waste_on_recycle"):
+                    self.rng.shuffle(self.stock)
+                self.stock_recycles += 1
+            else:
+                return False, "Brak kart do pociągnięcia."
+            self.moves_count += 1
+            return True, "Pociągnięto karty."
+
+        source = self._pile(move.from_pile_type, move.from_idx)
+        dest = self._pile(move.to_pile_type, move.to_idx)
+        if source is None or dest is None or move.to_pile_type == PILE_WASTE:
+            return False, "Nieprawidłowy stos."
+        if move.from_pile_type != PILE_TABLEAU and move.num_cards != 1:
+            return False, "Tylko 1 karta."
+        if not 1 <= move.num_cards <= len(source):
+            return False, "Nie można przenieść."
+        cards = source[-move.num_cards:]
+        if not all(card.face_up for card in cards):
+            return False, "Nie można przenieść."
+        if move.to_pile_type == PILE_FOUNDATION:
+            allowed = len(cards) == 1 and can_add_to_foundation(dest, cards[0])
+        elif dest:
+            allowed = dest[-1].face_up and can_build(self.variant, dest[-1], cards[0])
+        else:
+            allowed = can_start_column(self.variant, cards[0])
+        if not allowed:
+            return False, "Nieprawidłowy ruch do celu."
+
+        self._save(1)
+        del source[-move.num_cards:]
+        if move.from_pile_type == PILE_TABLEAU and source and not source[-1].face_up:
+            source[-1] = _face_up(source[-1])
+        dest.extend(cards)
+        self.moves_count += 1
+        return True, "Ruch wykonany."
+
+    def _pile(self, pile_type: str, index: Optional[int]) -> Optional[List[CardSnapshot]]:
+        if pile_type == PILE_WASTE:
+            return self.waste
+        piles = {PILE_FOUNDATION: self.foundations, PILE_TABLEAU: self.tableau}.get(pile_type)
+        if piles is None or index is None or not 0 <= index < len(piles):
+            return None
+        return piles[index]
+
+    def draw_until(self, num_draws: int) -> bool:
+        """`num_draws` dobrań w bieżącym przejściu przez talię jako jeden wpis historii."""
+        draw_count = self.variant.draw_count
+        if not 0 < num_draws <= (len(self.stock) + draw_count - 1) // draw_count:
+            return False
+        self._save(num_draws)
+        self._draw(num_draws * draw_count)
+        self.moves_count += num_draws
+        return True
+
+    def undo_last_move(self) -> bool:
+        """Przywraca planszę sprzed ostatniego ruchu (łącznie ze stanem generatora)."""
+        if not self.history:
+            return False
+        board, num_moves = self.history.pop()
+        self.tableau = board["tableau"]
+        self.foundations = board["foundations"]
+        self.waste = board["waste"]
+        self.stock = board["stock"]
+        self.stock_recycles = board["stock_recycles"]
+        self.rng.setstate(board["rng_state"])
+        self.moves_count = max(0, self.moves_count - num_moves)
+        return True
@@ -0,0 +1,265 @@
+"""
+pasjans-stats: strumieniowa analiza logów telemetrii (utils/telemetry.py).
+
+Pliki (również zrotowane i skompresowane gzipem) są czytane linia po linii przez
+potok generatorów, więc pamięć nie rośnie z rozmiarem logów. Każdy plik jest
+agregowany w osobnym procesie, a częściowe wyniki (liczniki i szkice kwantyli
+w stylu t-digest) są na końcu scalane.
+
+Uruchomienie:
+    python -m tools.stats telemetry/ --workers 4
+"""
+import argparse
+import collections
+import glob
+import gzip
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from utils.constants import ACTION_DRAW, ACTION_RESHUFFLE_STOCK, ACTION_MOVE
+from utils.telemetry import EVENT_GAME_START, EVENT_ACTION, EVENT_UNDO, EVENT_GAME_END, LOG_FILE_PREFIX
+
+DEFAULT_COMPRESSION = 100
+REPORTED_QUANTILES = (0.5, 0.9, 0.99)
+TOP_UNDONE_SITUATIONS = 10
+
+
+class QuantileDigest:
+    """
+    Szkic kwantyli w stylu t-digest: wartości są grupowane w centroidy, których dopuszczalna
+    waga maleje przy krańcach rozkładu, więc skrajne kwantyle pozostają dokładne.
+    Szkice można scalać, co pozwala liczyć kwantyle częściami w wielu procesach.
+    """
+    def __init__(self, compression: int = DEFAULT_COMPRESSION):
+        self.compression = compression
+        self.centroids: List[Tuple[float, float]] = []
+        self._buffer: List[Tuple[float, float]] = []
+        self.count = 0.0
+
+    def add(self, value: float, weight: float = 1.0) -> None:
+        self._buffer.append((value, weight))
+        self.count += weight
+        if len(self._buffer) >= 10 * self.compression:
+            self._compress()
+
+    def merge(self, other: 'QuantileDigest') -> None:
+        other._compress()
+        self._buffer.extend(other.centroids)
+        self.count += other.count
+        self._compress()
+
+    def _compress(self) -> None:
+        if not self._buffer:
+            return
+        points = sorted(self.centroids + self._buffer)
+        self._buffer = []
+        total = sum(w for _, w in points)
+        merged: List[Tuple[float, float]] = []
+        mean, weight = points[0]
+        cumulative = 0.0
+        for value, w in points[1:]:
+            q = (cumulative + weight + w / 2) / total
+            limit = max(1.0, 4 * total * q * (1 - q) / self.compression)
+            if weight + w <= limit:
+                mean += (value - mean) * w / (weight + w)
+                weight += w
+            else:
+                merged.append((mean, weight))
+                cumulative += weight
+                mean, weight = value, w
+        merged.append((mean, weight))
+        self.centroids = merged
+
+    def quantile(self, q: float) -> Optional[float]:
+        self._compress()
+        if not self.centroids:
+            return None
+        if len(self.centroids) == 1:
+            return self.centroids[0][0]
+        target = q * self.count
+        cumulative = 0.0
+        previous_mean, previous_mid = self.centroids[0][0], self.centroids[0][1] / 2
+        if target <= previous_mid:
+            return previous_mean
+        for mean, weight in self.centroids:
+            mid = cumulative + weight / 2
+            if target <= mid:
+                if mid == previous_mid:
+                    return mean
+                return previous_mean + (mean - previous_mean) * (target - previous_mid) / (mid - previous_mid)
+            previous_mean, previous_mid = mean, mid
+            cumulative += weight
+        return self.centroids[-1][0]
+
+
+class LogStats:
+    """Częściowe agregaty z jednego lub wielu plików logów; można je scalać przez merge()."""
+    def __init__(self):
+        self.events = 0
+        self.malformed_lines = 0
+        self.games_started = 0
+        self.results_by_difficulty: Dict[str, collections.Counter] = collections.defaultdict(collections.Counter)
+        self.moves_to_win = QuantileDigest()
+        self.moves_to_win_histogram: collections.Counter = collections.Counter()
+        self.think_time = QuantileDigest()
+        self.actions: collections.Counter = collections.Counter()
+        self.undone_situations: collections.Counter = collections.Counter()
+
+    def add_event(self, event: Dict[str, Any]) -> None:
+        self.events += 1
+        event_type = event.get("event")
+        if event_type == EVENT_GAME_START:
+            self.games_started += 1
+        elif event_type == EVENT_GAME_END:
+            difficulty = event.get("difficulty", "unknown")
+            result = event.get("result", "unknown")
+            self.results_by_difficulty[difficulty][result] += 1
+            if result == "win" and isinstance(event.get("moves"), int):
+                self.moves_to_win.add(event["moves"])
+                self.moves_to_win_histogram[event["moves"] // 10 * 10] += 1
+        elif event_type == EVENT_ACTION:
+            action = event.get("action")
+            if action in (ACTION_DRAW, ACTION_RESHUFFLE_STOCK, ACTION_MOVE):
+                self.actions[action if event.get("success") else f"{action} (błąd)"] += 1
+            if isinstance(event.get("think_time"), (int, float)):
+                self.think_time.add(event["think_time"])
+        elif event_type == EVENT_UNDO:
+            self.actions["undo"] += 1
+            situation = describe_undone_situation(event.get("undone"))
+            if situation:
+                self.undone_situations[situation] += 1
+
+    def merge(self, other: 'LogStats') -> None:
+        self.events += other.events
+        self.malformed_lines += other.malformed_lines
+        self.games_started += other.games_started
+        for difficulty, results in other.results_by_difficulty.items():
+            self.results_by_difficulty[difficulty].update(results)
+        self.moves_to_win.merge(other.moves_to_win)
+        self.moves_to_win_histogram.update(other.moves_to_win_histogram)
+        self.think_time.merge(other.think_time)
+        self.actions.update(other.actions)
+        self.undone_situations.update(other.undone_situations)
+
+
+def describe_undone_situation(undone: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Grupuje cofnięte akcje według typu i rodzaju stosów, np. 'move T->F' albo 'draw'."""
+    if not undone:
+        return None
+    if undone.get("type") != ACTION_MOVE:
+        return undone.get("type")
+    source, dest = str(undone.get("from", "?")), str(undone.get("to", "?"))
+    cards = undone.get("cards", 1)
+    suffix = f" ({cards} karty)" if isinstance(cards, int) and cards > 1 else ""
+    return f"{ACTION_MOVE} {source[:1]}->{dest[:1]}{suffix}"
+
+
+def find_log_files(paths: Sequence[str]) -> List[str]:
+    """Rozwija katalogi do listy plików logów (.jsonl i .jsonl.gz) posortowanych po nazwie."""
+    files: List[str] = []
+    for path in paths:
+        if os.path.isdir(path):
+            for pattern in (f"{LOG_FILE_PREFIX}-*.jsonl", f"{LOG_FILE_PREFIX}-*.jsonl.gz"):
+                files.extend(glob.glob(os.path.join(path, pattern)))
+        else:
+            files.append(path)
+    return sorted(files)
+
+
+def read_lines(path: str) -> Iterator[str]:
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        yield from f
+
+
+def parse_events(lines: Iterable[str], stats: LogStats) -> Iterator[Dict[str, Any]]:
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            event = json.loads(line)
+        except json.JSONDecodeError:
+            stats.malformed_lines += 1
+            continue
+        if isinstance(event, dict):
+            yield event
+        else:
+            stats.malformed_lines += 1
+
+
+def aggregate_file(path: str) -> LogStats:
+    """Agreguje jeden plik logu w stałej pamięci."""
+    stats = LogStats()
+    try:
+        for event in parse_events(read_lines(path), stats):
+            stats.add_event(event)
+    except (OSError, EOFError) as e:
+        # Ucięty plik (np. zapisywany w momencie awarii) - liczymy to, co dało się odczytać.
+        print(f"Warning: Could not fully read '{path}': {e}")
+    return stats
+
+
+def aggregate_files(files: Sequence[str], workers: Optional[int] = None) -> LogStats:
+    total = LogStats()
+    if workers == 1:
+        for path in files:
+            total.merge(aggregate_file(path))
+        return total
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for partial in executor.map(aggregate_file, files):
+            total.merge(partial)
+    return total
+
+
+def format_report(stats: LogStats) -> str:
+    lines = [f"Zdarzenia: {stats.events} (uszkodzone linie: {stats.malformed_lines}), rozpoczęte gry: {stats.games_started}"]
+    lines.append("")
+    lines.append("Wyniki według poziomu trudności:")
+    for difficulty, results in sorted(stats.results_by_difficulty.items()):
+        finished = results["win"] + results["loss"]
+        win_rate = f"{results['win'] / finished:.1%}" if finished else "n/d"
+        details = ", ".join(f"{result}: {count}" for result, count in sorted(results.items()))
+        lines.append(f"  {difficulty:<8} wygrane: {win_rate:>6}  ({details})")
+
+    lines.append("")
+    lines.append("Liczba ruchów do wygranej:")
+    for q in REPORTED_QUANTILES:
+        value = stats.moves_to_win.quantile(q)
+        lines.append(f"  p{int(q * 100):<3} {value:.0f}" if value is not None else f"  p{int(q * 100):<3} n/d")
+    for bucket, count in sorted(stats.moves_to_win_histogram.items()):
+        lines.append(f"  {bucket:>4}-{bucket + 9:<4} {count}")
+
+    lines.append("")
+    lines.append("Czas na ruch (sekundy):")
+    for q in REPORTED_QUANTILES:
+        value = stats.think_time.quantile(q)
+        lines.append(f"  p{int(q * 100):<3} {value:.2f}" if value is not None else f"  p{int(q * 100):<3} n/d")
+
+    lines.append("")
+    lines.append("Akcje:")
+    for action, count in stats.actions.most_common():
+        lines.append(f"  {action:<24} {count}")
+
+    lines.append("")
+    lines.append("Najczęściej cofane sytuacje:")
+    for situation, count in stats.undone_situations.most_common(TOP_UNDONE_SITUATIONS):
+        lines.append(f"  {situation:<24} {count}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(prog="pasjans-stats", description="Statystyki z logów telemetrii Pasjansa.")
+    parser.add_argument("paths", nargs="+", help="Pliki logów lub katalogi z logami.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Liczba procesów.")
+    args = parser.parse_args(argv)
+
+    files = find_log_files(args.paths)
+    if not files:
+        parser.error("Nie znaleziono plików logów.")
+    print(format_report(aggregate_files(files, args.workers)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,6 @@
+import os
+import shutil
+import sys
 from colorama import Fore, Style, init as colorama_init
 from typing import TYPE_CHECKING, List, Optional, Tuple, Dict, Any, Union
 from utils.constants import (
@@ -13,6 +16,9 @@ from utils.game_settings import (
     SETTING_OPTIONS_THEME, 
     SETTING_OPTIONS_BOOLEAN,
     SETTING_OPTIONS_RESHUFFLE, 
+    SETTING_OPTIONS_VARIANT,
+    SETTING_OPTIONS_SHUFFLE_RECYCLE,
+    SETTING_OPTIONS_DEAL_DIFFICULTY,
     get_default_settings as get_default_game_settings
 )
 from utils.helpers import clear_console, get_visible_length
@@ -20,11 +26,27 @@ from utils.helpers import clear_console, get_visible_length
 if TYPE_CHECKING:
     from game_logic.game_state import GameState
     from game_logic.card import Card
+    from bots.win_probability import WinProbabilityEstimate
+    from solver.search import SolveResult
+
+BOARD_RULE_WIDTH = 70
+# Wiersze planszy poza kolumnami tableau (nagłówek, talia, fundamenty, stopka) plus linia wejścia.
+BOARD_CHROME_LINES = 15
+MIN_TABLEAU_ROWS = 4
+FACE_DOWN_RUN_MARK = "×"
 
 class ConsoleUI:
     def __init__(self):
         colorama_init(autoreset=True)
         self.current_settings: Dict[str, Any] = get_default_game_settings()
+        # Kolumna tableau -> (stos, wersja stosu, styl, sformatowane karty)
+        self._column_render_cache: Dict[int, Tuple[Any, int, tuple, List[str]]] = {}
+        # O ile wierszy widok wysokich kolumn jest przesunięty od wierzchu stosów w stronę spodu.
+        self.tableau_scroll = 0
+        self._column_width_cache: Optional[Tuple[tuple, int]] = None
+        # Rozmiar terminala jest sprawdzany przy każdym rysowaniu (zmiana okna), a bez terminala - raz.
+        self._terminal_size: Optional[os.terminal_size] = None
+        self._follow_terminal_size = bool(sys.__stdout__ and sys.__stdout__.isatty())
 
     def update_settings_for_ui(self, settings: Dict[str, Any]):
         self.current_settings = settings.copy()
@@ -54,9 +76,7 @@ class ConsoleUI:
             elif active_card_style == CARD_STYLE_EMOJI: base_str = " "
             else: base_str = " " 
         elif not card.face_up:
-            if active_card_style == CARD_STYLE_ASCII: base_str = "[ XX ]"
-            elif active_card_style == CARD_STYLE_EMOJI: base_str = "🂠 "
-            else: base_str = FACE_DOWN_CARD_STR
+            base_str = self._face_down_str()
         else:
             red_color, black_color, _ = self._get_card_colors()
             card_color_code = red_color if card.color == "RED" else black_color
@@ -84,18 +104,88 @@ class ConsoleUI:
                 base_str = f"{card_color_code}{rank_symbol}{suit_symbol}{Style.RESET_ALL}"
         
         if target_visible_width is not None:
-            visible_len = get_visible_length(base_str)
-            padding_total = target_visible_width - visible_len
-            if padding_total > 0:
-                pad_left = padding_total // 2
-                pad_right = padding_total - pad_left
-                return (" " * pad_left) + base_str + (" " * pad_right)
+            return self._center(base_str, target_visible_width)
         return base_str
 
+    @staticmethod
+    def _center(text: str, width: int) -> str:
+        padding_total = width - get_visible_length(text)
+        if padding_total > 0:
+            pad_left = padding_total // 2
+            return (" " * pad_left) + text + (" " * (padding_total - pad_left))
+        return text
+
+    def _face_down_str(self) -> str:
+        active_card_style = self.current_settings.get("card_style", CARD_STYLE_MINIMAL)
+        if active_card_style == CARD_STYLE_ASCII: return "[ XX ]"
+        if active_card_style == CARD_STYLE_EMOJI: return "🂠 "
+        return FACE_DOWN_CARD_STR
+
+    def _face_down_run_str(self, count: int) -> str:
+        """Znacznik serii zakrytych kart, np. "[XX]×5" (pojedyncza zakryta karta bez licznika)."""
+        return self._face_down_str() + (f"{FACE_DOWN_RUN_MARK}{count}" if count > 1 else "")
+
+    def _tableau_column_cells(self, index: int, pile, width: int) -> List[str]:
+        """
+        Sformatowane komórki kolumny (od spodu): seria zakrytych kart jako jeden znacznik "[XX]×n",
+        potem odkryte karty. Zapamiętane do następnej zmiany stosu albo stylu kart.
+        """
+        style = (width, self.current_settings.get("card_style", CARD_STYLE_MINIMAL),
+                 self.current_settings.get("theme", THEME_DARK))
+        entry = self._column_render_cache.get(index)
+        if entry is not None and entry[0] is pile and entry[1] == pile.version and entry[2] == style:
+            return entry[3]
+        face_down = next((i for i, card in enumerate(pile.cards) if card.face_up), len(pile.cards))
+        cells = [self._center(self._face_down_run_str(face_down), width)] if face_down else []
+        cells.extend(self._get_card_display_str(card, width) for card in pile.cards[face_down:])
+        self._column_render_cache[index] = (pile, pile.version, style, cells)
+        return cells
+
+    def _tableau_column_width(self, piles, card_width: int) -> int:
+        """Szerokość kolumn tableau: karta albo najdłuższy znacznik serii zakrytych kart (zapamiętana do zmiany stosów)."""
+        key = (tuple(pile.version for pile in piles), card_width, self.current_settings.get("card_style", CARD_STYLE_MINIMAL))
+        if self._column_width_cache is not None and self._column_width_cache[0] == key:
+            return self._column_width_cache[1]
+        longest_run = 0
+        for pile in piles:
+            run = 0
+            for card in pile.cards:
+                if card.face_up:
+                    break
+                run += 1
+            longest_run = max(longest_run, run)
+        width = max(card_width, len(self._face_down_run_str(longest_run)))
+        self._column_width_cache = (key, width)
+        return width
+
+    def _tableau_window(self, cells: List[str], rows: int, width: int) -> List[str]:
+        """
+        Widoczna część kolumny w `rows` wierszach. Kolumna, która się nie mieści, pokazuje wierzch
+        stosu przesunięty o tableau_scroll w stronę spodu, a ukryte komórki jako "↑k" / "↓k".
+        """
+        if len(cells) <= rows:
+            return cells
+        offset = max(0, min(self.tableau_scroll, len(cells) - (rows - 2)))
+        end = len(cells) - offset
+        start = max(0, end - (rows - 1 - (1 if offset else 0)))
+        window = [self._center(f"↑{start}", width)] if start else []
+        window.extend(cells[start:end])
+        if offset:
+            window.append(self._center(f"↓{offset}", width))
+        return window
+
+    def scroll_tableau(self, rows: Optional[int] = None):
+        """Przesuwa widok wysokich kolumn o `rows` wierszy w stronę spodu stosów (ujemne - z powrotem); None wraca do wierzchu."""
+        self.tableau_scroll = 0 if rows is None else max(0, self.tableau_scroll + rows)
+
     def display_board(self, game_state: 'GameState'):
         clear_console()
         _, _, default_text_color = self._get_card_colors()
-        print(f"{default_text_color}" + "="*70 + "\n")
+        if self._terminal_size is None or self._follow_terminal_size:
+            self._terminal_size = shutil.get_terminal_size()
+        terminal = self._terminal_size
+        rule_width = min(BOARD_RULE_WIDTH, terminal.columns)
+        print(f"{default_text_color}" + "=" * rule_width + "\n")
 
         stock_obj = game_state.stock_pile
         waste_obj = game_state.waste_pile
@@ -116,7 +206,7 @@ class ConsoleUI:
             if get_visible_length(stock_display_str) < single_card_target_width :
                 stock_display_str += " " * (single_card_target_width - get_visible_length(stock_display_str))
 
-        waste_display_cards = waste_obj.get_display_cards(game_state.difficulty)
+        waste_display_cards = waste_obj.get_display_cards()
         if not waste_display_cards:
             waste_str_display = self._get_card_display_str(None, single_card_target_width, is_other_empty_slot=True)
         else:
@@ -124,7 +214,7 @@ class ConsoleUI:
             waste_str_display = ' '.join(waste_str_parts)
         
         print(f"{default_text_color}{PILE_STOCK:<3}: {stock_display_str}       {PILE_WASTE:<3}: {waste_str_display}")
-        print(f"{default_text_color}" + "-" * 70)
+        print(f"{default_text_color}" + "-" * rule_width)
 
         f_header = "Foundations: "
         f_display_parts = []
@@ -138,41 +228,48 @@ class ConsoleUI:
             part_str = label + card_str_formatted
             f_display_parts.append(part_str.ljust(foundation_element_width))
 
-        print(f"{default_text_color}{f_header}" + "".join(f_display_parts))
-        print(f"{default_text_color}" + "-" * 70)
-
-        print(f"{default_text_color}Tableaus:")
-        tableau_col_visible_width = single_card_target_width
-        header_parts = [f"{PILE_TABLEAU}{i+1}".center(tableau_col_visible_width) for i in range(NUM_TABLEAU_PILES)]
-        print(f"{default_text_color}  " + "  ".join(header_parts))
+        per_line = max(1, (terminal.columns - len(f_header)) // foundation_element_width)
+        for start in range(0, len(f_display_parts), per_line):
+            label = f_header if start == 0 else " " * len(f_header)
+            print(f"{default_text_color}{label}" + "".join(f_display_parts[start:start + per_line]))
+        print(f"{default_text_color}" + "-" * rule_width)
+
+        visible_rows = max(MIN_TABLEAU_ROWS, terminal.lines - BOARD_CHROME_LINES)
+        num_tableau_piles = len(game_state.tableau_piles)
+        tableau_col_visible_width = self._tableau_column_width(game_state.tableau_piles, single_card_target_width)
+        separator = "  " if 2 + num_tableau_piles * (tableau_col_visible_width + 2) - 2 <= terminal.columns else " "
+
+        columns = [self._tableau_column_cells(i, pile, tableau_col_visible_width)
+                   for i, pile in enumerate(game_state.tableau_piles)]
+        overflow = max((len(cells) for cells in columns), default=0) - visible_rows
+        self.tableau_scroll = min(self.tableau_scroll, overflow + 2) if overflow > 0 else 0
+        windows = columns if overflow <= 0 else \
+            [self._tableau_window(cells, visible_rows, tableau_col_visible_width) for cells in columns]
+        max_cards_in_tableau = max((len(cells) for cells in windows), default=0)
+        empty_tableau_cell = self._get_card_display_str(None, tableau_col_visible_width, is_tableau_empty_slot=True)
+
+        print(f"{default_text_color}Tableaus:" + (" ('scroll <n>' przewija wysokie kolumny)" if overflow > 0 else ""))
+        header_parts = [f"{PILE_TABLEAU}{i+1}".center(tableau_col_visible_width) for i in range(num_tableau_piles)]
+        print(f"{default_text_color}  " + separator.join(header_parts))
 
-        max_cards_in_tableau = 0
-        for pile in game_state.tableau_piles:
-            if len(pile.cards) > max_cards_in_tableau:
-                max_cards_in_tableau = len(pile.cards)
-        
         if max_cards_in_tableau == 0:
-             empty_tableau_cell = self._get_card_display_str(None, tableau_col_visible_width, is_tableau_empty_slot=True)
-             print(f"{default_text_color}  " + "  ".join([empty_tableau_cell] * NUM_TABLEAU_PILES))
-
-        for i in range(max_cards_in_tableau):
-            row_cells = []
-            for pile_obj in game_state.tableau_piles:
-                if i < len(pile_obj.cards):
-                    cell_content = self._get_card_display_str(pile_obj.cards[i], tableau_col_visible_width)
-                else:
-                    cell_content = self._get_card_display_str(None, tableau_col_visible_width, is_tableau_empty_slot=True)
-                row_cells.append(cell_content)
-            print(f"{default_text_color}  " + "  ".join(row_cells))
+             print(f"{default_text_color}  " + separator.join([empty_tableau_cell] * num_tableau_piles))
+
+        row_prefix = f"{default_text_color}  "
+        rows = [row_prefix + separator.join([cells[i] if i < len(cells) else empty_tableau_cell for cells in windows])
+                for i in range(max_cards_in_tableau)]
+        if rows:
+            print("\n".join(rows))
         
-        print(f"\n{default_text_color}" + "="*70)
+        print(f"\n{default_text_color}" + "=" * rule_width)
         timer_display = ""
         if self.current_settings.get("timer_enabled", True) and hasattr(game_state, 'elapsed_time'):
              minutes = int(game_state.elapsed_time // 60)
              seconds = int(game_state.elapsed_time % 60)
              timer_display = f" | Time: {minutes:02d}:{seconds:02d}"
         print(f"{default_text_color}Moves: {game_state.moves_count} | Difficulty: {game_state.difficulty.capitalize()}{timer_display}")
-        print(f"{default_text_color}" + "="*70 + Style.RESET_ALL)
+        print(f"{default_text_color}Wariant: {game_state.variant.display_name}")
+        print(f"{default_text_color}" + "=" * rule_width + Style.RESET_ALL)
 
     def display_main_menu(self):
         clear_console()
@@ -203,8 +300,12 @@ class ConsoleUI:
         print(f"  4. Mierzenie czasu  : {SETTING_OPTIONS_BOOLEAN.get(current_settings.get('timer_enabled', True), 'N/A')}")
         print(f"  5. Cofanie ruchów   : {SETTING_OPTIONS_BOOLEAN.get(current_settings.get('undo_enabled', True), 'N/A')}")
         print(f"  6. Przetasowanie Waste: {SETTING_OPTIONS_RESHUFFLE.get(current_settings.get('reshuffle_waste_on_empty_stock', True), 'N/A')}") 
+        print(f"  7. Telemetria       : {SETTING_OPTIONS_BOOLEAN.get(current_settings.get('telemetry_enabled', False), 'N/A')}")
+        print(f"  8. Wariant gry      : {SETTING_OPTIONS_VARIANT.get(current_settings.get('variant', 'classic'), 'N/A')}")
+        print(f"  9. Tasowanie Waste  : {SETTING_OPTIONS_SHUFFLE_RECYCLE.get(current_settings.get('shuffle_waste_on_recycle', True), 'N/A')}")
+        print(f" 10. Trudność rozdań  : {SETTING_OPTIONS_DEAL_DIFFICULTY.get(current_settings.get('deal_difficulty', 'any'), 'N/A')}")
         print("-" * 60)
-        print("Wpisz numer opcji (1-6), aby ją zmienić.")
+        print("Wpisz numer opcji (1-10), aby ją zmienić.")
         print("s. Zapisz i Wróć do Menu Głównego")
         print("x. Anuluj i Wróć do Menu Głównego")
         print("-" * 60)
@@ -266,6 +367,27 @@ class ConsoleUI:
             current_value
         )
 
+    def ask_shuffle_recycle_setting(self, current_value: bool) -> bool:
+        return self.ask_setting_choice(
+            "Czy tasować karty ze Stosu Odkrytych (Waste) przy przekładaniu ich z powrotem do Talii?",
+            SETTING_OPTIONS_SHUFFLE_RECYCLE,
+            current_value
+        )
+
+    def ask_deal_difficulty_setting(self, current_value: str) -> str:
+        return self.ask_setting_choice(
+            "Jakie rozdania losować? (łatwe/średnie/trudne wymagają zbudowanego indeksu trudności, inaczej rozdanie jest losowe; wygrywalne są sprawdzane w tle)",
+            SETTING_OPTIONS_DEAL_DIFFICULTY,
+            current_value
+        )
+
+    def ask_variant_setting(self, current_value: str) -> str:
+        return self.ask_setting_choice(
+            "Wybierz wariant gry:",
+            SETTING_OPTIONS_VARIANT,
+            current_value
+        )
+
     def display_message(self, message: str, is_error: bool = False):
         _, _, default_text_color = self._get_card_colors()
         color_prefix = Fore.RED if is_error else Fore.GREEN
@@ -284,6 +406,36 @@ class ConsoleUI:
         print(f"\n{Fore.RED}{Style.BRIGHT}Koniec Gry! Brak możliwych ruchów.{Style.RESET_ALL}")
         print(f"{Fore.CYAN}Spróbuj ponownie następnym razem!{Style.RESET_ALL}")
 
+    def display_hint_progress(self, estimate: 'WinProbabilityEstimate'):
+        _, _, default_text_color = self._get_card_colors()
+        print(f"{default_text_color}  Próbki: {estimate.samples:4d} | Szansa wygranej: {estimate.win_probability:.0%}{Style.RESET_ALL}")
+
+    def display_hint(self, estimate: Optional['WinProbabilityEstimate']):
+        if estimate is None:
+            self.display_message("Nie udało się policzyć podpowiedzi w wyznaczonym czasie.", is_error=True)
+            return
+        best_move = estimate.best_move()
+        self.display_message(f"Szansa wygranej: {estimate.win_probability:.0%} ({estimate.samples} próbek).")
+        if best_move is not None:
+            self.display_message(f"Najlepszy ruch: {best_move} ({estimate.move_win_probability[best_move]:.0%}).")
+
+    def display_solver_verdict(self, result: 'SolveResult', sees_hidden_cards: bool = True):
+        """
+        Werdykt solvera. Solver zna zakryte karty, więc jego następny ruch jest pokazywany tylko
+        wtedy, gdy nic nie jest zakryte - inaczej zdradzałby ułożenie kart (ruch podpowiada wtedy Monte Carlo).
+        """
+        from solver.cache import STATUS_SOLVABLE, STATUS_UNSOLVABLE, STATUS_EXHAUSTED
+        label = "Solver (zna zakryte karty)" if sees_hidden_cards else "Solver"
+        if result.status == STATUS_SOLVABLE:
+            next_move = "" if sees_hidden_cards else f" Następny ruch: {result.best_move}."
+            self.display_message(f"{label}: pozycja wygrywalna, {result.depth} ruchów do wygranej.{next_move}")
+        elif result.status == STATUS_UNSOLVABLE:
+            self.display_message(f"{label}: z tej pozycji nie da się już wygrać.")
+        elif result.status == STATUS_EXHAUSTED:
+            self.display_message(f"{label}: nie znalazł wygranej (pomija ruchy uznane za zbędne, więc to nie dowód przegranej).")
+        else:
+            self.display_message(f"{label}: nie rozstrzygnięto w wyznaczonym czasie.")
+
     def display_rules(self):
         clear_console()
         _, _, default_text_color = self._get_card_colors()
@@ -321,12 +473,15 @@ Przegrana: Gra jest przegrana, gdy Talia Rezerwowa jest pusta, opcja przetasowan
         _, _, default_text_color = self._get_card_colors()
         return input(f"{default_text_color}{prompt}{Style.RESET_ALL}").strip().lower()
 
-    def parse_command(self, command_str: str) -> Optional[Tuple[str, List[str]]]:
+    @staticmethod
+    def parse_command(command_str: str) -> Optional[Tuple[str, List[str]]]:
         parts = command_str.split()
         if not parts: return None
         return parts[0], parts[1:]
 
-    def parse_pile_identifier(self, s: str) -> Tuple[Optional[str], Optional[int]]:
+    @staticmethod
+    def parse_pile_identifier(s: str, num_foundation_piles: int = NUM_FOUNDATION_PILES,
+                              num_tableau_piles: int = NUM_TABLEAU_PILES) -> Tuple[Optional[str], Optional[int]]:
         s_upper = s.upper()
         if not s_upper: return None, None
         pile_type_char = s_upper[0]
@@ -337,8 +492,8 @@ Przegrana: Gra jest przegrana, gdy Talia Rezerwowa jest pusta, opcja przetasowan
         if not index_str.isdigit(): return None, None
         try:
             index = int(index_str) - 1 
-            if pile_type_char == PILE_FOUNDATION and not (0 <= index < NUM_FOUNDATION_PILES): return None, None
-            if pile_type_char == PILE_TABLEAU and not (0 <= index < NUM_TABLEAU_PILES): return None, None
+            if pile_type_char == PILE_FOUNDATION and not (0 <= index < num_foundation_piles): return None, None
+            if pile_type_char == PILE_TABLEAU and not (0 <= index < num_tableau_piles): return None, None
             return pile_type_char, index
         except ValueError: return None, None
         
\ No newline at end of file
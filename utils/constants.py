@@ -65,10 +65,15 @@ PILE_STOCK = 'S'
 PILE_WASTE = 'W'
 PILE_FOUNDATION = 'F'
 PILE_TABLEAU = 'T'    
+ACTION_DRAW = 'draw'
+ACTION_RESHUFFLE_STOCK = 'reshuffle_stock'
+ACTION_MOVE = 'move'
 DIFFICULTY_EASY = "easy"
 DIFFICULTY_HARD = "hard"
 NUM_TABLEAU_PILES = 7
 NUM_FOUNDATION_PILES = 4
+RANKS_PER_SUIT = 13
+CARDS_PER_DECK = 52
 MAX_UNDO_MOVES = 3
 FACE_DOWN_CARD_STR = "[XX]"
 EMPTY_PILE_STR = "[  ]"
@@ -0,0 +1,321 @@
+"""
+Kolumnowe archiwum zakończonych partii (wyniki turniejów botów i przeglądów solvera).
+
+Jeden rekord JSON na partię jest wolny w zapisie i przy przeglądaniu milionów partii. Archiwum
+trzyma zamiast tego każdą kolumnę osobno: ziarno, zestaw reguł i etykietę (słownikowo, jako
+indeksy), wynik, liczbę ruchów, czas oraz końce zakresów w spakowanym bloku ruchów (3 bajty na
+ruch). Wiersze są zapisywane grupami (row groups) - każda kolumna grupy jest osobnym fragmentem
+pliku kompresowanym zlib, a gdy kompresja się nie opłaca, zapisywanym surowo. Stopka (JSON)
+opisuje położenie wszystkich fragmentów, więc czytnik mapuje plik do pamięci i dla zapytania
+dotyka tylko bajtów potrzebnych kolumn; surowe fragmenty są widokami NumPy bez kopiowania.
+
+Plik: nagłówek (magic, wersja), fragmenty kolumn, stopka JSON, długość stopki (uint64) i magic.
+
+Uruchomienie:
+    python -m utils.game_archive stats wyniki.pga
+    python -m utils.game_archive show wyniki.pga 12345
+"""
+import argparse
+import array
+import bisect
+import json
+import mmap
+import struct
+import sys
+import zlib
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+from game_logic.move import Move
+from utils.constants import PILE_STOCK, PILE_WASTE, PILE_FOUNDATION, PILE_TABLEAU
+
+ARCHIVE_MAGIC = b"PSJARCHV"
+ARCHIVE_VERSION = 1
+HEADER_FORMAT = "<8sH6x"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+TRAILER_FORMAT = "<Q8s"
+TRAILER_SIZE = struct.calcsize(TRAILER_FORMAT)
+DEFAULT_ROW_GROUP_SIZE = 65536
+DEFAULT_COMPRESSION_LEVEL = 6
+# Fragment zostaje surowy, gdy kompresja nie zmniejsza go przynajmniej o tyle.
+MIN_COMPRESSION_GAIN = 0.9
+CODEC_NONE = "none"
+CODEC_ZLIB = "zlib"
+
+RESULT_LOSS = 0
+RESULT_WIN = 1
+RESULT_UNKNOWN = 2
+RESULT_NAMES = {RESULT_LOSS: "przegrana", RESULT_WIN: "wygrana", RESULT_UNKNOWN: "nierozstrzygnięta"}
+
+# Kolumna -> (kod typu array, dtype NumPy). Wszystkie liczby w pliku są little-endian.
+COLUMNS: Dict[str, Tuple[str, str]] = {
+    "seed": ("Q", "<u8"),
+    "rules": ("H", "<u2"),
+    "label": ("H", "<u2"),
+    "result": ("B", "u1"),
+    "moves": ("I", "<u4"),
+    "elapsed": ("f", "<f4"),
+    "move_end": ("I", "<u4"),
+    "move_blob": ("B", "u1"),
+}
+DICTIONARY_COLUMNS = ("rules", "label")
+MOVE_SIZE = 3
+
+_PILE_TYPES = (PILE_STOCK, PILE_WASTE, PILE_FOUNDATION, PILE_TABLEAU)
+_PILE_TYPE_INDEX = {pile_type: i for i, pile_type in enumerate(_PILE_TYPES)}
+
+
+def encode_move(move: Move) -> bytes:
+    """Ruch jako 3 bajty: źródło i cel (typ stosu << 5 | numer stosu od 1, 0 = bez numeru), liczba kart."""
+    source = _PILE_TYPE_INDEX[move.from_pile_type] << 5 | (move.from_idx + 1 if move.from_idx is not None else 0)
+    dest = _PILE_TYPE_INDEX[move.to_pile_type] << 5 | (move.to_idx + 1 if move.to_idx is not None else 0)
+    return bytes((source, dest, move.num_cards))
+
+
+def decode_moves(data: bytes) -> List[Move]:
+    moves = []
+    for i in range(0, len(data), MOVE_SIZE):
+        source, dest, num_cards = data[i], data[i + 1], data[i + 2]
+        moves.append(Move(_PILE_TYPES[source >> 5], (source & 31) - 1 if source & 31 else None,
+                          _PILE_TYPES[dest >> 5], (dest & 31) - 1 if dest & 31 else None, num_cards))
+    return moves
+
+
+class ArchivedGame(NamedTuple):
+    """Jeden wiersz archiwum w postaci do wyświetlenia."""
+    seed: int
+    rules: str
+    label: str
+    result: int
+    moves: int
+    elapsed: float
+    move_list: List[Move]
+
+
+class ArchiveWriter:
+    """
+    Zapisuje partie wierszami do bufora kolumn (array) i co `row_group_size` wierszy
+    zrzuca go do pliku jako grupę. Stopka powstaje przy close().
+    """
+    def __init__(self, path: str, row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+                 compression_level: int = DEFAULT_COMPRESSION_LEVEL):
+        self.path = path
+        self.row_group_size = row_group_size
+        self.compression_level = compression_level
+        self._file = open(path, "wb")
+        self._file.write(struct.pack(HEADER_FORMAT, ARCHIVE_MAGIC, ARCHIVE_VERSION))
+        self._dictionaries: Dict[str, Dict[str, int]] = {name: {} for name in DICTIONARY_COLUMNS}
+        self._row_groups: List[Dict[str, Any]] = []
+        self._buffers = self._new_buffers()
+        self._rows_in_group = 0
+        self.rows = 0
+
+    @staticmethod
+    def _new_buffers() -> Dict[str, array.array]:
+        return {name: array.array(typecode) for name, (typecode, _) in COLUMNS.items()}
+
+    def _dictionary_index(self, column: str, value: str) -> int:
+        dictionary = self._dictionaries[column]
+        index = dictionary.get(value)
+        if index is None:
+            index = dictionary[value] = len(dictionary)
+        return index
+
+    def append(self, seed: int, rules: str, result: int, moves: int, elapsed: float,
+               move_list: Sequence[Move] = (), label: str = "") -> None:
+        buffers = self._buffers
+        buffers["seed"].append(seed)
+        buffers["rules"].append(self._dictionary_index("rules", rules))
+        buffers["label"].append(self._dictionary_index("label", label))
+        buffers["result"].append(result)
+        buffers["moves"].append(moves)
+        buffers["elapsed"].append(elapsed)
+        if move_list:
+            buffers["move_blob"].frombytes(b"".join(encode_move(move) for move in move_list))
+        buffers["move_end"].append(len(buffers["move_blob"]))
+        self._rows_in_group += 1
+        self.rows += 1
+        if self._rows_in_group >= self.row_group_size:
+            self._flush_row_group()
+
+    def _flush_row_group(self) -> None:
+        if not self._rows_in_group:
+            return
+        chunks: Dict[str, List[Any]] = {}
+        for name, values in self._buffers.items():
+            if sys.byteorder != "little":
+                values.byteswap()
+            raw = values.tobytes()
+            compressed = zlib.compress(raw, self.compression_level)
+            codec, data = (CODEC_ZLIB, compressed) if len(compressed) < len(raw) * MIN_COMPRESSION_GAIN \
+                else (CODEC_NONE, raw)
+            chunks[name] = [self._file.tell(), len(data), len(raw), codec]
+            self._file.write(data)
+        self._row_groups.append({"rows": self._rows_in_group, "columns": chunks})
+        self._buffers = self._new_buffers()
+        self._rows_in_group = 0
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        self._flush_row_group()
+        footer = {
+            "version": ARCHIVE_VERSION,
+            "columns": {name: dtype for name, (_, dtype) in COLUMNS.items()},
+            "dictionaries": {name: list(values) for name, values in self._dictionaries.items()},
+            "row_groups": self._row_groups,
+        }
+        footer_bytes = json.dumps(footer, ensure_ascii=False).encode("utf-8")
+        self._file.write(footer_bytes)
+        self._file.write(struct.pack(TRAILER_FORMAT, len(footer_bytes), ARCHIVE_MAGIC))
+        self._file.close()
+
+    def __enter__(self) -> 'ArchiveWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class GameArchive:
+    """Czytnik archiwum mapowany do pamięci; kolumny są odczytywane osobno i tylko na żądanie."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Plik archiwum '{path}' jest pusty.")
+        magic, version = struct.unpack_from(HEADER_FORMAT, self._mmap, 0)
+        footer_length, trailer_magic = struct.unpack_from(TRAILER_FORMAT, self._mmap, len(self._mmap) - TRAILER_SIZE)
+        if magic != ARCHIVE_MAGIC or trailer_magic != ARCHIVE_MAGIC or version != ARCHIVE_VERSION:
+            self.close()
+            raise ValueError(f"Plik '{path}' nie jest archiwum partii w wersji {ARCHIVE_VERSION} (albo nie został zamknięty).")
+        footer_start = len(self._mmap) - TRAILER_SIZE - footer_length
+        footer = json.loads(bytes(self._mmap[footer_start:footer_start + footer_length]).decode("utf-8"))
+        self.dtypes: Dict[str, str] = footer["columns"]
+        self.dictionaries: Dict[str, List[str]] = footer["dictionaries"]
+        self.row_groups: List[Dict[str, Any]] = footer["row_groups"]
+        self._group_starts: List[int] = []
+        total = 0
+        for group in self.row_groups:
+            self._group_starts.append(total)
+            total += group["rows"]
+        self.rows = total
+        self._cached_group: Optional[Tuple[int, Any, Any]] = None
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def _chunk(self, group_index: int, name: str) -> "np.ndarray":
+        """Jedna kolumna jednej grupy: widok na mmap (fragment surowy) albo rozpakowana kopia."""
+        import numpy as np
+
+        offset, stored_length, _, codec = self.row_groups[group_index]["columns"][name]
+        dtype = np.dtype(self.dtypes[name])
+        if codec == CODEC_NONE:
+            return np.frombuffer(self._mmap, dtype=dtype, count=stored_length // dtype.itemsize, offset=offset)
+        return np.frombuffer(zlib.decompress(self._mmap[offset:offset + stored_length]), dtype=dtype)
+
+    def column(self, name: str) -> "np.ndarray":
+        """Cała kolumna (wszystkie grupy). Kolumny słownikowe zwracają indeksy - zob. `dictionaries`."""
+        import numpy as np
+
+        if name not in self.dtypes or name in ("move_end", "move_blob"):
+            raise KeyError(f"Nieznana kolumna: '{name}'.")
+        chunks = [self._chunk(i, name) for i in range(len(self.row_groups))]
+        if len(chunks) == 1:
+            return chunks[0]
+        return np.concatenate(chunks) if chunks else np.empty(0, dtype=self.dtypes[name])
+
+    def stored_bytes(self, name: str) -> int:
+        """Liczba bajtów pliku zajmowanych przez kolumnę - tyle czyta zapytanie o nią."""
+        return sum(group["columns"][name][1] for group in self.row_groups)
+
+    def move_list(self, row: int) -> List[Move]:
+        """Ruchy partii `row` (odczytuje tylko blok ruchów jej grupy; ostatnia grupa jest zapamiętana)."""
+        group_index = bisect.bisect_right(self._group_starts, row) - 1
+        if not 0 <= row < self.rows:
+            raise IndexError(row)
+        if self._cached_group is None or self._cached_group[0] != group_index:
+            self._cached_group = (group_index, self._chunk(group_index, "move_end"), self._chunk(group_index, "move_blob"))
+        _, move_end, move_blob = self._cached_group
+        local_row = row - self._group_starts[group_index]
+        start = int(move_end[local_row - 1]) if local_row else 0
+        return decode_moves(move_blob[start:int(move_end[local_row])].tobytes())
+
+    def game(self, row: int) -> ArchivedGame:
+        group_index = bisect.bisect_right(self._group_starts, row) - 1
+        if not 0 <= row < self.rows:
+            raise IndexError(row)
+        local_row = row - self._group_starts[group_index]
+        values = {name: self._chunk(group_index, name)[local_row].item()
+                  for name in ("seed", "rules", "label", "result", "moves", "elapsed")}
+        return ArchivedGame(values["seed"], self.dictionaries["rules"][values["rules"]],
+                            self.dictionaries["label"][values["label"]], values["result"], values["moves"],
+                            values["elapsed"], self.move_list(row))
+
+    def close(self) -> None:
+        self._cached_group = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Surowe kolumny zwrócone przez column() są widokami na mapowanie - zostanie zwolnione razem z nimi.
+            pass
+        self._file.close()
+
+    def __enter__(self) -> 'GameArchive':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def summarize_archive(archive: GameArchive) -> List[Tuple[str, str, int, float, float, float]]:
+    """
+    Zapytanie zbiorcze na samych kolumnach rules, label, result, moves i elapsed:
+    (reguły, etykieta, partie, procent wygranych, średnia ruchów wygranych, średni czas).
+    """
+    import numpy as np
+
+    rules, labels = archive.column("rules"), archive.column("label")
+    results, moves, elapsed = archive.column("result"), archive.column("moves"), archive.column("elapsed")
+    groups = rules.astype(np.uint32) << 16 | labels
+    summary = []
+    for key in np.unique(groups):
+        mask = groups == key
+        wins = mask & (results == RESULT_WIN)
+        count = int(mask.sum())
+        win_count = int(wins.sum())
+        summary.append((archive.dictionaries["rules"][int(key) >> 16], archive.dictionaries["label"][int(key) & 0xFFFF],
+                        count, win_count / count, float(moves[wins].mean()) if win_count else 0.0,
+                        float(elapsed[mask].mean())))
+    return summary
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Przeglądanie kolumnowego archiwum partii.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    stats_parser = subparsers.add_parser("stats", help="Procent wygranych według reguł i etykiety.")
+    stats_parser.add_argument("path")
+    show_parser = subparsers.add_parser("show", help="Pokaż jedną partię.")
+    show_parser.add_argument("path")
+    show_parser.add_argument("row", type=int)
+    args = parser.parse_args(argv)
+
+    with GameArchive(args.path) as archive:
+        if args.command == "stats":
+            touched = sum(archive.stored_bytes(name) for name in ("rules", "label", "result", "moves", "elapsed"))
+            print(f"{len(archive)} partii w {len(archive.row_groups)} grupach, zapytanie czyta {touched} bajtów")
+            for rules, label, count, win_rate, avg_moves, avg_elapsed in summarize_archive(archive):
+                print(f"  {rules:<40} {label:<12} {count:>10d}  wygrane: {win_rate:6.1%}  "
+                      f"śr. ruchów wygranej: {avg_moves:6.1f}  śr. czas: {avg_elapsed * 1000:8.2f} ms")
+        else:
+            game = archive.game(args.row)
+            print(f"ziarno {game.seed}, {game.rules}, {game.label}: {RESULT_NAMES[game.result]}, "
+                  f"{game.moves} ruchów, {game.elapsed:.3f} s")
+            print(" ".join(str(move) for move in game.move_list))
+
+
+if __name__ == "__main__":
+    main()
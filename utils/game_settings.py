@@ -8,6 +8,8 @@ CARD_STYLE_MINIMAL = "minimal"
 THEME_LIGHT = "light"
 THEME_DARK = "dark"
 DEFAULT_DIFFICULTY = "easy" 
+DEAL_DIFFICULTY_ANY = "any"
+DEAL_DIFFICULTY_WINNABLE = "winnable"
 
 def get_default_settings() -> dict:
     """Zwraca domyślny słownik ustawień."""
@@ -18,6 +20,11 @@ def get_default_settings() -> dict:
         "timer_enabled": True,
         "undo_enabled": True,
         "reshuffle_waste_on_empty_stock": True, 
+        "shuffle_waste_on_recycle": True,
+        "hint_time_budget": 2.0,
+        "telemetry_enabled": False,
+        "variant": "classic",
+        "deal_difficulty": "any",
     }
 
 def load_settings() -> dict:
@@ -60,6 +67,27 @@ SETTING_OPTIONS_CARD_STYLE = {
 SETTING_OPTIONS_THEME = {THEME_LIGHT: "Jasny", THEME_DARK: "Ciemny"}
 SETTING_OPTIONS_BOOLEAN = {True: "Włączone", False: "Wyłączone"}
 
+SETTING_OPTIONS_SHUFFLE_RECYCLE = {
+    True: "Tak (karty są tasowane)",
+    False: "Nie (kolejność zachowana, jak w klasycznym Klondike)"
+}
+
+SETTING_OPTIONS_VARIANT = {
+    "classic": "Klasyczny (według poziomu trudności)",
+    "klondike-1": "Klondike, dobieranie 1",
+    "klondike-3": "Klondike, dobieranie 3",
+    "klondike-3-limited": "Klondike, dobieranie 3, maks. 3 przejścia",
+    "double-klondike": "Podwójny Klondike (104 karty, 9 kolumn)",
+}
+
+SETTING_OPTIONS_DEAL_DIFFICULTY = {
+    "any": "Dowolne (losowe rozdanie)",
+    "winnable": "Dowolne wygrywalne (sprawdzane w tle)",
+    "easy": "Łatwe (sprawdzone jako wygrywalne)",
+    "medium": "Średnie (sprawdzone jako wygrywalne)",
+    "hard": "Trudne (sprawdzone jako wygrywalne)",
+}
+
 SETTING_OPTIONS_RESHUFFLE = {
     True: "Tak (klasycznie, przetasuj)", 
     False: "Nie (koniec kart = koniec gry, jeśli brak ruchów)"
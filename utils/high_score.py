@@ -1,36 +1,63 @@
 import os
+from typing import Callable, List, NamedTuple, Optional
 
 HIGH_SCORE_FILE = "solitaire_high_scores.txt"
 MAX_SCORES_DISPLAYED = 10 
 
-def load_high_scores() -> list[int]:
+
+class HighScore(NamedTuple):
+    """Wynik z rozdaniem, w którym padł (ziarno i GameState.rules_key), o ile je znamy."""
+    moves: int
+    seed: Optional[int] = None
+    rules_key: Optional[str] = None
+
+
+def _parse_line(line: str) -> Optional[HighScore]:
+    # Linia to "ruchy [ziarno klucz_reguł]" - starsze pliki mają same liczby ruchów.
+    parts = line.split()
+    if not parts or not parts[0].isdigit():
+        return None
+    if len(parts) == 3 and parts[1].isdigit():
+        return HighScore(int(parts[0]), int(parts[1]), parts[2])
+    return HighScore(int(parts[0]))
+
+
+def load_high_score_entries() -> List[HighScore]:
     if not os.path.exists(HIGH_SCORE_FILE):
         return []
     try:
         with open(HIGH_SCORE_FILE, 'r') as f:
-            scores = [int(line.strip()) for line in f if line.strip().isdigit()]
-        return sorted(scores) 
+            entries = [entry for entry in map(_parse_line, f) if entry is not None]
+        return sorted(entries, key=lambda entry: entry.moves)
     except Exception:
         return []
 
-def save_high_score(moves: int):
-    """Dodaje nowy wynik i zapisuje najlepsze wyniki do pliku."""
-    scores = load_high_scores()
-    scores.append(moves)
-    scores = sorted(scores)[:MAX_SCORES_DISPLAYED]
+def load_high_scores() -> list[int]:
+    return [entry.moves for entry in load_high_score_entries()]
+
+def save_high_score(moves: int, seed: Optional[int] = None, rules_key: Optional[str] = None):
+    """Dodaje nowy wynik (z rozdaniem, jeśli jest znane) i zapisuje najlepsze wyniki do pliku."""
+    entries = load_high_score_entries()
+    entries.append(HighScore(moves, seed, rules_key))
+    entries = sorted(entries, key=lambda entry: entry.moves)[:MAX_SCORES_DISPLAYED]
     try:
         with open(HIGH_SCORE_FILE, 'w') as f:
-            for score in scores:
-                f.write(f"{score}\n")
+            for entry in entries:
+                if entry.seed is not None and entry.rules_key:
+                    f.write(f"{entry.moves} {entry.seed} {entry.rules_key}\n")
+                else:
+                    f.write(f"{entry.moves}\n")
     except Exception as e:
         print(f"Warning: Could not save high score: {e}")
 
-def get_formatted_high_scores() -> str:
-    scores = load_high_scores()
-    if not scores:
+def get_formatted_high_scores(describe_deal: Optional[Callable[[HighScore], str]] = None) -> str:
+    """`describe_deal` dopisuje do wyniku opis rozdania, np. porównanie z minimum ruchów (pusty - nic)."""
+    entries = load_high_score_entries()
+    if not entries:
         return "No high scores yet."
-    
+
     lines = ["Najlepsze Wyniki:"]
-    for i, score in enumerate(scores[:MAX_SCORES_DISPLAYED], 1):
-        lines.append(f"{i}. {score} moves")
+    for i, entry in enumerate(entries[:MAX_SCORES_DISPLAYED], 1):
+        note = describe_deal(entry) if describe_deal is not None else ""
+        lines.append(f"{i}. {entry.moves} moves" + (f" ({note})" if note else ""))
     return "\n".join(lines)
@@ -0,0 +1,136 @@
+import atexit
+import collections
+import gzip
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+from utils.constants import ACTION_MOVE
+
+DEFAULT_TELEMETRY_DIR = "telemetry"
+DEFAULT_MAX_FILE_BYTES = 16 * 1024 * 1024
+DEFAULT_FLUSH_INTERVAL = 0.5
+MAX_QUEUED_EVENTS = 100_000
+LOG_FILE_PREFIX = "events"
+
+EVENT_GAME_START = "game_start"
+EVENT_ACTION = "action"
+EVENT_UNDO = "undo"
+EVENT_GAME_END = "game_end"
+
+
+class EventLogger:
+    """
+    Bufor zdarzeń z gry zapisywany w tle jako JSONL (opcjonalnie gzip) z rotacją po rozmiarze.
+
+    emit() tylko dokłada krotkę do deque (operacja atomowa w CPythonie), więc pętla gry nigdy
+    nie czeka na dysk. Wątek w tle co `flush_interval` sekund opróżnia kolejkę i zapisuje
+    zdarzenia paczkami. Przy przepełnieniu kolejki najstarsze zdarzenia są porzucane.
+    """
+    def __init__(self, directory: str = DEFAULT_TELEMETRY_DIR, compress: bool = True,
+                 max_file_bytes: int = DEFAULT_MAX_FILE_BYTES, flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        self.directory = directory
+        self.compress = compress
+        self.max_file_bytes = max_file_bytes
+        self.flush_interval = flush_interval
+        self._queue: collections.deque = collections.deque(maxlen=MAX_QUEUED_EVENTS)
+        self._wake = threading.Event()
+        self._closed = False
+        self._file = None
+        self._file_bytes = 0
+        self._file_counter = 0
+        self._thread = threading.Thread(target=self._writer_loop, name="telemetry-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def emit(self, event_type: str, **fields: Any) -> None:
+        self._queue.append((time.time(), event_type, fields))
+
+    def close(self) -> None:
+        """Zapisuje zaległe zdarzenia i zamyka plik."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._thread.join()
+
+    def _writer_loop(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._flush()
+        self._flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _flush(self) -> None:
+        lines = []
+        while True:
+            try:
+                timestamp, event_type, fields = self._queue.popleft()
+            except IndexError:
+                break
+            record = {"ts": timestamp, "event": event_type}
+            record.update(fields)
+            lines.append(json.dumps(record, ensure_ascii=False, default=str))
+        if not lines:
+            return
+        data = ("\n".join(lines) + "\n").encode("utf-8")
+        try:
+            if self._file is None or self._file_bytes >= self.max_file_bytes:
+                self._open_next_file()
+            self._file.write(data)
+            self._file.flush()
+            self._file_bytes += len(data)
+        except OSError as e:
+            print(f"Warning: Could not write telemetry: {e}")
+
+    def _open_next_file(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        os.makedirs(self.directory, exist_ok=True)
+        self._file_counter += 1
+        name = f"{LOG_FILE_PREFIX}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self._file_counter:04d}.jsonl"
+        path = os.path.join(self.directory, name)
+        self._file = gzip.open(path + ".gz", "ab") if self.compress else open(path, "ab")
+        self._file_bytes = 0
+
+
+class NullEventLogger:
+    """Logger używany, gdy telemetria jest wyłączona - nic nie zapisuje."""
+    def emit(self, event_type: str, **fields: Any) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+_NULL_LOGGER = NullEventLogger()
+_active_loggers: Dict[str, EventLogger] = {}
+
+
+def get_event_logger(settings: Dict[str, Any]):
+    """Zwraca współdzielony logger dla katalogu z ustawień albo NullEventLogger, gdy telemetria jest wyłączona."""
+    if not settings.get("telemetry_enabled", False):
+        return _NULL_LOGGER
+    directory = settings.get("telemetry_dir", DEFAULT_TELEMETRY_DIR)
+    if directory not in _active_loggers:
+        _active_loggers[directory] = EventLogger(directory, compress=settings.get("telemetry_compress", True))
+    return _active_loggers[directory]
+
+
+def describe_action(action: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Skraca wpis z GameState.move_history do postaci zapisywanej w zdarzeniu (typ, źródło, cel, liczba kart)."""
+    if action is None:
+        return None
+    if action['type'] != ACTION_MOVE:
+        return {"type": action['type']}
+    def pile_id(pile_type: str, idx: Optional[int]) -> str:
+        return pile_type + (str(idx + 1) if idx is not None else "")
+    return {
+        "type": ACTION_MOVE,
+        "from": pile_id(action['from_pile_type'], action['from_idx']),
+        "to": pile_id(action['to_pile_type'], action['to_idx']),
+        "cards": len(action['moved_cards_data']),
+    }